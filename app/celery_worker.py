@@ -1,10 +1,19 @@
 from celery import Celery
+from celery.schedules import crontab
+from dotenv import load_dotenv
+import os
+load_dotenv()
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+STATION_INDEX_REFRESH_SECONDS = float(os.getenv("STATION_INDEX_REFRESH_SECONDS", "3600"))
+FARE_CALENDAR_HOUR = int(os.getenv("FARE_CALENDAR_HOUR", "21"))  # UTC, 02:30 IST
+AVAILABILITY_MONITOR_INTERVAL = float(os.getenv("AVAILABILITY_MONITOR_INTERVAL", "1800"))
 
 # Create Celery app with Redis broker & backend
 celery_app = Celery(
     "worker",
-    broker="redis://localhost:6379/0",   # Redis broker
-    backend="redis://localhost:6379/0"  # Optional: For task results
+    broker=REDIS_URL,   # Redis broker
+    backend=REDIS_URL  # Optional: For task results
 )
 
 
@@ -21,5 +30,22 @@ celery_app.conf.update(
 )
 
 
+# Periodic jobs, run with `celery -A app.celery_worker beat`
+celery_app.conf.beat_schedule = {
+    "refresh-station-index": {
+        "task": "app.task.trip_tasks.refresh_station_index",
+        "schedule": STATION_INDEX_REFRESH_SECONDS,
+    },
+    "precompute-fare-calendar": {
+        "task": "app.task.trip_tasks.precompute_fare_calendar",
+        "schedule": crontab(hour=FARE_CALENDAR_HOUR, minute=0),
+    },
+    "monitor-train-availability": {
+        "task": "app.task.trip_tasks.monitor_train_availability",
+        "schedule": AVAILABILITY_MONITOR_INTERVAL,
+    },
+}
+
+
 # Auto-discover tasks from your app.tasks folder
 celery_app.autodiscover_tasks(["app.task"])
@@ -157,6 +157,7 @@ class Trip(Base):
     itinerary = _orm.relationship("Itinerary", back_populates="trip", cascade="all, delete-orphan")
     tourist_places = _orm.relationship("TouristPlace", back_populates="trip", cascade="all, delete-orphan")
     travel_options = _orm.relationship("TravelOptions", back_populates="trip", cascade="all, delete-orphan")
+    availability_alerts = _orm.relationship("AvailabilityAlert", back_populates="trip", cascade="all, delete-orphan")
 
 
 
@@ -263,4 +264,21 @@ class TravelOptions(Base):
     created_at = Column(DateTime, default=_dt.datetime.utcnow, nullable=False)
 
     # Relationship with Trip
-    trip = _orm.relationship("Trip", back_populates="travel_options")
\ No newline at end of file
+    trip = _orm.relationship("Trip", back_populates="travel_options")
+
+
+class AvailabilityAlert(Base):
+    __tablename__ = "availability_alerts"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    trip_id = Column(Integer, ForeignKey("trips.id", ondelete="CASCADE"), nullable=False)
+    from_station = Column(String, nullable=False)  # station code, e.g. "NDLS"
+    to_station = Column(String, nullable=False)
+    travel_date = Column(String, nullable=False)  # DD/MM/YYYY
+    changes = Column(JSONB, nullable=False)  # [{"trainNumber", "enqClass", "previous", "current", ...}]
+    is_read = Column(Boolean, default=False)
+    created_at = Column(DateTime, default=_dt.datetime.utcnow, nullable=False)
+
+    # Relationship with Trip
+    trip = _orm.relationship("Trip", back_populates="availability_alerts")
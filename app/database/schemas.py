@@ -95,4 +95,21 @@ class TrainSearchRequest(BaseModel):
     to_station: str
     travel_date: str  # Accepts DD/MM/YYYY or YYYY-MM-DD
     coupon_code: Optional[str] = ""
-    time_filter:Optional[str] = ""
\ No newline at end of file
+    time_filter:Optional[str] = ""
+    travel_class: Optional[TrainClassEnum] = None
+    max_fare: Optional[float] = None
+    availability: Optional[str] = None  # AVAILABLE, RAC, WAITLIST, NOT_AVAILABLE
+    sort_by: Optional[str] = None  # fare, duration, departure
+    descending: Optional[bool] = False
+    page: Optional[int] = 1
+    page_size: Optional[int] = None  # None returns every matching train
+
+
+class FlexibleTrainSearchRequest(BaseModel):
+    from_station: str  # station code or name
+    to_station: str
+    travel_date: str  # Accepts DD/MM/YYYY or YYYY-MM-DD
+    flex_days: Optional[int] = 3  # also search this many days before and after travel_date
+    alternative_from_stations: Optional[List[str]] = []
+    alternative_to_stations: Optional[List[str]] = []
+    time_filter: Optional[str] = ""
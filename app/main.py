@@ -10,6 +10,8 @@ from app.routers.trips import router as trips
 from app.routers.authentication_react import router as react
 from app.routers.user_preferences import router as user_preferences
 from app.routers.travel_mode import router as travel_mode
+from app.utils.easemytrip import easemytrip_client
+from app.utils.travel_dataset import travel_dataset_manager
 
 
 
@@ -18,6 +20,7 @@ from app.routers.travel_mode import router as travel_mode
 from fastapi.middleware.cors import CORSMiddleware
 
 from dotenv import load_dotenv
+import asyncio
 import logging
 import os
 
@@ -59,6 +62,21 @@ auth_models.Base.metadata.create_all(bind=engine)
 
 
 
+@app.on_event("startup")
+async def warm_travel_dataset():
+    # Load the dataset (and its derived indexes) before serving, off the event loop
+    try:
+        await asyncio.to_thread(travel_dataset_manager.current)
+    except Exception as e:
+        print(f"Error loading travel dataset at startup: {e}")
+
+
+@app.on_event("shutdown")
+async def close_http_clients():
+    await easemytrip_client.aclose()
+
+
+
 @app.get("/", status_code=status.HTTP_200_OK)
 async def user(user: user_dependency, db: db_dependency):
     if user is None:
@@ -8,7 +8,8 @@ from fastapi.security import OAuth2PasswordRequestForm
 from app.database.models import User
 from app.database.schemas import CreateUserRequest, GoogleUser, Token, RefreshTokenRequest
 from app.utils.auth_helpers import create_access_token, authenticate_user, bcrypt_context, create_refresh_token, \
-    create_user_from_google_info, get_user_by_google_sub, token_expired, decode_token, user_dependency
+    create_user_from_google_info, get_user_by_google_sub, token_expired, decode_token, user_dependency, \
+    create_stream_token, STREAM_TOKEN_SCOPE, STREAM_TOKEN_MINUTES
 from app.database.database import db_dependency
 from app.utils.auth_helpers import oauth
 from fastapi import Request
@@ -210,6 +211,13 @@ async def refresh_access_token(db: db_dependency, refresh_token_request: Refresh
             }
 
         user = decode_token(token)
+        if user.get("scope") == STREAM_TOKEN_SCOPE:
+            return {
+                "status": False,
+                "data": None,
+                "message": "Stream tokens can't be refreshed.",
+                "status_code": status.HTTP_401_UNAUTHORIZED
+            }
         access_token = create_access_token(user["sub"], user["id"], timedelta(days=7))
         refresh_token = create_refresh_token(user["sub"], user["id"], timedelta(days=14))
 
@@ -225,4 +233,28 @@ async def refresh_access_token(db: db_dependency, refresh_token_request: Refresh
             "data": None,
             "message": f"Error refreshing token: {str(e)}",
             "status_code": status.HTTP_400_BAD_REQUEST
-        }
\ No newline at end of file
+        }
+
+
+# ----------------------------
+# Stream Token
+# ----------------------------
+@router.post("/stream-token", description="Short-lived token for opening event streams with EventSource (?token=...)")
+async def get_stream_token(user: user_dependency):
+    try:
+        return {
+            "status": True,
+            "data": {
+                "token": create_stream_token(user.username, user.id),
+                "expires_in": STREAM_TOKEN_MINUTES * 60
+            },
+            "message": "Stream token created",
+            "status_code": status.HTTP_200_OK
+        }
+    except Exception as e:
+        return {
+            "status": False,
+            "data": None,
+            "message": f"Error creating stream token: {str(e)}",
+            "status_code": status.HTTP_400_BAD_REQUEST
+        }
@@ -1,42 +1,57 @@
-
-from fastapi import APIRouter, Depends, status
-from app.database.models import Settings
+import hmac
+import os
+import numpy as np
+from typing import Optional
+from fastapi import APIRouter, Header, Request, Response, status
+from redis.exceptions import RedisError
+from app.database.models import UserPreferences, Trip
 from app.utils.auth_helpers import user_dependency
 from app.database.database import db_dependency
-import random
-import pandas as pd
-import numpy as np 
+from app.utils.place_ranking import RankingContext, get_place_ranker
+from app.utils.place_search import get_place_search
+from app.utils.place_similarity import SIMILAR_PLACES_K
+from app.utils.recommendation_cache import (
+    rotation_window, seconds_until_rotation, recommendation_profile, rotation_rng,
+    recommendation_cache_key, response_etag, etag_matches, get_cached_recommendations, cache_recommendations
+)
+from app.utils.redis_client import get_async_redis
+from app.utils.travel_dataset import get_travel_dataset, travel_dataset_manager, normalise_place_name, TRAVEL_DATASET_VERSION_KEY
 
 router = APIRouter(prefix="/recommendations", tags=["Recommendations"])
 
-
-dataset_path = "./travel_dataset.csv"
-df = pd.read_csv(dataset_path)  # Make sure CSV file exists in data/ folder
-
-# Replace invalid values (NaN, inf) with None for JSON safety
-df.replace([np.inf, -np.inf], np.nan, inplace=True)
-df = df.where(pd.notnull(df), None)
-
-# Columns we want in output
-required_columns = [
-    "name",
-    "city",
-    "state",
-    "activitytype",
-    "Best_time_to_visit",
-    "Image_url",
-    "description"
-]
+# Places returned per activity
+RECOMMENDATIONS_PER_ACTIVITY = 5
+# Places returned in (and around) a trip destination
+RECOMMENDATIONS_PER_TRIP = 10
+MAX_RECOMMENDATIONS_PER_TRIP = 50
+# Search results per page
+SEARCH_RESULTS = 20
+MAX_SEARCH_RESULTS = 50
+# Shared secret for the dataset reload trigger; the endpoint is disabled when unset
+TRAVEL_DATASET_ADMIN_TOKEN = os.getenv("TRAVEL_DATASET_ADMIN_TOKEN")
 
 @router.get("/travelplaces")
 async def get_user_recommendations(
+    request: Request,
+    response: Response,
     db: db_dependency,
-    user: user_dependency
+    user: user_dependency,
+    trip_id: Optional[int] = None
 ):
     try:
-        # 1. Fetch user settings
-        settings = db.query(Settings).filter(Settings.user_id == user.id).first()
-        if not settings or not settings.activities:
+        # 1. Fetch user preferences (and the trip whose dates/budget should shape the ranking)
+        preferences = db.query(UserPreferences).filter(UserPreferences.user_id == user.id).first()
+        trip = None
+        if trip_id is not None:
+            trip = db.query(Trip).filter(Trip.id == trip_id, Trip.user_id == user.id).first()
+            if not trip:
+                return {
+                    "status": False,
+                    "data": [],
+                    "message": "Trip not found",
+                    "status_code": status.HTTP_404_NOT_FOUND
+                }
+        if not preferences or not preferences.activities:
             return {
                 "status": False,
                 "data": [],
@@ -44,42 +59,137 @@ async def get_user_recommendations(
                 "status_code": status.HTTP_404_NOT_FOUND
             }
 
-        user_activities = [a.value if hasattr(a, "value") else a for a in settings.activities]
+        user_activities = [a.value if hasattr(a, "value") else a for a in preferences.activities]
+
+        # One dataset version for the whole request, even if a reload swaps it meanwhile
+        dataset = get_travel_dataset()
+        context = RankingContext.from_preferences(preferences, trip)
+
+        # 2. Same profile + rotation window + dataset version → same response, cached in Redis
+        profile = recommendation_profile(context, user_activities, dataset.fingerprint, rotation_window())
+        cache_key = recommendation_cache_key(profile)
+        cached = await get_cached_recommendations(cache_key)
 
-        # 2. Group recommendations by activity
-        recommendations = {}
+        if cached is None:
+            recommendations = {}
+            ranker = get_place_ranker(dataset)
+            # Seeded from the profile so the jitter only rotates when the window does
+            scores = ranker.score(context, rotation_rng(profile))
+            # Places in season for the trip's months (every place when there is no trip)
+            season = dataset.in_season(context.month_mask())
 
-        for activity in user_activities:
-            activity_data = df[df["activitytype"] == activity.upper()]
+            for activity in user_activities:
+                # Best-scored places of each activity, one score vector for all of them
+                rows = dataset.activity_rows.get(activity.upper())
+                if rows is not None:
+                    rows = rows[season[rows]]
+                recommendations[activity] = [
+                    dataset.records[i] for i in ranker.top_k(scores, RECOMMENDATIONS_PER_ACTIVITY, rows)
+                ] if rows is not None else []
 
-            if activity_data.empty:
-                recommendations[activity] = []
-            else:
-                # Randomly pick 5 records max
-                random_records = activity_data.sample(
-                    n=min(5, len(activity_data)),
-                    random_state=random.randint(1, len(activity_data))
-                )
+            # 3. Check if no data at all
+            if all(len(v) == 0 for v in recommendations.values()):
+                return {
+                    "status": False,
+                    "data": [],
+                    "message": "No recommendations found for your preferences.",
+                    "status_code": status.HTTP_404_NOT_FOUND
+                }
+
+            cached = {"etag": response_etag(recommendations), "data": recommendations}
+            await cache_recommendations(cache_key, cached, seconds_until_rotation())
+
+        # 4. Let clients revalidate with If-None-Match until the window rotates
+        headers = {
+            "ETag": cached["etag"],
+            "Cache-Control": f"private, max-age={seconds_until_rotation()}"
+        }
+        if etag_matches(request.headers.get("if-none-match"), cached["etag"]):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        response.headers.update(headers)
+
+        # 5. Success response
+        return {
+            "status": True,
+            "data": cached["data"],
+            "message": "Recommendations fetched successfully",
+            "status_code": status.HTTP_200_OK
+        }
 
-                # Keep only required columns & handle JSON safe values
-                filtered_records = random_records[required_columns].replace([np.inf, -np.inf], None).where(
-                    pd.notnull(random_records[required_columns]), None
-                )
-                recommendations[activity] = filtered_records.to_dict(orient="records")
+    except Exception as e:
+        return {
+            "status": False,
+            "data": [],
+            "message": f"Error fetching recommendations: {str(e)}",
+            "status_code": status.HTTP_400_BAD_REQUEST
+        }
 
-        # 3. Check if no data at all
-        if all(len(v) == 0 for v in recommendations.values()):
+@router.get("/trip/{trip_id}")
+async def get_trip_recommendations(
+    trip_id: int,
+    request: Request,
+    response: Response,
+    db: db_dependency,
+    user: user_dependency,
+    limit: int = RECOMMENDATIONS_PER_TRIP
+):
+    try:
+        trip = db.query(Trip).filter(Trip.id == trip_id, Trip.user_id == user.id).first()
+        if not trip:
             return {
                 "status": False,
                 "data": [],
-                "message": "No recommendations found for your preferences.",
+                "message": "Trip not found",
                 "status_code": status.HTTP_404_NOT_FOUND
             }
+        limit = max(1, min(limit, MAX_RECOMMENDATIONS_PER_TRIP))
+
+        # 1. Resolve the destination through the city/state index
+        dataset = get_travel_dataset()
+        ranker = get_place_ranker(dataset)
+        locations = dataset.locations
+        cities, states = locations.resolve(trip.destination)
+        inside, nearby = locations.destination_rows(trip.destination)
+        if len(inside) == 0 and len(nearby) == 0:
+            return {
+                "status": False,
+                "data": [],
+                "message": f"No places found for destination '{trip.destination}'",
+                "status_code": status.HTTP_404_NOT_FOUND
+            }
+
+        # 2. Rank the matches with the user's preferences and the trip's dates
+        preferences = db.query(UserPreferences).filter(UserPreferences.user_id == user.id).first()
+        context = RankingContext.from_preferences(preferences, trip)
+        # Seeded like /travelplaces, so identical requests rank alike until the window rotates
+        profile = recommendation_profile(context, context.activities, dataset.fingerprint, rotation_window())
+        scores = ranker.score(context, rotation_rng(profile))
+        records = dataset.records
+
+        # 3. Keep the places whose best months overlap the trip's
+        season = dataset.in_season(context.month_mask())
+        inside, nearby = inside[season[inside]], nearby[season[nearby]]
+
+        data = {
+            "destination": trip.destination,
+            "matched_cities": cities,
+            "matched_states": states,
+            "places": [records[i] for i in ranker.top_k(scores, limit, inside)],
+            "nearby": [records[i] for i in ranker.top_k(scores, limit, nearby)]
+        }
+
+        # 4. Let clients revalidate with If-None-Match until the window rotates
+        headers = {
+            "ETag": response_etag(data),
+            "Cache-Control": f"private, max-age={seconds_until_rotation()}"
+        }
+        if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        response.headers.update(headers)
 
-        # 4. Success response
         return {
             "status": True,
-            "data": recommendations,
+            "data": data,
             "message": "Recommendations fetched successfully",
             "status_code": status.HTTP_200_OK
         }
@@ -88,6 +198,120 @@ async def get_user_recommendations(
         return {
             "status": False,
             "data": [],
-            "message": f"Error fetching recommendations: {str(e)}",
+            "message": f"Error fetching trip recommendations: {str(e)}",
+            "status_code": status.HTTP_400_BAD_REQUEST
+        }
+
+
+@router.get("/similar/{place_name}")
+async def get_similar_places(
+    place_name: str,
+    user: user_dependency,
+    limit: int = SIMILAR_PLACES_K
+):
+    try:
+        dataset = get_travel_dataset()
+        row = dataset.find_place(place_name)
+        if row is None:
+            return {
+                "status": False,
+                "data": [],
+                "message": f"Place '{place_name}' not found",
+                "status_code": status.HTTP_404_NOT_FOUND
+            }
+
+        # Neighbours were precomputed when the dataset was built; this is one array lookup
+        similar = [
+            {**dataset.records[neighbour], "similarity": round(score, 4)}
+            for neighbour, score in dataset.similar_places(row, max(1, limit))
+        ]
+        return {
+            "status": True,
+            "data": {
+                "place": dataset.records[row],
+                "similar": similar
+            },
+            "message": "Similar places fetched successfully",
+            "status_code": status.HTTP_200_OK
+        }
+
+    except Exception as e:
+        return {
+            "status": False,
+            "data": [],
+            "message": f"Error fetching similar places: {str(e)}",
             "status_code": status.HTTP_400_BAD_REQUEST
-        }
\ No newline at end of file
+        }
+
+
+@router.get("/search")
+async def search_places(
+    user: user_dependency,
+    q: str,
+    state: Optional[str] = None,
+    activity: Optional[str] = None,
+    limit: int = SEARCH_RESULTS
+):
+    try:
+        dataset = get_travel_dataset()
+        limit = max(1, min(limit, MAX_SEARCH_RESULTS))
+
+        # Filters are row masks built from the prebuilt state / activity indexes
+        allowed = None
+        if state:
+            allowed = np.zeros(dataset.size, dtype=bool)
+            allowed[dataset.locations.state_rows.get(normalise_place_name(state), [])] = True
+        if activity:
+            activity_mask = np.zeros(dataset.size, dtype=bool)
+            activity_mask[dataset.activity_rows.get(activity.strip().upper(), [])] = True
+            allowed = activity_mask if allowed is None else allowed & activity_mask
+
+        total, results = get_place_search(dataset).search(q, allowed, limit)
+        return {
+            "status": True,
+            "data": {
+                "query": q,
+                "total": total,
+                "results": [{**dataset.records[row], "score": round(score, 4)} for row, score in results]
+            },
+            "message": "Places fetched successfully" if results else "No places matched your search",
+            "status_code": status.HTTP_200_OK
+        }
+
+    except Exception as e:
+        return {
+            "status": False,
+            "data": [],
+            "message": f"Error searching places: {str(e)}",
+            "status_code": status.HTTP_400_BAD_REQUEST
+        }
+
+
+@router.post("/dataset/reload", description="Reload travel_dataset.csv in every worker without a restart")
+async def reload_travel_dataset(x_admin_token: Optional[str] = Header(None)):
+    if not TRAVEL_DATASET_ADMIN_TOKEN or not x_admin_token or not hmac.compare_digest(x_admin_token, TRAVEL_DATASET_ADMIN_TOKEN):
+        return {
+            "status": False,
+            "data": [],
+            "message": "Not authorised to reload the dataset",
+            "status_code": status.HTTP_403_FORBIDDEN
+        }
+
+    # Other workers notice the bumped version on their next reload check
+    try:
+        await get_async_redis().incr(TRAVEL_DATASET_VERSION_KEY)
+    except RedisError as e:
+        print(f"Error bumping travel dataset version: {e}")
+
+    started = travel_dataset_manager.reload_in_background(force=True)
+    # Doesn't load the dataset here; None until this worker has loaded one
+    live = travel_dataset_manager.loaded()
+    return {
+        "status": True,
+        "data": {
+            "current_version": live.fingerprint if live else None,
+            "reload_started": started
+        },
+        "message": "Dataset reload started" if started else "A dataset reload is already running",
+        "status_code": status.HTTP_202_ACCEPTED
+    }
@@ -6,6 +6,7 @@ from typing import List, Dict, Any
 from app.database.schemas import SettingsRequest,SettingsResponse
 from fastapi import status
 from enum import Enum
+from app.utils.enum_vocabulary import localise_enum_values
 
 router = APIRouter(prefix="/settings", tags=["Settings"])
 
@@ -156,9 +157,16 @@ def get_all_enums(
     db: db_dependency,
     user: user_dependency
 ):
-    """Endpoint to send all enum values as simple lists with user auth."""
+    """
+    Endpoint to send all enum values as simple lists with user auth.
+    `labels` maps each value to its label in the user's native language,
+    served from the precomputed vocabulary (no translation call).
+    """
 
     try:
+        settings = db.query(Settings).filter(Settings.user_id == user.id).first()
+        native_language = settings.native_language.value if settings and settings.native_language else NativeLanguageEnum.ENGLISH.value
+
         # Return enum values as lists
         return {
             "status": True,
@@ -170,7 +178,15 @@ def get_all_enums(
                 "property_types": get_enum_values_list(PropertyTypeEnum),
                 "food_preferences": get_enum_values_list(FoodPreferenceEnum),
                 "train_classes": get_enum_values_list(TrainClassEnum),
-                "departure_times": get_enum_values_list(DepartureTimeEnum)
+                "departure_times": get_enum_values_list(DepartureTimeEnum),
+                "labels": {
+                    "native_language": native_language,
+                    "activities": localise_enum_values(ActivityEnum, native_language),
+                    "travelling_with": localise_enum_values(TravellingWithEnum, native_language),
+                    "travel_modes": localise_enum_values(TravelModeEnum, native_language),
+                    "property_types": localise_enum_values(PropertyTypeEnum, native_language),
+                    "food_preferences": localise_enum_values(FoodPreferenceEnum, native_language)
+                }
             },
             "message": "Settings fetched successfully",
             "status_code": status.HTTP_200_OK
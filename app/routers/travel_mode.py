@@ -1,29 +1,51 @@
 from fastapi import APIRouter, HTTPException, status, Query
-from app.database.models import Trip , TravelOptions , UserPreferences
-from app.utils.auth_helpers import user_dependency
+from fastapi.responses import StreamingResponse
+from app.database.models import Trip , TravelOptions , UserPreferences, AvailabilityAlert
+from app.utils.auth_helpers import user_dependency, stream_user_dependency
 from app.database.database import db_dependency
-from app.task.trip_tasks import process_travel_modes
-from app.database.schemas import TrainSearchRequest
+from app.task.trip_tasks import process_travel_modes, user_notification_channel
+from app.database.schemas import TrainSearchRequest, FlexibleTrainSearchRequest
+import asyncio
 import datetime
+import os
 from typing import List, Optional
-from app.utils.easemytrip import search_trains , get_station_code
+from app.utils.train_search import cached_search_trains, search_trains_bulk, build_availability_matrix
+from app.utils.station_index import get_station_index, resolve_station
+from app.utils.train_table import TrainTable, AVAILABILITY_CATEGORIES, TIME_PERIODS, SORT_KEYS
+from app.utils.fare_calendar import get_fare_calendar, fresh_calendar_trains, calendar_overview
+from app.utils.redis_client import get_async_redis
 import httpx
 import json
 
 
 router = APIRouter(prefix="/travel_mode", tags=["Trains/Bus/Flight"])
 
+# Booking suggestions: remote calls in flight per request, and how long to wait for all legs
+BOOKING_LEG_CONCURRENCY = int(os.getenv("BOOKING_LEG_CONCURRENCY", "4"))
+BOOKING_SUGGESTION_DEADLINE = float(os.getenv("BOOKING_SUGGESTION_DEADLINE", "20"))
+
+# Flexible search: widest date window, most (route, date) searches per request, and searches in flight
+FLEXIBLE_SEARCH_MAX_FLEX_DAYS = int(os.getenv("FLEXIBLE_SEARCH_MAX_FLEX_DAYS", "7"))
+FLEXIBLE_SEARCH_MAX_SEARCHES = int(os.getenv("FLEXIBLE_SEARCH_MAX_SEARCHES", "42"))
+FLEXIBLE_SEARCH_CONCURRENCY = int(os.getenv("FLEXIBLE_SEARCH_CONCURRENCY", "4"))
+
+# Alert streams: how long one connection stays open (EventSource reconnects) and the keep-alive interval
+ALERT_EVENTS_TIMEOUT = 3600
+ALERT_EVENTS_KEEPALIVE = 15
+
+
+def validate_train_query(request) -> Optional[str]:
+    """Return an error message for invalid filter/sort/paging fields, or None."""
+    if request.time_filter and request.time_filter not in TIME_PERIODS:
+        return f"time_filter must be one of {', '.join(TIME_PERIODS)}"
+    if request.availability and request.availability not in AVAILABILITY_CATEGORIES:
+        return f"availability must be one of {', '.join(AVAILABILITY_CATEGORIES)}"
+    if request.sort_by and request.sort_by not in SORT_KEYS:
+        return f"sort_by must be one of {', '.join(SORT_KEYS)}"
+    if (request.page or 1) < 1 or (request.page_size is not None and request.page_size < 1):
+        return "page and page_size must be positive"
+    return None
 
-def get_time_period(hour):
-    """Return time period based on 24-hour time."""
-    if 5 <= hour < 12:
-        return "Morning"
-    elif 12 <= hour < 17:
-        return "Afternoon"
-    elif 17 <= hour < 21:
-        return "Evening"
-    else:
-        return "Night"
 
 @router.post("/searchtrain", description="Search for trains between stations on a specific date")
 async def search_train(request: TrainSearchRequest):
@@ -37,7 +59,7 @@ async def search_train(request: TrainSearchRequest):
         # --- Convert date if in YYYY-MM-DD format ---
         try:
             if "-" in travel_date:
-                travel_date = datetime.strptime(travel_date, "%Y-%m-%d").strftime("%d/%m/%Y")
+                travel_date = datetime.datetime.strptime(travel_date, "%Y-%m-%d").strftime("%d/%m/%Y")
         except ValueError:
             return {
                 "status": False,
@@ -55,8 +77,17 @@ async def search_train(request: TrainSearchRequest):
                 "status_code": status.HTTP_400_BAD_REQUEST
             }
 
+        query_error = validate_train_query(request)
+        if query_error:
+            return {
+                "status": False,
+                "data": [],
+                "message": query_error,
+                "status_code": status.HTTP_400_BAD_REQUEST
+            }
+
         # --- Call search function ---
-        trains_data = search_trains(from_station, to_station, travel_date, coupon_code)
+        trains_data = await cached_search_trains(from_station, to_station, travel_date, coupon_code)
 
         # --- Handle API errors ---
         if trains_data is None:
@@ -76,22 +107,24 @@ async def search_train(request: TrainSearchRequest):
                 "status_code": status.HTTP_200_OK
             }
 
-        # --- Apply Time Filter if requested and departureTime exists ---
-        if time_filter:
-            filtered_trains = []
-            for train in trains_data:
-                dep_time = train.get("departureTime")
-                if dep_time:  # Only if departure time is available
-                    hour = int(dep_time.split(":")[0])
-                    if get_time_period(hour) == time_filter:
-                        filtered_trains.append(train)
-            trains_data = filtered_trains
+        # --- Filter, sort and paginate on the columnar view ---
+        total, trains_data = TrainTable(trains_data).query(
+            travel_class=request.travel_class.value if request.travel_class else None,
+            max_fare=request.max_fare,
+            availability=request.availability or None,
+            time_period=time_filter or None,
+            sort_by=request.sort_by or None,
+            descending=bool(request.descending),
+            page=request.page or 1,
+            page_size=request.page_size
+        )
 
         # --- Success Response ---
         return {
             "status": True,
-            "data": trains_data,
-            "message": f"Found {len(trains_data)} trains for {from_station} to {to_station} on {travel_date}",
+            "data": [train.to_dict() for train in trains_data],
+            "message": f"Found {total} trains for {from_station} to {to_station} on {travel_date}",
+            "pagination": {"page": request.page or 1, "page_size": request.page_size, "total": total},
             "status_code": status.HTTP_200_OK
         }
 
@@ -105,6 +138,206 @@ async def search_train(request: TrainSearchRequest):
 
 
 
+def parse_travel_date(travel_date: str) -> datetime.date:
+    """Parse DD/MM/YYYY or YYYY-MM-DD; raises ValueError otherwise."""
+    if "-" in travel_date:
+        return datetime.datetime.strptime(travel_date, "%Y-%m-%d").date()
+    return datetime.datetime.strptime(travel_date, "%d/%m/%Y").date()
+
+
+@router.post("/searchtrain/flexible", description="Search a route over a date window and alternative stations in one call")
+async def search_train_flexible(request: FlexibleTrainSearchRequest):
+    try:
+        flex_days = request.flex_days or 0
+        if not 0 <= flex_days <= FLEXIBLE_SEARCH_MAX_FLEX_DAYS:
+            return {
+                "status": False,
+                "data": {},
+                "message": f"flex_days must be between 0 and {FLEXIBLE_SEARCH_MAX_FLEX_DAYS}",
+                "status_code": status.HTTP_400_BAD_REQUEST
+            }
+        if request.time_filter and request.time_filter not in TIME_PERIODS:
+            return {
+                "status": False,
+                "data": {},
+                "message": f"time_filter must be one of {', '.join(TIME_PERIODS)}",
+                "status_code": status.HTTP_400_BAD_REQUEST
+            }
+
+        try:
+            center_date = parse_travel_date(request.travel_date)
+        except ValueError:
+            return {
+                "status": False,
+                "data": {},
+                "message": "Invalid date format. Please use DD/MM/YYYY or YYYY-MM-DD",
+                "status_code": status.HTTP_400_BAD_REQUEST
+            }
+
+        # --- Date window, skipping days already gone ---
+        today = datetime.date.today()
+        travel_dates = [
+            (center_date + datetime.timedelta(days=offset)).strftime("%d/%m/%Y")
+            for offset in range(-flex_days, flex_days + 1)
+            if center_date + datetime.timedelta(days=offset) >= today
+        ]
+        if not travel_dates:
+            return {
+                "status": False,
+                "data": {},
+                "message": "The requested date window is entirely in the past",
+                "status_code": status.HTTP_400_BAD_REQUEST
+            }
+
+        # --- Resolve every station name or code through the local index ---
+        from_names = list(dict.fromkeys([request.from_station] + (request.alternative_from_stations or [])))
+        to_names = list(dict.fromkeys([request.to_station] + (request.alternative_to_stations or [])))
+        resolved = await asyncio.gather(*[resolve_station(name) for name in from_names + to_names])
+        from_codes = list(dict.fromkeys(code for code, _ in resolved[:len(from_names)] if code))
+        to_codes = list(dict.fromkeys(code for code, _ in resolved[len(from_names):] if code))
+        unresolved = [name for name, (code, _) in zip(from_names + to_names, resolved) if not code]
+
+        if not from_codes or not to_codes:
+            return {
+                "status": False,
+                "data": {"unresolved_stations": unresolved},
+                "message": "Could not find the origin or destination station",
+                "status_code": status.HTTP_404_NOT_FOUND
+            }
+
+        routes = [(f, t) for f in from_codes for t in to_codes if f != t]
+        if len(routes) * len(travel_dates) > FLEXIBLE_SEARCH_MAX_SEARCHES:
+            return {
+                "status": False,
+                "data": {},
+                "message": f"Too many searches ({len(routes) * len(travel_dates)}); narrow the date window or station list (max {FLEXIBLE_SEARCH_MAX_SEARCHES})",
+                "status_code": status.HTTP_400_BAD_REQUEST
+            }
+
+        # --- Fan out, then merge into one matrix ---
+        results = await search_trains_bulk(routes, travel_dates, FLEXIBLE_SEARCH_CONCURRENCY)
+        if request.time_filter:
+            results = {
+                search: None if trains is None else TrainTable(trains).query(time_period=request.time_filter)[1]
+                for search, trains in results.items()
+            }
+
+        matrix = build_availability_matrix(results, travel_dates)
+        matrix["routes"] = [{"from": f, "to": t} for f, t in routes]
+        matrix["unresolved_stations"] = unresolved
+
+        return {
+            "status": True,
+            "data": matrix,
+            "message": f"Found {len(matrix['trains'])} trains across {len(routes)} routes and {len(travel_dates)} dates",
+            "status_code": status.HTTP_200_OK
+        }
+
+    except Exception as e:
+        return {
+            "status": False,
+            "data": {},
+            "message": f"Error searching trains: {str(e)}",
+            "status_code": status.HTTP_500_INTERNAL_SERVER_ERROR
+        }
+
+
+@router.get("/stations", description="Autosuggest railway stations by name, code or city")
+async def suggest_stations(q: str = Query(..., min_length=1), limit: int = Query(10, ge=1, le=50)):
+    index = await get_station_index()
+    stations = [
+        {"code": s["code"], "name": s["name"], "city": s["city"], "state": s["state"]}
+        for s in index.suggest(q, limit)
+    ]
+    return {
+        "status": True,
+        "data": stations,
+        "message": f"Found {len(stations)} stations matching '{q}'",
+        "status_code": status.HTTP_200_OK
+    }
+
+
+@router.get("/alerts", description="Train availability changes on the user's upcoming trips")
+async def get_availability_alerts(
+    db: db_dependency,
+    user: user_dependency,
+    unread_only: bool = Query(False),
+    limit: int = Query(50, ge=1, le=200)
+):
+    query = db.query(AvailabilityAlert).filter(AvailabilityAlert.user_id == user.id)
+    if unread_only:
+        query = query.filter(AvailabilityAlert.is_read.is_(False))
+    alerts = query.order_by(AvailabilityAlert.created_at.desc()).limit(limit).all()
+
+    return {
+        "status": True,
+        "data": [
+            {
+                "id": alert.id,
+                "trip_id": alert.trip_id,
+                "from_station": alert.from_station,
+                "to_station": alert.to_station,
+                "travel_date": alert.travel_date,
+                "changes": alert.changes,
+                "is_read": alert.is_read,
+                "created_at": alert.created_at.isoformat()
+            }
+            for alert in alerts
+        ],
+        "message": f"Found {len(alerts)} availability alerts",
+        "status_code": status.HTTP_200_OK
+    }
+
+
+@router.get("/alerts/events", description="Server-sent events stream of train availability changes as they are detected; EventSource clients pass ?token= from POST /auth/stream-token")
+async def availability_alert_events(user: stream_user_dependency):
+    channel = user_notification_channel(user.id)
+
+    async def event_stream():
+        pubsub = get_async_redis().pubsub()
+        await pubsub.subscribe(channel)
+        try:
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + ALERT_EVENTS_TIMEOUT
+            while loop.time() < deadline:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=ALERT_EVENTS_KEEPALIVE)
+                if message is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                try:
+                    name = json.loads(message["data"]).get("type") or "notification"
+                except (TypeError, ValueError, AttributeError):
+                    continue
+                yield f"event: {name}\ndata: {message['data']}\n\n"
+        finally:
+            await pubsub.unsubscribe(channel)
+            await pubsub.aclose()
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
+@router.put("/alerts/{alert_id}/read", description="Mark an availability alert as read")
+async def mark_availability_alert_read(alert_id: int, db: db_dependency, user: user_dependency):
+    alert = db.query(AvailabilityAlert).filter(
+        AvailabilityAlert.id == alert_id,
+        AvailabilityAlert.user_id == user.id
+    ).first()
+    if not alert:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Alert not found or doesn't belong to you."
+        )
+
+    alert.is_read = True
+    db.commit()
+    return {
+        "status": True,
+        "data": {"id": alert.id, "is_read": True},
+        "message": "Alert marked as read",
+        "status_code": status.HTTP_200_OK
+    }
+
+
 @router.get("/get/{trip_id}")
 async def get_travel_modes(trip_id: int, db: db_dependency, user: user_dependency):
     try:
@@ -273,6 +506,122 @@ def extract_station_name(raw_name: str) -> str:
     return first_word
 
 
+def new_leg_result(leg: dict, travel_date: Optional[str]) -> dict:
+    return {
+        "destination": leg.get("to"),
+        "travel_mode": leg.get("mode"),
+        "date": travel_date,
+        "status": "not_found",
+        "details": {},
+        "booking_url": None
+    }
+
+
+async def resolve_booking_leg(leg: dict, journey_start_date, preferred_departure_time, semaphore: asyncio.Semaphore) -> dict:
+    """Build the booking suggestion of one travel leg; remote calls are bounded by semaphore."""
+    mode = leg.get("mode")
+    from_station_raw = leg.get("from")
+    to_station_raw = leg.get("to")
+    travel_date = journey_start_date.strftime("%d/%m/%Y") if journey_start_date else None
+
+    leg_result = new_leg_result(leg, travel_date)
+
+    # --- Train ---
+    if mode == "Train":
+        from_station_clean = extract_station_name(from_station_raw)
+        to_station_clean = extract_station_name(to_station_raw)
+
+        async def bounded_resolve(raw_name, clean_name):
+            async with semaphore:
+                return await resolve_station(raw_name, clean_name)
+
+        (from_code, from_name), (to_code, to_name) = await asyncio.gather(
+            bounded_resolve(from_station_raw, from_station_clean),
+            bounded_resolve(to_station_raw, to_station_clean)
+        )
+
+        if from_code and to_code:
+            # Prefer the nightly precomputed calendar; search live only when it has no fresh entry
+            calendar = await get_fare_calendar(from_code, to_code)
+            trains = fresh_calendar_trains(calendar.get(travel_date))
+            if trains is None:
+                async with semaphore:
+                    trains = await cached_search_trains(from_code, to_code, travel_date)
+            if calendar:
+                leg_result["details"]["FareCalendar"] = calendar_overview(calendar)
+
+            # Apply preferred departure time filter
+            if preferred_departure_time and trains:
+                _, trains = TrainTable(trains).query(time_period=preferred_departure_time)
+
+            if trains:
+                leg_result["status"] = "success"
+                leg_result["details"]["Trains"] = [train.to_dict() for train in trains]
+            else:
+                leg_result["status"] = "not_found"
+
+            from_name_clean = from_name.replace(" ", "")
+            to_name_clean = to_name.replace(" ", "")
+            # Format travel date as DD-MM-YYYY
+            travel_date_formatted = journey_start_date.strftime("%d-%m-%Y") if journey_start_date else ""
+            # --- Add booking URL ---
+            leg_result["booking_url"] = f"https://railways.easemytrip.com/TrainListInfo/{from_name_clean}({from_code})-to-{to_name_clean}({to_code})/2/{travel_date_formatted}"
+
+        else:
+            leg_result["status"] = "not_found"
+
+    # --- Bus ---
+    elif mode == "Bus":
+        leg_result["status"] = "success"
+        leg_result["details"]["Buses"] = [{
+            "busName": leg.get("Note"),
+            "fromCity": from_station_raw,
+            "toCity": to_station_raw,
+            "approx_cost": leg.get("approx_cost"),
+            "approx_time": leg.get("approx_time")
+        }]
+
+    # --- Trek / Cab ---
+    elif mode in ["Trek", "Cab"]:
+        leg_result["status"] = "not_available"
+        leg_result["details"]["Note"] = leg.get("Note")
+
+    return leg_result
+
+
+async def resolve_booking_legs(legs: List[dict], journey_start_date, preferred_departure_time) -> List[dict]:
+    """
+    Resolve every leg concurrently, in their original order.
+    Legs still running at BOOKING_SUGGESTION_DEADLINE come back with status "timeout".
+    """
+    semaphore = asyncio.Semaphore(BOOKING_LEG_CONCURRENCY)
+    tasks = [
+        asyncio.create_task(resolve_booking_leg(leg, journey_start_date, preferred_departure_time, semaphore))
+        for leg in legs
+    ]
+    if not tasks:
+        return []
+
+    done, pending = await asyncio.wait(tasks, timeout=BOOKING_SUGGESTION_DEADLINE)
+    for task in pending:
+        task.cancel()
+
+    travel_date = journey_start_date.strftime("%d/%m/%Y") if journey_start_date else None
+    results = []
+    for leg, task in zip(legs, tasks):
+        if task in pending:
+            leg_result = new_leg_result(leg, travel_date)
+            leg_result["status"] = "timeout"
+        elif task.exception() is not None:
+            print(f"Error resolving {leg.get('mode')} leg {leg.get('from')} -> {leg.get('to')}: {task.exception()}")
+            leg_result = new_leg_result(leg, travel_date)
+            leg_result["status"] = "error"
+        else:
+            leg_result = task.result()
+        results.append(leg_result)
+    return results
+
+
 
 # --- Main Endpoint ---
 @router.get("/get-travel-booking-suggestion/{trip_id}")
@@ -324,91 +673,14 @@ async def get_travel_booking_suggestion(
         ).first()
         travel_options_data = saved_travel_options.travel_data if saved_travel_options else None
 
-        # --- Process each leg ---
+        # --- Process legs concurrently, up to the request deadline ---
         booking_recommendation = {"from": None, "to": []}
 
         if travel_options_data and "legs" in travel_options_data:
             booking_recommendation["from"] = travel_options_data.get("from")
-            
-            for leg in travel_options_data["legs"]:
-                mode = leg.get("mode")
-                from_station_raw = leg.get("from")
-                to_station_raw = leg.get("to")
-                travel_date = trip.journey_start_date.strftime("%d/%m/%Y") if trip.journey_start_date else None
-
-                leg_result = {
-                    "destination": to_station_raw,
-                    "travel_mode": mode,
-                    "date": travel_date,
-                    "status": "not_found",
-                    "details": {},
-                    "booking_url": None
-                }
-
-                # --- Train ---
-                if mode == "Train":
-                    from_station_clean = extract_station_name(from_station_raw)
-                    to_station_clean = extract_station_name(to_station_raw)
-
-                    
-
-
-                    from_code, from_name = get_station_code(from_station_clean)
-                    to_code, to_name = get_station_code(to_station_clean)
-
-                
-
-                    
-
-                    if from_code and to_code:
-                        trains = search_trains(from_code, to_code, travel_date)
-
-                        # Apply preferred departure time filter
-                        if preferred_departure_time and trains:
-                            filtered_trains = []
-                            for train in trains:
-                                dep_time = train.get("departureTime")
-                                if dep_time:
-                                    dep_hour = int(dep_time.split(":")[0])
-                                    train_period = get_time_period(dep_hour)
-                                    if train_period == preferred_departure_time:
-                                        filtered_trains.append(train)
-                            trains = filtered_trains
-
-                        if trains:
-                            leg_result["status"] = "success"
-                            leg_result["details"]["Trains"] = trains
-                        else:
-                            leg_result["status"] = "not_found"
-
-                        from_name_clean = from_name.replace(" ", "")
-                        to_name_clean = to_name.replace(" ", "")
-                        # Format date as DD-MM-YYYY
-                        # Format travel date as DD-MM-YYYY
-                        travel_date_formatted = trip.journey_start_date.strftime("%d-%m-%Y") if trip.journey_start_date else ""
-                        # --- Add booking URL ---
-                        leg_result["booking_url"] = f"https://railways.easemytrip.com/TrainListInfo/{from_name_clean}({from_code})-to-{to_name_clean}({to_code})/2/{travel_date_formatted}"
-
-                    else:
-                        leg_result["status"] = "not_found"
-
-                # --- Bus ---
-                elif mode == "Bus":
-                    leg_result["status"] = "success"
-                    leg_result["details"]["Buses"] = [{
-                        "busName": leg.get("Note"),
-                        "fromCity": from_station_raw,
-                        "toCity": to_station_raw,
-                        "approx_cost": leg.get("approx_cost"),
-                        "approx_time": leg.get("approx_time")
-                    }]
-
-                # --- Trek / Cab ---
-                elif mode in ["Trek", "Cab"]:
-                    leg_result["status"] = "not_available"
-                    leg_result["details"]["Note"] = leg.get("Note")
-
-                booking_recommendation["to"].append(leg_result)
+            booking_recommendation["to"] = await resolve_booking_legs(
+                travel_options_data["legs"], trip.journey_start_date, preferred_departure_time
+            )
 
         return {
             "status": True,
@@ -1,12 +1,20 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
 from app.database.models import Trip , Settings, TouristPlace , Itinerary , ItineraryPlace, TravelOptions
 from app.database.schemas import CreateTripRequest, UpdateTripRequest
-from app.utils.auth_helpers import user_dependency
-from app.database.database import db_dependency
+from app.utils.auth_helpers import user_dependency, stream_user_dependency
+from app.database.database import db_dependency, SessionLocal
 from app.utils.n8n import call_webhook_and_save_places , call_webhook_and_save_places_on_update
-from app.task.trip_tasks import process_trip_webhook , process_itinerary
-from app.utils.language_translation import translate_with_cache
+from app.task.trip_tasks import process_trip_webhook , process_itinerary, pretranslate_trip, trip_translation_channel, trip_translation_pending_key
+from app.utils.language_translation import translate_with_cache, get_cached_translation
+from app.utils.trip_data import build_trip_data, build_trip_list_data
+from app.utils.redis_client import get_async_redis
+from redis.exceptions import RedisError
+import asyncio
 import datetime
+import json
+import os
+import time
 router = APIRouter(prefix="/trips", tags=["Trips"])
 from datetime import timedelta
 from fastapi import status
@@ -14,6 +22,26 @@ import datetime
 from datetime import timedelta
 from fastapi import status
 
+# Seconds a trip read may spend translating before it falls back to English
+TRANSLATION_REQUEST_DEADLINE = float(os.getenv("TRANSLATION_REQUEST_DEADLINE", "30"))
+
+# How long a queued background translation suppresses re-queueing, and how long clients may wait for it
+TRANSLATION_PENDING_TTL = 300
+TRANSLATION_EVENTS_TIMEOUT = 120
+TRANSLATION_EVENTS_KEEPALIVE = 15
+
+
+async def queue_trip_translation(trip_id: int, user_id: int):
+    """Queue pretranslate_trip once per trip until it finishes (repeated polls don't re-queue)."""
+    try:
+        redis = get_async_redis()
+        if not await redis.set(trip_translation_pending_key(trip_id), 1, nx=True, ex=TRANSLATION_PENDING_TTL):
+            return
+    except RedisError as e:
+        print(f"[Trip {trip_id}] Redis unavailable, queueing translation without dedupe: {str(e)}")
+    pretranslate_trip.delay(trip_id, user_id)
+
+
 @router.post("/create")
 async def create_trip(
     request: CreateTripRequest,
@@ -137,7 +165,10 @@ async def update_trip(
         }
 
 @router.get("/")
-async def get_all_trips(db: db_dependency, user: user_dependency):
+async def get_all_trips(
+    db: db_dependency,
+    user: user_dependency
+):
     try:
         trips = db.query(Trip).filter(Trip.user_id == user.id).all()
         if not trips:
@@ -152,37 +183,14 @@ async def get_all_trips(db: db_dependency, user: user_dependency):
         settings = db.query(Settings).filter(Settings.user_id == user.id).first()
         target_lang = settings.native_language if settings and settings.native_language else "English"
 
-        trips_data = [
-            {
-                "trip_id": t.id,
-                "trip_name": t.trip_name,
-                "destination": t.destination,
-                "base_location": t.base_location,
-                "start_date": t.start_date,
-                "end_date": t.end_date,
-                "journey_start_date" : t.journey_start_date,
-                "return_journey_date" : t.return_journey_date,
-                "budget": t.budget,
-                "travel_mode": t.travel_mode.value if t.travel_mode else None,
-                "num_people": t.num_people,
-                "activities": t.activities or [],
-                "travelling_with": t.travelling_with.value if t.travelling_with else None
-            }
-            for t in trips
-        ]
-        for trip in trips_data:
-            if isinstance(trip.get("start_date"), datetime.datetime):
-                trip["start_date"] = trip["start_date"].isoformat()
-            if isinstance(trip.get("end_date"), datetime.datetime):
-                trip["end_date"] = trip["end_date"].isoformat()
-            if isinstance(trip.get("journey_start_date"), datetime.datetime):
-                trip["journey_start_date"] = trip["journey_start_date"].isoformat()
-            if isinstance(trip.get("return_journey_date"), datetime.datetime):
-                trip["return_journey_date"] = trip["return_journey_date"].isoformat()
-
-        # ✅ Translate entire trips list once if needed
+        trips_data = build_trip_list_data(trips)
+
+        # ✅ Translate entire trips list once if needed (usually a cache hit: pretranslate_trip warms it)
         if target_lang != "English":
-            trips_data = await translate_with_cache(db, trips_data, target_lang)
+            trips_data = await translate_with_cache(
+                db, trips_data, target_lang,
+                deadline=time.monotonic() + TRANSLATION_REQUEST_DEADLINE
+            )
 
         return {
             "status": True,
@@ -203,7 +211,12 @@ async def get_all_trips(db: db_dependency, user: user_dependency):
 
 
 @router.get("/{trip_id}")
-async def get_trip(trip_id: int, db: db_dependency, user: user_dependency):
+async def get_trip(
+    trip_id: int,
+    db: db_dependency,
+    user: user_dependency,
+    translate_async: bool = Query(False, description="Return English immediately if the translation is not cached yet and translate in background")
+):
     try:
         # 1. Fetch trip
         trip = db.query(Trip).filter(Trip.id == trip_id, Trip.user_id == user.id).first()
@@ -215,101 +228,33 @@ async def get_trip(trip_id: int, db: db_dependency, user: user_dependency):
                 "status_code": status.HTTP_404_NOT_FOUND
             }
 
-        # 2. Fetch tourist places
-        tourist_places = [
-            {
-                "id": place.id,
-                "name": place.name,
-                "description": place.description,
-                "latitude": place.latitude,
-                "longitude": place.longitude,
-                "image_url": place.image_url
-            }
-            for place in trip.tourist_places
-        ]
-        tourist_places_status = True
-        tourist_places_status_message = "Tourist places fetched successfully!"
-        if not tourist_places:
-            tourist_places = []
-            tourist_places_status = False
-            tourist_places_status_message = "Fetching tourist places based on your preferences..."
-
-        # 3. Fetch itineraries
-        itineraries = []
-        for itinerary in trip.itinerary:
-            itineraries.append({
-                "day": itinerary.day,
-                "date": itinerary.date.isoformat() if itinerary.date else None,
-                "travel_tips": itinerary.travel_tips,
-                "food": itinerary.food or [],
-                "culture": itinerary.culture or [],
-                "places": [
-                    {
-                        "id": p.id,
-                        "name": p.name,
-                        "description": p.description,
-                        "latitude": p.latitude,
-                        "longitude": p.longitude,
-                        "best_time_to_visit": p.best_time_to_visit
-                    }
-                    for p in itinerary.places
-                ]
-            })
-
-        itineraries_status = True
-        itineraries_status_message = "Itineraries fetched successfully!"
-        if not itineraries:
-            itineraries_status = False
-            itineraries_status_message = "No itineraries found. Please generate one first."
-
-        # 4. Fetch travel options
-        travel_options_data = None
-        travel_options_status = True
-        travel_options_status_message = "Recommended travel options fetched successfully! "
-
-        travel_options = db.query(TravelOptions).filter(TravelOptions.trip_id == trip.id).first()
-        if travel_options:
-            travel_options_data = travel_options.travel_data
-        else:
-            travel_options_status = False
-            travel_options_status_message = "No travel options found. Please generate travel Options for your trip first."
-
-        # 5. Prepare trip data
-        trip_data = {
-            "trip_id": trip.id,
-            "trip_name": trip.trip_name,
-            "destination": trip.destination,
-            "base_location": trip.base_location,
-            "start_date": trip.start_date.isoformat() if trip.start_date else None,
-            "end_date": trip.end_date.isoformat() if trip.end_date else None,
-            "journey_start_date" : trip.journey_start_date.isoformat() if trip.journey_start_date else None,
-            "return_journey_date" : trip.return_journey_date.isoformat() if trip.return_journey_date else None,
-            "budget": trip.budget,
-            "travel_mode": trip.travel_mode.value if trip.travel_mode else None,
-            "num_people": trip.num_people,
-            "activities": trip.activities or [],
-            "travelling_with": trip.travelling_with.value if trip.travelling_with else None,
-            "tourist_places_status": tourist_places_status,
-            "tourist_places_status_message": tourist_places_status_message,
-            "tourist_places_list": tourist_places,
-            "itineraries_status": itineraries_status,
-            "itineraries_status_message": itineraries_status_message,
-            "itineraries": itineraries,
-            "travel_options_status": travel_options_status,
-            "travel_options_status_message": travel_options_status_message,
-            "travel_options": travel_options_data
-        }
+        # 2. Build trip data with places, itineraries and travel options
+        trip_data = build_trip_data(db, trip)
 
-        # 6. Translate if needed
+        # 3. Translate if needed
         settings = db.query(Settings).filter(Settings.user_id == user.id).first()
         target_lang = settings.native_language if settings and settings.native_language else "English"
 
+        translation_pending = False
         if target_lang != "English":
-            trip_data = await translate_with_cache(db, trip_data, target_lang)
+            if translate_async:
+                # Stale-while-translate: serve English now, client waits on /trips/{trip_id}/translation-events
+                cached = get_cached_translation(db, trip_data, target_lang)
+                if cached is None:
+                    translation_pending = True
+                    await queue_trip_translation(trip.id, user.id)
+                else:
+                    trip_data = cached
+            else:
+                trip_data = await translate_with_cache(
+                    db, trip_data, target_lang,
+                    deadline=time.monotonic() + TRANSLATION_REQUEST_DEADLINE
+                )
 
         return {
             "status": True,
             "data": trip_data,
+            "translation_pending": translation_pending,
             "message": "Trip fetched successfully",
             "status_code": status.HTTP_200_OK
         }
@@ -324,6 +269,82 @@ async def get_trip(trip_id: int, db: db_dependency, user: user_dependency):
 
 
 
+@router.get("/{trip_id}/translation-events", description="Server-sent events stream that fires once the trip's translation is cached (or its pre-translation failed); EventSource clients pass ?token= from POST /auth/stream-token")
+async def trip_translation_events(trip_id: int, db: db_dependency, user: stream_user_dependency):
+    try:
+        trip = db.query(Trip).filter(Trip.id == trip_id, Trip.user_id == user.id).first()
+        if not trip:
+            return {
+                "status": False,
+                "data": None,
+                "message": "Trip not found or doesn't belong to you.",
+                "status_code": status.HTTP_404_NOT_FOUND
+            }
+
+        settings = db.query(Settings).filter(Settings.user_id == user.id).first()
+        target_lang = settings.native_language if settings and settings.native_language else "English"
+        trip_data = build_trip_data(db, trip)
+        already_cached = get_cached_translation(db, trip_data, target_lang) is not None
+
+    except Exception as e:
+        return {
+            "status": False,
+            "data": None,
+            "message": f"Error fetching trip: {str(e)}",
+            "status_code": status.HTTP_500_INTERNAL_SERVER_ERROR
+        }
+
+    def is_cached():
+        # Own session: the request session is closed once streaming starts
+        session = SessionLocal()
+        try:
+            return get_cached_translation(session, trip_data, target_lang) is not None
+        finally:
+            session.close()
+
+    def event(name: str):
+        return f"event: {name}\ndata: {json.dumps({'trip_id': trip_id})}\n\n"
+
+    async def event_stream():
+        if already_cached:
+            yield event("translation_ready")
+            return
+
+        pubsub = get_async_redis().pubsub()
+        await pubsub.subscribe(trip_translation_channel(trip_id))
+        try:
+            # Re-check after subscribing so a translation finished in between is not missed
+            if await asyncio.to_thread(is_cached):
+                yield event("translation_ready")
+                return
+
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + TRANSLATION_EVENTS_TIMEOUT
+            while loop.time() < deadline:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=TRANSLATION_EVENTS_KEEPALIVE)
+                if message is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                if await asyncio.to_thread(is_cached):
+                    yield event("translation_ready")
+                    return
+                try:
+                    failed = json.loads(message["data"]).get("event") == "translation_failed"
+                except (TypeError, ValueError, AttributeError):
+                    failed = False
+                if failed:
+                    yield event("translation_failed")
+                    return
+                # Announced for an older version of the trip; keep waiting for the current one
+            yield event("translation_timeout")
+        finally:
+            await pubsub.unsubscribe(trip_translation_channel(trip_id))
+            await pubsub.aclose()
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
+
 
 
 # ✅ Delete Trip Endpoint
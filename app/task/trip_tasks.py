@@ -1,7 +1,18 @@
 from app.celery_worker import celery_app
+from celery.exceptions import SoftTimeLimitExceeded
 from app.database.database import SessionLocal
-from app.database.models import Trip, TouristPlace , ItineraryPlace, Itinerary , TravelOptions
+from app.database.models import Trip, TouristPlace , ItineraryPlace, Itinerary , TravelOptions, Settings, NativeLanguageEnum, AvailabilityAlert
+from app.utils.language_translation import translate_with_cache, get_cached_translation
+from app.utils.trip_data import build_trip_data, build_trip_list_data
+from app.utils.station_index import refresh_learned_stations
+from app.utils.fare_calendar import collect_upcoming_train_legs, precompute_fare_calendars, FARE_CALENDAR_TIME_LIMIT
+from app.utils.availability_monitor import collect_monitored_legs, check_train_availability
+from app.utils.redis_client import redis_client
+from redis.exceptions import RedisError
+import asyncio
 import datetime
+import json
+import time
 import requests
 from dotenv import load_dotenv
 load_dotenv()
@@ -12,6 +23,11 @@ WEBHOOK_URL_GMAP_SCRAPPER_PLACEDESC_GEOCORDINATES=os.getenv("WEBHOOK_URL_GMAP_SC
 WEBHOOK_ITINERARY_GENERATION_URL = os.getenv("WEBHOOK_ITINERARY_GENERATION_URL")
 WEBHOOK_GET_TRAVEL_MODE_URL = os.getenv("WEBHOOK_GET_TRAVEL_MODE_URL")
 
+# Pre-translation budget, below the global task_time_limit (300 s) so a slow Gemini
+# still ends in a translation_failed event instead of a killed worker
+PRETRANSLATE_DEADLINE_SECONDS = float(os.getenv("PRETRANSLATE_DEADLINE_SECONDS", "200"))
+PRETRANSLATE_SOFT_TIME_LIMIT = 260
+
 @celery_app.task
 def process_trip_webhook(trip_id: int, user_id: int):
     """
@@ -75,6 +91,9 @@ def process_trip_webhook(trip_id: int, user_id: int):
         db.commit()
         print(f"[Trip {trip_id}] Webhook processing completed successfully. {len(places_list)} places saved.")
 
+        # Warm the translation cache for the user's native language
+        pretranslate_trip.delay(trip_id, user_id)
+
     except Exception as e:
         db.rollback()
         print(f"[Trip {trip_id}] Error processing trip: {str(e)}")
@@ -171,6 +190,9 @@ def process_itinerary(trip_id: int, user_id: int):
         db.commit()
         print(f"[Itinerary] Saved itinerary for Trip {trip_id}. Days: {len(itinerary_data)}")
 
+        # Warm the translation cache for the user's native language
+        pretranslate_trip.delay(trip_id, user_id)
+
     except Exception as e:
         db.rollback()
         print(f"[Itinerary] Error processing Trip {trip_id}: {str(e)}")
@@ -231,8 +253,178 @@ def process_travel_modes(trip_id: int, user_id: int):
         db.commit()
         print(f"[Trip {trip_id}] Travel options saved successfully.")
 
+        # Warm the translation cache for the user's native language
+        pretranslate_trip.delay(trip_id, user_id)
+
     except Exception as e:
         db.rollback()
         print(f"[Trip {trip_id}] Error processing travel modes: {str(e)}")
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+
+
+
+def publish_translation_event(trip_id: int, event: str, language: str):
+    """Tell clients waiting on /trips/{trip_id}/translation-events."""
+    try:
+        redis_client.publish(
+            trip_translation_channel(trip_id),
+            json.dumps({"event": event, "trip_id": trip_id, "language": language})
+        )
+    except RedisError as e:
+        print(f"[Trip {trip_id}] Failed to publish translation event: {str(e)}")
+
+
+@celery_app.task(soft_time_limit=PRETRANSLATE_SOFT_TIME_LIMIT)
+def pretranslate_trip(trip_id: int, user_id: int):
+    """
+    Celery task to pre-translate a trip into the user's native language:
+    1. Checks Settings.native_language (skips English / unset)
+    2. Builds the same payloads served by GET /trips/ and GET /trips/{trip_id}
+    3. Runs them through translate_with_cache so the next read is a cache hit
+    4. Publishes translation_ready, or translation_failed on an incomplete
+       translation, an error or the time limit
+    """
+    db = SessionLocal()
+    language = None
+    try:
+        settings = db.query(Settings).filter(Settings.user_id == user_id).first()
+        if not settings or not settings.native_language or settings.native_language == NativeLanguageEnum.ENGLISH:
+            print(f"[Trip {trip_id}] No native language set for user {user_id}. Skipping pre-translation.")
+            return
+
+        trip = db.query(Trip).filter(Trip.id == trip_id, Trip.user_id == user_id).first()
+        if not trip:
+            print(f"[Trip {trip_id}] Trip not found. Skipping pre-translation.")
+            return
+
+        trip_data = build_trip_data(db, trip)
+        trips = db.query(Trip).filter(Trip.user_id == user_id).all()
+        trips_data = build_trip_list_data(trips)
+
+        language = settings.native_language.value
+        deadline = time.monotonic() + PRETRANSLATE_DEADLINE_SECONDS
+
+        async def _translate():
+            await translate_with_cache(db, trip_data, settings.native_language, deadline=deadline)
+            await translate_with_cache(db, trips_data, settings.native_language, deadline=deadline)
+
+        asyncio.run(_translate())
+
+        # translate_with_cache falls back to English on a failed chunk or deadline; only a cache hit is "ready"
+        if get_cached_translation(db, trip_data, settings.native_language) is not None:
+            event = "translation_ready"
+            print(f"[Trip {trip_id}] Pre-translated into {settings.native_language.value}.")
+        else:
+            event = "translation_failed"
+            print(f"[Trip {trip_id}] Pre-translation into {settings.native_language.value} did not complete.")
+
+        publish_translation_event(trip_id, event, language)
+        language = None  # published; nothing left to report on failure
+
+    except SoftTimeLimitExceeded:
+        db.rollback()
+        print(f"[Trip {trip_id}] Pre-translation hit the {PRETRANSLATE_SOFT_TIME_LIMIT}s time limit.")
+        if language:
+            publish_translation_event(trip_id, "translation_failed", language)
+    except Exception as e:
+        db.rollback()
+        print(f"[Trip {trip_id}] Error pre-translating trip: {str(e)}")
+        if language:
+            publish_translation_event(trip_id, "translation_failed", language)
+    finally:
+        try:
+            redis_client.delete(trip_translation_pending_key(trip_id))
+        except RedisError:
+            pass
+        db.close()
+
+
+@celery_app.task
+def refresh_station_index():
+    """
+    Periodic Celery task (see beat_schedule in app/celery_worker.py):
+    retries station names nothing could resolve and makes every process
+    reload its station index with the stations learned since the last run.
+    """
+    try:
+        resolved = asyncio.run(refresh_learned_stations())
+        print(f"[Stations] Station index refreshed, {resolved} new station(s) learned.")
+    except Exception as e:
+        print(f"[Stations] Error refreshing station index: {str(e)}")
+
+
+@celery_app.task(time_limit=FARE_CALENDAR_TIME_LIMIT)
+def precompute_fare_calendar():
+    """
+    Nightly Celery task (see beat_schedule in app/celery_worker.py):
+    1. Collects the train legs of upcoming Train / Train&Road trips
+    2. Searches each distinct (from, to, date) once, with bounded concurrency
+    3. Stores a per-route fare/availability calendar read by booking suggestions
+    """
+    db = SessionLocal()
+    try:
+        legs = collect_upcoming_train_legs(db)
+    except Exception as e:
+        print(f"[FareCalendar] Error collecting upcoming train legs: {str(e)}")
+        return
+    finally:
+        db.close()
+
+    try:
+        stored = asyncio.run(precompute_fare_calendars(legs))
+        print(f"[FareCalendar] Stored {stored} route-days for {len(legs)} upcoming train legs.")
+    except Exception as e:
+        print(f"[FareCalendar] Error precomputing fare calendars: {str(e)}")
+
+
+@celery_app.task
+def monitor_train_availability():
+    """
+    Periodic Celery task (see beat_schedule in app/celery_worker.py):
+    1. Collects upcoming train legs of users with real-time updates on
+    2. Re-checks each distinct route and date once and diffs it against the last snapshot
+    3. Stores an AvailabilityAlert per affected trip and notifies its user
+    """
+    db = SessionLocal()
+    try:
+        legs = collect_monitored_legs(db)
+        alerts = asyncio.run(check_train_availability(legs))
+
+        rows = [AvailabilityAlert(**alert) for alert in alerts]
+        db.add_all(rows)
+        db.commit()
+        print(f"[Availability] Checked {len(legs)} legs, {len(alerts)} alert(s) raised.")
+
+        # Streamed to the user by GET /travel_mode/alerts/events; the id lets the client mark it read
+        for row, alert in zip(rows, alerts):
+            try:
+                redis_client.publish(
+                    user_notification_channel(alert["user_id"]),
+                    json.dumps({"type": "availability_change", "id": row.id, **alert})
+                )
+            except RedisError as e:
+                print(f"[Availability] Failed to notify user {alert['user_id']}: {str(e)}")
+
+    except Exception as e:
+        db.rollback()
+        print(f"[Availability] Error monitoring train availability: {str(e)}")
+    finally:
+        db.close()
+
+
+def trip_translation_channel(trip_id: int) -> str:
+    """Redis pub/sub channel announcing whether a trip's pre-translation was cached or failed."""
+    return f"trip_translation:{trip_id}"
+
+
+def trip_translation_pending_key(trip_id: int) -> str:
+    """Redis key set while a pretranslate_trip task is queued or running for a trip."""
+    return f"trip_translation:pending:{trip_id}"
+
+
+def user_notification_channel(user_id: int) -> str:
+    """Redis pub/sub channel for a user's notifications (e.g. availability changes)."""
+    return f"user_notifications:{user_id}"
@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from datetime import timedelta, datetime, UTC
-from typing import Annotated
+from typing import Annotated, Optional
 
 from starlette import status
 from passlib.context import CryptContext
@@ -20,6 +20,12 @@ ALGORITHM = "HS256"
 bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 oauth_bearer = OAuth2PasswordBearer(tokenUrl="auth/token")
+# Same header, but optional: stream endpoints also take a stream token in the URL
+optional_oauth_bearer = OAuth2PasswordBearer(tokenUrl="auth/token", auto_error=False)
+
+# Short-lived tokens for server-sent event streams, which browsers open without an Authorization header
+STREAM_TOKEN_SCOPE = "stream"
+STREAM_TOKEN_MINUTES = int(os.getenv("STREAM_TOKEN_MINUTES", "5"))
 
 GOOGLE_CLIENT_ID = os.environ.get('GOOGLE_CLIENT_ID') or None
 GOOGLE_CLIENT_SECRET = os.environ.get('GOOGLE_CLIENT_SECRET') or None
@@ -65,6 +71,17 @@ def create_refresh_token(username: str, user_id: int, expires_delta: timedelta):
     return create_access_token(username, user_id, expires_delta)
 
 
+def create_stream_token(username: str, user_id: int):
+    """Token only accepted as ?token= on stream endpoints; it can't be used as a bearer or refresh token."""
+    encode = {
+        "sub": username,
+        "id": user_id,
+        "scope": STREAM_TOKEN_SCOPE,
+        "exp": datetime.now(UTC) + timedelta(minutes=STREAM_TOKEN_MINUTES)
+    }
+    return jwt.encode(encode, os.getenv("SECRET_KEY"), algorithm=ALGORITHM)
+
+
 def decode_token(token):
     return jwt.decode(token, os.getenv("SECRET_KEY"), algorithms=ALGORITHM)
 
@@ -74,6 +91,8 @@ def get_current_user(token: Annotated[str, Depends(oauth_bearer)], db: db_depend
         payload = jwt.decode(token, os.getenv("SECRET_KEY"), algorithms=ALGORITHM)
         username: str = payload.get("sub")
         user_id: int = payload.get("id")
+        if payload.get("scope") == STREAM_TOKEN_SCOPE:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate user.")
 
         user: User = db.query(User).filter(User.username == str(username)).options(
             defer(User.hashed_password), defer(User.google_sub)).first()
@@ -85,6 +104,35 @@ def get_current_user(token: Annotated[str, Depends(oauth_bearer)], db: db_depend
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate user.")
 
 
+def get_stream_user(
+    db: db_dependency,
+    bearer: Annotated[Optional[str], Depends(optional_oauth_bearer)],
+    token: Optional[str] = Query(None, description="Stream token from POST /auth/stream-token (EventSource can't send headers)")
+):
+    """
+    User of a server-sent event stream: from a stream token in the query string,
+    else from the usual bearer header. Long-lived access tokens are never accepted
+    in the URL, where they would end up in logs.
+    """
+    if token:
+        try:
+            payload = decode_token(token)
+        except JWTError:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate user.")
+        if payload.get("scope") != STREAM_TOKEN_SCOPE or payload.get("id") is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate user.")
+
+        user: User = db.query(User).filter(User.id == payload["id"]).options(
+            defer(User.hashed_password), defer(User.google_sub)).first()
+        if user is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate user.")
+        return user
+
+    if bearer:
+        return get_current_user(bearer, db)
+    raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+
+
 def token_expired(token: Annotated[str, Depends(oauth_bearer)]):
     try:
         payload = decode_token(token)
@@ -130,4 +178,5 @@ def create_user_from_google_info(google_user: GoogleUser, db: Session):
         return new_user
 
 
-user_dependency = Annotated[dict, Depends(get_current_user)]
\ No newline at end of file
+user_dependency = Annotated[dict, Depends(get_current_user)]
+stream_user_dependency = Annotated[dict, Depends(get_stream_user)]
\ No newline at end of file
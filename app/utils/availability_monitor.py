@@ -0,0 +1,134 @@
+import datetime
+import os
+from typing import Dict, List
+from redis.exceptions import RedisError
+from sqlalchemy.orm import Session
+from dotenv import load_dotenv
+from app.database.models import Settings
+from app.utils.easemytrip import Train
+from app.utils.fare_calendar import collect_upcoming_train_legs
+from app.utils.redis_client import get_async_redis
+from app.utils.station_index import resolve_stations
+from app.utils.train_search import search_trains_many
+from app.utils.train_table import availability_category, AVAILABILITY_CATEGORIES
+load_dotenv()
+
+# Route searches the monitor runs at once (EASEMYTRIP_MAX_RPS still caps the request rate)
+AVAILABILITY_MONITOR_CONCURRENCY = int(os.getenv("AVAILABILITY_MONITOR_CONCURRENCY", "4"))
+
+_CATEGORY_NAMES = {code: name for name, code in AVAILABILITY_CATEGORIES.items()}
+
+
+def availability_snapshot_key(from_code: str, to_code: str, travel_date: str) -> str:
+    """Redis hash of the last seen statuses of a route-day, {"trainNumber:enqClass": status}."""
+    return f"availability_snapshot:{from_code}:{to_code}:{travel_date}"
+
+
+def collect_monitored_legs(db: Session) -> List[tuple]:
+    """
+    (trip_id, user_id, from, to, date) for the upcoming train legs of users who
+    haven't turned off Settings.real_time_updates (it defaults to on).
+    """
+    legs = collect_upcoming_train_legs(db)
+    user_ids = {trip.user_id for trip, _, _, _ in legs}
+    opted_out = {
+        user_id for (user_id,) in db.query(Settings.user_id).filter(
+            Settings.user_id.in_(user_ids), Settings.real_time_updates.is_(False)
+        )
+    } if user_ids else set()
+    return [
+        (trip.id, trip.user_id, from_raw, to_raw, travel_date)
+        for trip, from_raw, to_raw, travel_date in legs
+        if trip.user_id not in opted_out
+    ]
+
+
+def availability_snapshot(trains: List[Train]) -> Dict[str, str]:
+    return {
+        f"{train.train_number}:{train_class.enq_class}": train_class.availability_status or ""
+        for train in trains
+        for train_class in train.classes
+    }
+
+
+def diff_availability(previous: Dict[str, str], trains: List[Train]) -> List[dict]:
+    """
+    Classes whose availability category changed since the previous snapshot
+    (e.g. AVAILABLE -> WAITLIST). Count-only moves like AVAILABLE-0042 ->
+    AVAILABLE-0041, and trains/classes not in the previous snapshot, are ignored.
+    """
+    changes = []
+    for train in trains:
+        for train_class in train.classes:
+            key = f"{train.train_number}:{train_class.enq_class}"
+            if key not in previous:
+                continue
+            before = availability_category(previous[key])
+            after = availability_category(train_class.availability_status)
+            if before != after:
+                changes.append({
+                    "trainNumber": train.train_number,
+                    "trainName": train.train_name,
+                    "departureTime": train.departure_time,
+                    "enqClass": train_class.enq_class,
+                    "className": train_class.class_name,
+                    "previous": _CATEGORY_NAMES[before],
+                    "current": _CATEGORY_NAMES[after],
+                    "previousStatus": previous[key],
+                    "currentStatus": train_class.availability_status
+                })
+    return changes
+
+
+async def check_train_availability(legs: List[tuple]) -> List[dict]:
+    """
+    Fetch every distinct (from, to, date) among the monitored legs once, diff it
+    against its last snapshot, store the new snapshot, and return one alert per
+    (trip, route-day) that changed. Upstream work scales with distinct routes,
+    not with users.
+    """
+    codes = await resolve_stations([name for _, _, from_raw, to_raw, _ in legs for name in (from_raw, to_raw)])
+
+    subscribers = {}
+    for trip_id, user_id, from_raw, to_raw, travel_date in legs:
+        from_code, to_code = codes.get(from_raw), codes.get(to_raw)
+        if from_code and to_code and from_code != to_code:
+            search = (from_code, to_code, travel_date.strftime("%d/%m/%Y"))
+            subscribers.setdefault(search, set()).add((trip_id, user_id))
+
+    results = await search_trains_many(list(subscribers), AVAILABILITY_MONITOR_CONCURRENCY, refresh=True)
+
+    redis = get_async_redis()
+    alerts = []
+    for (from_code, to_code, travel_date), trains in results.items():
+        if trains is None:
+            continue  # upstream error: keep the old snapshot for the next cycle
+
+        key = availability_snapshot_key(from_code, to_code, travel_date)
+        try:
+            previous = await redis.hgetall(key)
+            snapshot = availability_snapshot(trains)
+            expire_at = datetime.datetime.strptime(travel_date, "%d/%m/%Y") + datetime.timedelta(days=1)
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.delete(key)
+                if snapshot:
+                    pipe.hset(key, mapping=snapshot)
+                    pipe.expireat(key, expire_at)
+                await pipe.execute()
+        except RedisError as e:
+            print(f"⚠️ Failed to update availability snapshot {key}: {e}")
+            continue
+
+        changes = diff_availability(previous, trains) if previous else []
+        if not changes:
+            continue
+        for trip_id, user_id in sorted(subscribers[(from_code, to_code, travel_date)]):
+            alerts.append({
+                "trip_id": trip_id,
+                "user_id": user_id,
+                "from_station": from_code,
+                "to_station": to_code,
+                "travel_date": travel_date,
+                "changes": changes
+            })
+    return alerts
@@ -1,100 +1,253 @@
-import requests
-import json
+import asyncio
+import os
+import time
+import weakref
+import httpx
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+from dotenv import load_dotenv
+load_dotenv()
 
-def search_trains(from_station, to_station, travel_date, coupon_code=""):
-    """
-    Search for trains between stations and return simplified data structure
-    """
-    
-    url = "https://railways.easemytrip.com/Train/_TrainBtwnStationList"
-    
-    headers = {
-        'Content-Type': 'application/json'
-    }
-    
-    payload = {
-        "fromSec": from_station,
-        "toSec": to_station,
-        "fromdate": travel_date,
-        "couponCode": coupon_code
-    }
-    
+EASEMYTRIP_TRAIN_SEARCH_URL = "https://railways.easemytrip.com/Train/_TrainBtwnStationList"
+EASEMYTRIP_STATION_SUGGEST_URL = "https://solr.easemytrip.com/v1/api/auto/GetTrainAutoSuggest/{station_name}"
+
+EASEMYTRIP_SEARCH_TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+EASEMYTRIP_SUGGEST_TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+EASEMYTRIP_MAX_RETRIES = 2
+EASEMYTRIP_RETRY_BACKOFF = 0.5  # seconds, doubled on every retry
+EASEMYTRIP_POOL_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10)
+# Upstream requests started per second by this process, across all callers
+EASEMYTRIP_MAX_RPS = float(os.getenv("EASEMYTRIP_MAX_RPS", "10"))
+
+
+@dataclass(slots=True)
+class TrainClass:
+    class_name: Optional[str]
+    enq_class: Optional[str]
+    quota_name: Optional[str]
+    total_fare: Optional[float]
+    availability_date: Optional[str] = None
+    availability_status: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        """Serialise with the field names the API has always returned."""
+        return {
+            'className': self.class_name,
+            'enqClass': self.enq_class,
+            'quotaName': self.quota_name,
+            'totalFare': self.total_fare,
+            'availablityDate': self.availability_date,
+            'availablityStatus': self.availability_status
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TrainClass":
+        """Inverse of to_dict(), e.g. for results read back from a cache."""
+        return cls(
+            class_name=data.get('className'),
+            enq_class=data.get('enqClass'),
+            quota_name=data.get('quotaName'),
+            total_fare=data.get('totalFare'),
+            availability_date=data.get('availablityDate'),
+            availability_status=data.get('availablityStatus')
+        )
+
+
+@dataclass(slots=True)
+class Train:
+    train_name: Optional[str]
+    train_number: Optional[str]
+    arrival_time: Optional[str]
+    departure_time: Optional[str]
+    duration: Optional[str]
+    distance: Optional[str]
+    from_stn_name: Optional[str]
+    from_stn_code: Optional[str]
+    to_stn_name: Optional[str]
+    to_stn_code: Optional[str]
+    arrival_date: Optional[str]
+    departure_date: Optional[str]
+    classes: List[TrainClass] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        """Serialise with the field names the API has always returned."""
+        return {
+            'trainName': self.train_name,
+            'trainNumber': self.train_number,
+            'arrivalTime': self.arrival_time,
+            'departureTime': self.departure_time,
+            'duration': self.duration,
+            'distance': self.distance,
+            'fromStnName': self.from_stn_name,
+            'fromStnCode': self.from_stn_code,
+            'toStnName': self.to_stn_name,
+            'toStnCode': self.to_stn_code,
+            'ArrivalDate': self.arrival_date,
+            'departuredate': self.departure_date,
+            'classes': [c.to_dict() for c in self.classes]
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Train":
+        """Inverse of to_dict(), e.g. for results read back from a cache."""
+        return cls(
+            train_name=data.get('trainName'),
+            train_number=data.get('trainNumber'),
+            arrival_time=data.get('arrivalTime'),
+            departure_time=data.get('departureTime'),
+            duration=data.get('duration'),
+            distance=data.get('distance'),
+            from_stn_name=data.get('fromStnName'),
+            from_stn_code=data.get('fromStnCode'),
+            to_stn_name=data.get('toStnName'),
+            to_stn_code=data.get('toStnCode'),
+            arrival_date=data.get('ArrivalDate'),
+            departure_date=data.get('departuredate'),
+            classes=[TrainClass.from_dict(c) for c in data.get('classes') or []]
+        )
+
+
+def _parse_fare(value) -> Optional[float]:
     try:
-        response = requests.post(url, headers=headers, json=payload, timeout=30)
-        response.raise_for_status()
-        data = response.json()
-        
-        trains = []
-        
-        if 'trainBtwnStnsList' in data:
-            for train in data['trainBtwnStnsList']:
-                train_data = {
-                    'trainName': train.get('trainName'),
-                    'trainNumber': train.get('trainNumber'),
-                    'arrivalTime': train.get('arrivalTime'),
-                    'departureTime': train.get('departureTime'),
-                    'duration': train.get('duration'),
-                    'distance': train.get('distance'),
-                    'fromStnName': train.get('fromStnName'),
-                    'fromStnCode': train.get('fromStnCode'),
-                    'toStnName': train.get('toStnName'),
-                    'toStnCode': train.get('toStnCode'),
-                    'ArrivalDate': train.get('ArrivalDate'),
-                    'departuredate': train.get('departuredate'),
-                    # 'avlClasses': train.get('avlClasses', []),
-                    'classes': []
-                }
-                
-                # Add class details
-                if 'TrainClassWiseFare' in train:
-                    for fare in train['TrainClassWiseFare']:
-                        class_data = {
-                            'className': fare.get('enqClassName'),
-                            'enqClass':fare.get('enqClass'),
-                            'quotaName': fare.get('quotaName'),
-                            'totalFare': fare.get('totalFare'),
-                            'availablityDate': None,
-                            'availablityStatus': None
-                        }
-                        
-                        # Get availability info
-                        if 'avlDayList' in fare and fare['avlDayList']:
-                            avl = fare['avlDayList'][0]  # Take first availability
-                            class_data['availablityDate'] = avl.get('availablityDate')
-                            class_data['availablityStatus'] = avl.get('availablityStatus')
-                        
-                        train_data['classes'].append(class_data)
-                
-                trains.append(train_data)
-        
-        return trains
-        
-    except requests.exceptions.RequestException as e:
-        print(f"Error: {e}")
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
         return None
 
 
+def parse_train_class(fare: dict) -> TrainClass:
+    train_class = TrainClass(
+        class_name=fare.get('enqClassName'),
+        enq_class=fare.get('enqClass'),
+        quota_name=fare.get('quotaName'),
+        total_fare=_parse_fare(fare.get('totalFare'))
+    )
+    # Get availability info
+    if fare.get('avlDayList'):
+        avl = fare['avlDayList'][0]  # Take first availability
+        train_class.availability_date = avl.get('availablityDate')
+        train_class.availability_status = avl.get('availablityStatus')
+    return train_class
+
+
+def parse_train(train: dict) -> Train:
+    return Train(
+        train_name=train.get('trainName'),
+        train_number=train.get('trainNumber'),
+        arrival_time=train.get('arrivalTime'),
+        departure_time=train.get('departureTime'),
+        duration=train.get('duration'),
+        distance=train.get('distance'),
+        from_stn_name=train.get('fromStnName'),
+        from_stn_code=train.get('fromStnCode'),
+        to_stn_name=train.get('toStnName'),
+        to_stn_code=train.get('toStnCode'),
+        arrival_date=train.get('ArrivalDate'),
+        departure_date=train.get('departuredate'),
+        classes=[parse_train_class(fare) for fare in train.get('TrainClassWiseFare') or []]
+    )
 
 
-def get_station_code(station_name: str):
+class EaseMyTripClient:
     """
-    Fetch station code using EaseMyTrip Train AutoSuggest API.
-    Returns the first station object with Code if available.
+    Async EaseMyTrip client on a pooled httpx connection.
+    Transport errors and 5xx responses are retried with exponential backoff, and
+    request starts are spaced to at most max_rps per second so bulk searches
+    don't trip EaseMyTrip's rate limiting.
     """
-    url = f"https://solr.easemytrip.com/v1/api/auto/GetTrainAutoSuggest/{station_name}"
-    
-    try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        stations = response.json()
+
+    def __init__(self, max_retries: int = EASEMYTRIP_MAX_RETRIES, backoff: float = EASEMYTRIP_RETRY_BACKOFF,
+                 max_rps: float = EASEMYTRIP_MAX_RPS):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_rps = max_rps
+        self._next_slot = 0.0
+        # httpx connections are bound to the event loop that opened them (Celery
+        # tasks use asyncio.run), so keep one pooled client per loop.
+        self._clients = weakref.WeakKeyDictionary()
+
+    def _client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(limits=EASEMYTRIP_POOL_LIMITS, headers={'Content-Type': 'application/json'})
+            self._clients[loop] = client
+        return client
+
+    async def _wait_for_slot(self):
+        if self.max_rps <= 0:
+            return
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + 1 / self.max_rps
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    async def _request(self, method: str, url: str, timeout: httpx.Timeout, **kwargs) -> httpx.Response:
+        for attempt in range(self.max_retries + 1):
+            await self._wait_for_slot()
+            try:
+                response = await self._client().request(method, url, timeout=timeout, **kwargs)
+                if response.status_code < 500 or attempt == self.max_retries:
+                    response.raise_for_status()
+                    return response
+            except httpx.TransportError:
+                if attempt == self.max_retries:
+                    raise
+            await asyncio.sleep(self.backoff * (2 ** attempt))
+
+    async def search_trains(self, from_station, to_station, travel_date, coupon_code="") -> Optional[List[Train]]:
+        """
+        Search for trains between stations.
+        Returns a list of Train records, or None if EaseMyTrip could not be reached.
+        """
+        payload = {
+            "fromSec": from_station,
+            "toSec": to_station,
+            "fromdate": travel_date,
+            "couponCode": coupon_code
+        }
+
+        try:
+            response = await self._request("POST", EASEMYTRIP_TRAIN_SEARCH_URL, EASEMYTRIP_SEARCH_TIMEOUT, json=payload)
+            data = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            print(f"Error: {e}")
+            return None
+
+        return [parse_train(train) for train in data.get('trainBtwnStnsList') or []]
+
+    async def get_station_code(self, station_name: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Fetch station code using EaseMyTrip Train AutoSuggest API.
+        Returns (Code, Name) of the first suggestion, or (None, None) if nothing matched.
+        """
+        url = EASEMYTRIP_STATION_SUGGEST_URL.format(station_name=station_name)
+
+        try:
+            response = await self._request("GET", url, EASEMYTRIP_SUGGEST_TIMEOUT)
+            stations = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            print(f"Error fetching station code: {e}")
+            return None, None
 
         if stations and isinstance(stations, list):
             first_station = stations[0]  # Take first object
-            return first_station["Code"] , first_station["Name"]
-        return None  # If no station found
+            return first_station.get("Code"), first_station.get("Name")
+        return None, None  # If no station found
 
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching station code: {e}")
-        return None
+    async def aclose(self):
+        """Close the pooled client of the running event loop."""
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+
+easemytrip_client = EaseMyTripClient()
+
+
+async def search_trains(from_station, to_station, travel_date, coupon_code="") -> Optional[List[Train]]:
+    return await easemytrip_client.search_trains(from_station, to_station, travel_date, coupon_code)
 
 
+async def get_station_code(station_name: str) -> Tuple[Optional[str], Optional[str]]:
+    return await easemytrip_client.get_station_code(station_name)
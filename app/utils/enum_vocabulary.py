@@ -0,0 +1,50 @@
+import json
+import os
+from app.database.models import (
+    NativeLanguageEnum, TravelModeEnum, ActivityEnum, TravellingWithEnum,
+    FoodPreferenceEnum, PropertyTypeEnum
+)
+
+VOCABULARY_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "enum_vocabulary.json")
+
+# Enums whose values show up in trip payloads and have precomputed translations
+VOCABULARY_ENUMS = [TravelModeEnum, ActivityEnum, TravellingWithEnum, FoodPreferenceEnum, PropertyTypeEnum]
+
+# Languages that are not translated through the vocabulary
+UNTRANSLATED_LANGUAGES = {NativeLanguageEnum.ENGLISH.value, NativeLanguageEnum.OTHER.value}
+
+
+def load_enum_vocabulary(path: str = VOCABULARY_PATH) -> dict:
+    """
+    Load the {language: {english_value: translated_value}} table and check it
+    covers every vocabulary enum value for every translatable NativeLanguageEnum.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        vocabulary = json.load(f)
+
+    missing = []
+    for language in NativeLanguageEnum:
+        if language.value in UNTRANSLATED_LANGUAGES:
+            continue
+        table = vocabulary.get(language.value, {})
+        for enum_class in VOCABULARY_ENUMS:
+            missing.extend(f"{language.value}:{e.value}" for e in enum_class if e.value not in table)
+    if missing:
+        raise ValueError(f"Enum vocabulary is missing translations: {', '.join(missing)}")
+
+    return vocabulary
+
+
+# Loaded once at startup
+ENUM_VOCABULARY = load_enum_vocabulary()
+
+
+def translate_enum_value(value: str, target_lang: str):
+    """Return the precomputed translation of an English enum value, or None if it is not in the table."""
+    return ENUM_VOCABULARY.get(target_lang, {}).get(value)
+
+
+def localise_enum_values(enum_class, target_lang: str) -> dict:
+    """Map each value of enum_class to its label in target_lang (English values are kept as-is)."""
+    table = ENUM_VOCABULARY.get(target_lang, {})
+    return {e.value: table.get(e.value, e.value) for e in enum_class}
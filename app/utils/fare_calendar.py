@@ -0,0 +1,143 @@
+import datetime
+import json
+import os
+import time
+from typing import List, Optional
+from redis.exceptions import RedisError
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from dotenv import load_dotenv
+from app.database.models import Trip, TravelOptions, TravelModeEnum
+from app.utils.easemytrip import Train
+from app.utils.redis_client import get_async_redis
+from app.utils.station_index import resolve_stations
+from app.utils.train_search import search_trains_many
+from app.utils.train_table import availability_category, AVAILABLE
+load_dotenv()
+
+# Searches the nightly job runs at once (EASEMYTRIP_MAX_RPS still caps the request rate)
+FARE_CALENDAR_CONCURRENCY = int(os.getenv("FARE_CALENDAR_CONCURRENCY", "4"))
+# Also precompute this many days either side of each trip date
+FARE_CALENDAR_FLEX_DAYS = int(os.getenv("FARE_CALENDAR_FLEX_DAYS", "1"))
+# Calendars outlive one nightly run so a failed run doesn't empty them
+FARE_CALENDAR_TTL = int(os.getenv("FARE_CALENDAR_TTL", str(48 * 3600)))
+# Precomputed trains older than this are not served; readers search live instead
+FARE_CALENDAR_MAX_AGE = int(os.getenv("FARE_CALENDAR_MAX_AGE", str(26 * 3600)))
+# Celery time limit of the nightly job (scheduled by FARE_CALENDAR_HOUR in app/celery_worker.py)
+FARE_CALENDAR_TIME_LIMIT = int(os.getenv("FARE_CALENDAR_TIME_LIMIT", "3600"))
+
+TRAIN_TRAVEL_MODES = [TravelModeEnum.TRAIN, TravelModeEnum.TRAIN_AND_ROAD]
+
+
+def fare_calendar_key(from_code: str, to_code: str) -> str:
+    """Redis hash of one route's calendar, {DD/MM/YYYY: day summary json}."""
+    return f"fare_calendar:{from_code.upper()}:{to_code.upper()}"
+
+
+def collect_upcoming_train_legs(db: Session) -> List[tuple]:
+    """
+    (trip, from, to, date) for every train leg of upcoming Train / Train&Road trips:
+    outbound on journey_start_date and reversed on return_journey_date.
+    """
+    today = datetime.datetime.combine(datetime.date.today(), datetime.time.min)
+    rows = db.query(Trip, TravelOptions).join(TravelOptions, TravelOptions.trip_id == Trip.id).filter(
+        Trip.travel_mode.in_(TRAIN_TRAVEL_MODES),
+        or_(Trip.journey_start_date >= today, Trip.return_journey_date >= today)
+    ).all()
+
+    legs = []
+    for trip, travel_options in rows:
+        for leg in (travel_options.travel_data or {}).get("legs", []):
+            if leg.get("mode") != "Train" or not leg.get("from") or not leg.get("to"):
+                continue
+            if trip.journey_start_date and trip.journey_start_date >= today:
+                legs.append((trip, leg["from"], leg["to"], trip.journey_start_date.date()))
+            if trip.return_journey_date and trip.return_journey_date >= today:
+                legs.append((trip, leg["to"], leg["from"], trip.return_journey_date.date()))
+    return legs
+
+
+def summarise_day(trains: List[Train]) -> dict:
+    """Lowest fare and number of trains with seats, per class, plus the trains themselves."""
+    classes = {}
+    for train in trains:
+        for train_class in train.classes:
+            summary = classes.setdefault(train_class.enq_class, {"lowest_fare": None, "trains": 0, "available_trains": 0})
+            summary["trains"] += 1
+            if train_class.total_fare is not None and (summary["lowest_fare"] is None or train_class.total_fare < summary["lowest_fare"]):
+                summary["lowest_fare"] = train_class.total_fare
+            if availability_category(train_class.availability_status) == AVAILABLE:
+                summary["available_trains"] += 1
+
+    fares = [c["lowest_fare"] for c in classes.values() if c["lowest_fare"] is not None]
+    return {
+        "updated_at": time.time(),
+        "train_count": len(trains),
+        "lowest_fare": min(fares) if fares else None,
+        "classes": classes,
+        "trains": [train.to_dict() for train in trains]
+    }
+
+
+async def precompute_fare_calendars(legs: List[tuple]) -> int:
+    """
+    Resolve every distinct leg endpoint once, search every distinct
+    (from, to, date) with bounded concurrency and store each route's calendar.
+    Returns the number of route-days stored.
+    """
+    codes = await resolve_stations([name for _, from_raw, to_raw, _ in legs for name in (from_raw, to_raw)])
+
+    today = datetime.date.today()
+    searches = []
+    for _, from_raw, to_raw, travel_date in legs:
+        from_code, to_code = codes.get(from_raw), codes.get(to_raw)
+        if not from_code or not to_code or from_code == to_code:
+            continue
+        for offset in range(-FARE_CALENDAR_FLEX_DAYS, FARE_CALENDAR_FLEX_DAYS + 1):
+            day = travel_date + datetime.timedelta(days=offset)
+            if day >= today:
+                searches.append((from_code, to_code, day.strftime("%d/%m/%Y")))
+
+    results = await search_trains_many(searches, FARE_CALENDAR_CONCURRENCY, refresh=True)
+
+    calendars = {}
+    for (from_code, to_code, travel_date), trains in results.items():
+        if trains is not None:
+            calendars.setdefault(fare_calendar_key(from_code, to_code), {})[travel_date] = json.dumps(summarise_day(trains))
+
+    redis = get_async_redis()
+    for key, days in calendars.items():
+        await redis.hset(key, mapping=days)
+        await redis.expire(key, FARE_CALENDAR_TTL)
+    return sum(len(days) for days in calendars.values())
+
+
+async def get_fare_calendar(from_code: str, to_code: str) -> dict:
+    """Precomputed {DD/MM/YYYY: day summary} for a route; empty if none or Redis is down."""
+    try:
+        raw = await get_async_redis().hgetall(fare_calendar_key(from_code, to_code))
+    except RedisError as e:
+        print(f"⚠️ Failed to read fare calendar {from_code}->{to_code}: {e}")
+        return {}
+    return {travel_date: json.loads(value) for travel_date, value in raw.items()}
+
+
+def fresh_calendar_trains(day: Optional[dict]) -> Optional[List[Train]]:
+    """Trains of a calendar day if it was computed within FARE_CALENDAR_MAX_AGE, else None."""
+    if not day or time.time() - day["updated_at"] > FARE_CALENDAR_MAX_AGE:
+        return None
+    return [Train.from_dict(train) for train in day["trains"]]
+
+
+def calendar_overview(calendar: dict) -> List[dict]:
+    """Day-by-day lowest fares of a route, in date order, without the train lists."""
+    days = sorted(calendar.items(), key=lambda item: datetime.datetime.strptime(item[0], "%d/%m/%Y"))
+    return [
+        {
+            "date": travel_date,
+            "lowest_fare": day["lowest_fare"],
+            "train_count": day["train_count"],
+            "classes": day["classes"]
+        }
+        for travel_date, day in days
+    ]
@@ -1,11 +1,20 @@
+import asyncio
 import hashlib
 import json
 import httpx
 import os
+import time
+import uuid
+import weakref
 import datetime
+from collections import deque
 from dotenv import load_dotenv
+from redis.exceptions import RedisError
 from sqlalchemy.orm import Session
+from app.database.database import SessionLocal
 from app.database.models import TranslationCache
+from app.utils.redis_client import get_async_redis, RELEASE_LOCK_SCRIPT
+from app.utils.enum_vocabulary import translate_enum_value
 from langchain_core.output_parsers.json import JsonOutputParser
 from langchain.prompts import PromptTemplate
 from langchain.schema import OutputParserException
@@ -15,6 +24,35 @@ load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 GEMINI_URL =  os.getenv("GEMINI_URL")
 
+# Large documents are split into chunks of at most this many characters of text
+GEMINI_TRANSLATION_CHUNK_CHARS = int(os.getenv("GEMINI_TRANSLATION_CHUNK_CHARS", "4000"))
+# Max chunks in flight to Gemini per document
+GEMINI_TRANSLATION_CONCURRENCY = int(os.getenv("GEMINI_TRANSLATION_CONCURRENCY", "4"))
+# Extra attempts for a chunk that fails or returns invalid JSON
+GEMINI_TRANSLATION_MAX_RETRIES = int(os.getenv("GEMINI_TRANSLATION_MAX_RETRIES", "2"))
+# Upper bound for a single Gemini request when the caller has no (or a later) deadline
+GEMINI_REQUEST_TIMEOUT = float(os.getenv("GEMINI_REQUEST_TIMEOUT", "60"))
+
+# Hedging: once a request outlives the observed p95 latency, send a duplicate and take
+# whichever valid response arrives first. Each request earns GEMINI_HEDGE_BUDGET_RATIO
+# of a hedge, so hedges add at most that fraction to upstream volume.
+GEMINI_HEDGING_ENABLED = os.getenv("GEMINI_HEDGING_ENABLED", "true").lower() == "true"
+GEMINI_HEDGE_BUDGET_RATIO = float(os.getenv("GEMINI_HEDGE_BUDGET_RATIO", "0.05"))
+GEMINI_HEDGE_MIN_SAMPLES = 20
+
+# Micro-batching of small documents across requests (window 0 disables it)
+TRANSLATION_BATCH_WINDOW_MS = int(os.getenv("TRANSLATION_BATCH_WINDOW_MS", "50"))
+TRANSLATION_BATCH_MAX_ITEMS = int(os.getenv("TRANSLATION_BATCH_MAX_ITEMS", "50"))
+TRANSLATION_BATCH_DOC_CHARS = int(os.getenv("TRANSLATION_BATCH_DOC_CHARS", "1000"))
+
+# Single-flight: how long one worker may hold a translation, and how often others check for its result
+TRANSLATION_LOCK_TTL = int(os.getenv("TRANSLATION_LOCK_TTL", "180"))
+TRANSLATION_LOCK_POLL_INTERVAL = 0.25
+TRANSLATION_RESULT_TTL = 300
+
+# In-process single-flight: text_hash -> task translating it
+_inflight_translations = {}
+
 
 
 parser = JsonOutputParser()
@@ -33,75 +71,493 @@ prompt_template = PromptTemplate(
     input_variables=["source_lang", "target_lang", "json_string"]
 )
 
-async def call_gemini_translation_api(json_data: dict, source_lang: str, target_lang: str):
+def _collect_strings(data, path=()):
+    """Walk a JSON value and return (path, text) for every translatable string leaf."""
+    if isinstance(data, dict):
+        items = []
+        for key, value in data.items():
+            items.extend(_collect_strings(value, path + (key,)))
+        return items
+    if isinstance(data, list):
+        items = []
+        for index, value in enumerate(data):
+            items.extend(_collect_strings(value, path + (index,)))
+        return items
+    if isinstance(data, str) and any(ch.isalpha() for ch in data) and not data.startswith(("http://", "https://")):
+        return [(path, data)]
+    return []
+
+
+def _set_path(data, path, value):
+    for key in path[:-1]:
+        data = data[key]
+    data[path[-1]] = value
+
+
+def _chunk_strings(items, max_chars: int):
+    """Group (path, text) items into chunks whose text stays under max_chars."""
+    chunks, current, size = [], [], 0
+    for item in items:
+        length = len(item[1])
+        if current and size + length > max_chars:
+            chunks.append(current)
+            current, size = [], 0
+        current.append(item)
+        size += length
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class _LatencyTracker:
+    """Rolling window of successful Gemini request latencies."""
+
+    def __init__(self, size: int = 200):
+        self._samples = deque(maxlen=size)
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+
+    def p95(self):
+        if len(self._samples) < GEMINI_HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[int(len(ordered) * 0.95) - 1]
+
+
+class _HedgeBudget:
+    """Token bucket: every request earns `ratio` of a hedge, every hedge spends one token."""
+
+    def __init__(self, ratio: float, burst: float = 5.0):
+        self.ratio = ratio
+        self.burst = burst
+        self._tokens = 0.0
+
+    def earn(self):
+        self._tokens = min(self.burst, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return True
+        return False
+
+
+_gemini_latency = _LatencyTracker()
+_hedge_budget = _HedgeBudget(GEMINI_HEDGE_BUDGET_RATIO)
+
+
+def _time_left(deadline):
+    """Seconds a Gemini request may take: GEMINI_REQUEST_TIMEOUT, capped by the caller's deadline."""
+    if deadline is None:
+        return GEMINI_REQUEST_TIMEOUT
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise asyncio.TimeoutError("Translation deadline exceeded")
+    return min(GEMINI_REQUEST_TIMEOUT, remaining)
+
+
+async def _post_translation(client: httpx.AsyncClient, body: dict, timeout: float):
+    """POST one prompt to Gemini and return the parsed JSON (raises on failure)."""
+    headers = {"Content-Type": "application/json", "X-goog-api-key": GEMINI_API_KEY}
+    started = time.monotonic()
+
+    response = await client.post(GEMINI_URL, headers=headers, json=body, timeout=timeout)
+    if response.status_code != 200:
+        raise httpx.HTTPStatusError(
+            f"Gemini API Error: {response.status_code} {response.text}",
+            request=response.request,
+            response=response
+        )
+
+    result = response.json()
+    raw_text = result["candidates"][0]["content"]["parts"][0]["text"]
+    parsed = parser.parse(raw_text)  # ✅ Enforce valid JSON
+    _gemini_latency.record(time.monotonic() - started)
+    return parsed
+
+
+async def _first_valid(tasks: set):
+    """Return the first task result that did not raise; cancel the rest."""
+    pending, error = set(tasks), None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
+            # The loser may still fail while being cancelled; don't log it as unretrieved
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+
+async def _request_translation(client: httpx.AsyncClient, json_data, source_lang: str, target_lang: str, deadline=None):
+    """
+    Send one translation prompt to Gemini and return the parsed JSON (raises on failure).
+    The request timeout follows the caller's deadline. If the request outlives the
+    observed p95 and the hedge budget allows, a duplicate is sent and the first valid
+    response wins.
+    """
     json_string = json.dumps(json_data, ensure_ascii=False)
     prompt = prompt_template.format(
         source_lang=source_lang,
         target_lang=target_lang,
         json_string=json_string
     )
-
-    # Call Gemini API
-    headers = {"Content-Type": "application/json", "X-goog-api-key": GEMINI_API_KEY}
     body = {"contents": [{"parts": [{"text": prompt}]}]}
 
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        response = await client.post(GEMINI_URL, headers=headers, json=body)
+    _hedge_budget.earn()
+    timeout = _time_left(deadline)
+    hedge_after = _gemini_latency.p95() if GEMINI_HEDGING_ENABLED else None
+    if hedge_after is None or hedge_after >= timeout:
+        return await _post_translation(client, body, timeout)
 
-        if response.status_code == 200:
-            result = response.json()
-            raw_text = result["candidates"][0]["content"]["parts"][0]["text"]
+    primary = asyncio.create_task(_post_translation(client, body, timeout))
+    try:
+        done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+        if done or not _hedge_budget.try_spend():
+            return await primary
+        hedge = asyncio.create_task(_post_translation(client, body, _time_left(deadline)))
+    except BaseException:
+        primary.cancel()
+        raise
+    return await _first_valid({primary, hedge})
 
-            try:
-                return parser.parse(raw_text)  # ✅ Enforce valid JSON
-            except OutputParserException:
-                print("⚠️ Gemini returned invalid JSON, using original data.")
-                return json_data
+
+async def _translate_part(client: httpx.AsyncClient, semaphore: asyncio.Semaphore, json_data, source_lang: str, target_lang: str, deadline=None):
+    """
+    Translate one chunk, retrying it on its own when Gemini fails or returns invalid JSON.
+    Returns None when every attempt failed or the deadline passed.
+    """
+    for attempt in range(GEMINI_TRANSLATION_MAX_RETRIES + 1):
+        try:
+            async with semaphore:
+                translated = await _request_translation(client, json_data, source_lang, target_lang, deadline)
+            if type(translated) is type(json_data):
+                return translated
+            print(f"⚠️ Gemini returned a different JSON shape (attempt {attempt + 1}).")
+        except OutputParserException:
+            print(f"⚠️ Gemini returned invalid JSON (attempt {attempt + 1}).")
+        except asyncio.TimeoutError:
+            print(f"⚠️ Translation deadline exceeded (attempt {attempt + 1}).")
+            break
+        except (httpx.HTTPError, KeyError, IndexError, ValueError) as e:
+            print(f"⚠️ Gemini translation request failed (attempt {attempt + 1}): {e}")
+    print("⚠️ Giving up on chunk, using original data.")
+    return None
+
+
+class TranslationBatcher:
+    """
+    Micro-batches short string translations across concurrent requests.
+    Strings for the same language pair are collected for up to
+    TRANSLATION_BATCH_WINDOW_MS (or until TRANSLATION_BATCH_MAX_ITEMS /
+    GEMINI_TRANSLATION_CHUNK_CHARS is reached), sent to Gemini as one
+    {"0": ..., "1": ...} prompt, and the results fanned back to the callers.
+    """
+
+    def __init__(self, window: float, max_items: int, max_chars: int):
+        self.window = window
+        self.max_items = max_items
+        self.max_chars = max_chars
+        self._pending = {}  # (source_lang, target_lang) -> [(text, future, deadline)]
+        self._pending_chars = {}
+        self._timers = {}
+        self._sending = set()  # keep flush tasks referenced until they finish
+        self._semaphore = asyncio.Semaphore(GEMINI_TRANSLATION_CONCURRENCY)
+
+    async def translate(self, text: str, source_lang: str, target_lang: str, deadline=None):
+        """Return the translated text, or None if the batch could not be translated."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        key = (source_lang, target_lang)
+
+        self._pending.setdefault(key, []).append((text, future, deadline))
+        self._pending_chars[key] = self._pending_chars.get(key, 0) + len(text)
+
+        if len(self._pending[key]) >= self.max_items or self._pending_chars[key] >= self.max_chars:
+            self._flush(key)
+        elif key not in self._timers:
+            self._timers[key] = loop.call_later(self.window, self._flush, key)
+
+        return await future
+
+    def _flush(self, key):
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(key, [])
+        self._pending_chars.pop(key, None)
+        if batch:
+            task = asyncio.ensure_future(self._send(key, batch))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    async def _send(self, key, batch):
+        source_lang, target_lang = key
+        unique_texts = list(dict.fromkeys(text for text, _, _ in batch))
+        payload = {str(i): text for i, text in enumerate(unique_texts)}
+        # The batch must answer its most impatient caller
+        deadlines = [deadline for _, _, deadline in batch if deadline is not None]
+        deadline = min(deadlines) if deadlines else None
+
+        translations = {}
+        try:
+            async with httpx.AsyncClient(timeout=GEMINI_REQUEST_TIMEOUT) as client:
+                translated = await _translate_part(client, self._semaphore, payload, source_lang, target_lang, deadline)
+            for i, text in enumerate(unique_texts):
+                value = (translated or {}).get(str(i))
+                translations[text] = value if isinstance(value, str) else None
+        except Exception as e:
+            print(f"⚠️ Batched translation failed, using original data: {e}")
+
+        for text, future, _ in batch:
+            if not future.done():
+                future.set_result(translations.get(text))
+
+
+# Futures and timers belong to one event loop, so keep one batcher per loop
+_batchers = weakref.WeakKeyDictionary()
+
+
+def get_translation_batcher() -> TranslationBatcher:
+    loop = asyncio.get_running_loop()
+    batcher = _batchers.get(loop)
+    if batcher is None:
+        batcher = TranslationBatcher(
+            window=TRANSLATION_BATCH_WINDOW_MS / 1000,
+            max_items=TRANSLATION_BATCH_MAX_ITEMS,
+            max_chars=GEMINI_TRANSLATION_CHUNK_CHARS
+        )
+        _batchers[loop] = batcher
+    return batcher
+
+
+async def _translate_document(json_data, source_lang: str, target_lang: str, deadline=None):
+    """
+    Translate a JSON document with Gemini and return (translated_data, complete).
+    Enum values (travel modes, activities, ...) are substituted locally from the
+    precomputed vocabulary. The remaining string values of small documents (up to
+    TRANSLATION_BATCH_DOC_CHARS) are micro-batched with other concurrent requests;
+    larger documents are split into size-bounded chunks that are translated
+    concurrently (bounded by GEMINI_TRANSLATION_CONCURRENCY). Results are written
+    back into a copy of the document, so keys and structure never change.
+    Strings that could not be translated keep their original value and make
+    `complete` False.
+    """
+    json_string = json.dumps(json_data, ensure_ascii=False)
+    translated_data = json.loads(json_string)  # deep copy
+    complete = True
+
+    items = []
+    for path, text in _collect_strings(json_data):
+        local = translate_enum_value(text, target_lang) if source_lang == "English" else None
+        if local is not None:
+            _set_path(translated_data, path, local)
         else:
-            print("Gemini API Error:", response.status_code, response.text)
-            return json_data
+            items.append((path, text))
+
+    if not items:
+        return translated_data, complete
+
+    if TRANSLATION_BATCH_WINDOW_MS > 0 and len(json_string) <= TRANSLATION_BATCH_DOC_CHARS:
+        batcher = get_translation_batcher()
+        results = await asyncio.gather(*[
+            batcher.translate(text, source_lang, target_lang, deadline) for _, text in items
+        ])
+        for (path, text), value in zip(items, results):
+            if value is None:
+                complete = False
+            _set_path(translated_data, path, text if value is None else value)
+        return translated_data, complete
+
+    semaphore = asyncio.Semaphore(GEMINI_TRANSLATION_CONCURRENCY)
+    chunks = _chunk_strings(items, GEMINI_TRANSLATION_CHUNK_CHARS)
+    payloads = [{str(i): text for i, (_, text) in enumerate(chunk)} for chunk in chunks]
+
+    async with httpx.AsyncClient(timeout=GEMINI_REQUEST_TIMEOUT) as client:
+        results = await asyncio.gather(*[
+            _translate_part(client, semaphore, payload, source_lang, target_lang, deadline)
+            for payload in payloads
+        ])
 
+    for chunk, translated in zip(chunks, results):
+        for i, (path, text) in enumerate(chunk):
+            value = (translated or {}).get(str(i))
+            if not isinstance(value, str):
+                complete = False
+                value = text
+            _set_path(translated_data, path, value)
+    return translated_data, complete
 
-async def translate_with_cache(db: Session, json_data: dict, target_lang, source_lang="English"):
+
+async def call_gemini_translation_api(json_data, source_lang: str, target_lang: str, deadline=None):
     """
-    Checks translation cache. If not found, calls Gemini API and saves the result in DB.
-    Works with JSONB and stores lang enums as plain strings.
+    Translate a JSON document with Gemini, keeping the original value for anything
+    that could not be translated before `deadline` (a time.monotonic() timestamp).
     """
+    translated_data, _ = await _translate_document(json_data, source_lang, target_lang, deadline)
+    return translated_data
 
-    # Convert Enums to plain strings
-    source_lang_str = source_lang.value if hasattr(source_lang, "value") else str(source_lang)
-    target_lang_str = target_lang.value if hasattr(target_lang, "value") else str(target_lang)
 
-    if source_lang_str == target_lang_str:
-        return json_data  # No translation needed
+def _lang_str(lang) -> str:
+    """Convert language Enums to plain strings."""
+    return lang.value if hasattr(lang, "value") else str(lang)
+
 
+def _translation_hash(json_data, source_lang_str: str, target_lang_str: str) -> str:
     # Hash must use string version for consistency
-    text_hash = hashlib.md5(
+    return hashlib.md5(
         f"{json.dumps(json_data, ensure_ascii=False)}_{source_lang_str}_{target_lang_str}".encode()
     ).hexdigest()
 
-    # Check cache
+
+def _get_cached_translation(db: Session, text_hash: str):
     cached = db.query(TranslationCache).filter(
         TranslationCache.source_text_hash == text_hash
     ).first()
+    return cached.translated_text if cached else None  # already dict because JSONB stores dicts
 
-    if cached:
-        return cached.translated_text  # already dict because JSONB stores dicts
 
-    # Call Gemini API → returns dict
-    translated_dict = await call_gemini_translation_api(json_data, source_lang_str, target_lang_str)
+def _save_translation(text_hash: str, json_data, translated_data, source_lang_str: str, target_lang_str: str):
+    """Store a translation in its own session so it does not depend on any one request's session."""
+    db = SessionLocal()
+    try:
+        if _get_cached_translation(db, text_hash) is not None:
+            return
+        new_cache = TranslationCache(
+            source_text_hash=text_hash,
+            source_text=json.dumps(json_data, ensure_ascii=False),  # original request as string
+            source_lang=source_lang_str,
+            target_lang=target_lang_str,
+            translated_text=translated_data,  # dict goes here, JSONB accepts it
+            created_at=datetime.datetime.utcnow()
+        )
+        db.add(new_cache)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️ Failed to save translation cache: {e}")
+    finally:
+        db.close()
 
-    # Save dict directly as JSONB
-    new_cache = TranslationCache(
-        source_text_hash=text_hash,
-        source_text=json.dumps(json_data, ensure_ascii=False),  # original request as string
-        source_lang=source_lang_str,
-        target_lang=target_lang_str,
-        translated_text=translated_dict,  # dict goes here, JSONB accepts it
-        created_at=datetime.datetime.utcnow()
-    )
 
-    db.add(new_cache)
-    db.commit()
+async def _translate_and_store(text_hash: str, json_data, source_lang_str: str, target_lang_str: str):
+    """
+    Translate once across all API/Celery workers.
+    The worker that wins the Redis lock calls Gemini, saves the cache row and
+    publishes the result; the others wait for that result instead of calling Gemini.
+    Runs without a caller deadline (callers share it and each waits only as long as
+    its own deadline allows). Only complete translations are cached, so one whose
+    chunks failed is retried by the next request.
+    """
+    lock_key = f"translation:lock:{text_hash}"
+    result_key = f"translation:result:{text_hash}"
+    token = uuid.uuid4().hex
+    redis = None
+    acquired = True
+
+    try:
+        redis = get_async_redis()
+        acquired = bool(await redis.set(lock_key, token, nx=True, ex=TRANSLATION_LOCK_TTL))
+    except RedisError as e:
+        print(f"⚠️ Redis unavailable, translating without cross-worker lock: {e}")
+        redis = None
+
+    if not acquired:
+        wait_until = time.monotonic() + TRANSLATION_LOCK_TTL
+        try:
+            while time.monotonic() < wait_until:
+                await asyncio.sleep(TRANSLATION_LOCK_POLL_INTERVAL)
+                raw = await redis.get(result_key)
+                if raw is not None:
+                    return json.loads(raw)
+                if not await redis.exists(lock_key):
+                    break  # holder finished without publishing, or died
+        except RedisError as e:
+            print(f"⚠️ Redis error while waiting for translation: {e}")
+
+        db = SessionLocal()
+        try:
+            cached = _get_cached_translation(db, text_hash)
+        finally:
+            db.close()
+        if cached is not None:
+            return cached
+
+    try:
+        # Call Gemini API → returns dict
+        translated_data, complete = await _translate_document(json_data, source_lang_str, target_lang_str)
+        if not complete:
+            return translated_data
+
+        _save_translation(text_hash, json_data, translated_data, source_lang_str, target_lang_str)
+
+        if redis is not None:
+            try:
+                await redis.set(result_key, json.dumps(translated_data, ensure_ascii=False), ex=TRANSLATION_RESULT_TTL)
+            except RedisError as e:
+                print(f"⚠️ Failed to publish translation result: {e}")
+        return translated_data
+    finally:
+        if redis is not None and acquired:
+            try:
+                await redis.eval(RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+            except RedisError:
+                pass
+
+
+def get_cached_translation(db: Session, json_data, target_lang, source_lang="English"):
+    """
+    Return the cached translation of json_data, or None on a cache miss.
+    Never calls Gemini; used by reads that must not block on translation.
+    """
+    source_lang_str = _lang_str(source_lang)
+    target_lang_str = _lang_str(target_lang)
+
+    if source_lang_str == target_lang_str:
+        return json_data
+
+    return _get_cached_translation(db, _translation_hash(json_data, source_lang_str, target_lang_str))
+
+
+async def translate_with_cache(db: Session, json_data: dict, target_lang, source_lang="English", deadline=None):
+    """
+    Checks translation cache. If not found, calls Gemini API and saves the result in DB.
+    Works with JSONB and stores lang enums as plain strings.
+    Concurrent misses for the same content share one upstream call (single-flight).
+    `deadline` is a time.monotonic() timestamp from the API handler: this caller gets
+    the original data once it passes. It only bounds the caller's wait; the shared
+    translation keeps running for the other callers and is cached for the next read.
+    """
+    source_lang_str = _lang_str(source_lang)
+    target_lang_str = _lang_str(target_lang)
+
+    if source_lang_str == target_lang_str:
+        return json_data  # No translation needed
+
+    text_hash = _translation_hash(json_data, source_lang_str, target_lang_str)
+
+    # Check cache
+    cached = _get_cached_translation(db, text_hash)
+    if cached is not None:
+        return cached
+
+    # Join an in-flight translation in this process, or start one
+    task = _inflight_translations.get(text_hash)
+    if task is None:
+        task = asyncio.create_task(_translate_and_store(text_hash, json_data, source_lang_str, target_lang_str))
+        _inflight_translations[text_hash] = task
+        task.add_done_callback(lambda _: _inflight_translations.pop(text_hash, None))
 
-    return translated_dict
\ No newline at end of file
+    # shield: a cancelled or timed-out request must not cancel the call other requests are waiting on
+    timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+    try:
+        return await asyncio.wait_for(asyncio.shield(task), timeout)
+    except asyncio.TimeoutError:
+        print("⚠️ Translation deadline exceeded, using original data.")
+        return json_data
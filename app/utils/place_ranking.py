@@ -0,0 +1,219 @@
+import datetime
+import os
+import numpy as np
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from dotenv import load_dotenv
+from app.utils.place_similarity import tokenise as similarity_tokens
+from app.utils.travel_dataset import TravelDataset, get_travel_dataset, travel_dataset_manager, TIME_OF_DAY_BITS, trip_month_mask
+load_dotenv()
+
+# Weight of each score component; a component can be switched off with 0
+RANKING_WEIGHTS = {
+    "rating": float(os.getenv("RANKING_WEIGHT_RATING", "1.0")),
+    "activity": float(os.getenv("RANKING_WEIGHT_ACTIVITY", "2.0")),
+    "duration": float(os.getenv("RANKING_WEIGHT_DURATION", "0.6")),
+    "fee": float(os.getenv("RANKING_WEIGHT_FEE", "0.6")),
+    "best_time": float(os.getenv("RANKING_WEIGHT_BEST_TIME", "0.4")),
+    "airport": float(os.getenv("RANKING_WEIGHT_AIRPORT", "0.3")),
+    "open": float(os.getenv("RANKING_WEIGHT_OPEN", "1.0")),
+    # Random tie-breaker so equally good places rotate between requests
+    "jitter": float(os.getenv("RANKING_WEIGHT_JITTER", "0.15")),
+}
+# Sightseeing hours per trip day that a single visit's duration is compared against
+RANKING_DAY_HOURS = float(os.getenv("RANKING_DAY_HOURS", "8"))
+# Trip length assumed when no trip dates are known
+RANKING_DEFAULT_TRIP_DAYS = int(os.getenv("RANKING_DEFAULT_TRIP_DAYS", "2"))
+# Share of UserPreferences.default_budget one place's entry fees (for the whole group) may take
+RANKING_FEE_BUDGET_SHARE = float(os.getenv("RANKING_FEE_BUDGET_SHARE", "0.02"))
+# Fee cap used when the user has no budget set
+RANKING_DEFAULT_FEE_CAP = float(os.getenv("RANKING_DEFAULT_FEE_CAP", "500"))
+
+# google_review_rating range mapped onto 0..1
+RATING_FLOOR, RATING_CEIL = 3.0, 5.0
+
+# How well each part of the day suits each TravellingWithEnum value
+TIME_AFFINITY = {
+    "Solo": {"MORNING": 1.0, "AFTERNOON": 1.0, "EVENING": 1.0, "NIGHT": 0.8},
+    "Partner": {"MORNING": 0.8, "AFTERNOON": 0.8, "EVENING": 1.0, "NIGHT": 1.0},
+    "Friends": {"MORNING": 0.7, "AFTERNOON": 0.9, "EVENING": 1.0, "NIGHT": 1.0},
+    "Family": {"MORNING": 1.0, "AFTERNOON": 1.0, "EVENING": 0.8, "NIGHT": 0.4},
+}
+
+WEEKDAYS = ["MONDAY", "TUESDAY", "WEDNESDAY", "THURSDAY", "FRIDAY", "SATURDAY", "SUNDAY"]
+
+
+def _enum_value(value):
+    return value.value if hasattr(value, "value") else value
+
+
+@dataclass(slots=True)
+class RankingContext:
+    """Everything about the user and trip that the score depends on."""
+    activities: List[str] = field(default_factory=list)
+    budget: Optional[int] = None
+    num_people: int = 1
+    travelling_with: Optional[str] = None
+    travel_mode: Optional[str] = None
+    start_date: Optional[datetime.date] = None
+    end_date: Optional[datetime.date] = None
+
+    @classmethod
+    def from_preferences(cls, preferences, trip=None) -> "RankingContext":
+        """Build from a UserPreferences row, with the trip's own values taking precedence."""
+        def pick(name):
+            value = getattr(trip, name, None) if trip is not None else None
+            if value in (None, []):
+                value = getattr(preferences, name, None) if preferences is not None else None
+            return value
+
+        start = getattr(trip, "start_date", None)
+        end = getattr(trip, "end_date", None)
+        return cls(
+            activities=[str(_enum_value(a)).upper() for a in pick("activities") or []],
+            budget=getattr(trip, "budget", None) or getattr(preferences, "default_budget", None),
+            num_people=pick("num_people") or 1,
+            travelling_with=_enum_value(pick("travelling_with")),
+            travel_mode=_enum_value(pick("travel_mode")),
+            start_date=start.date() if isinstance(start, datetime.datetime) else start,
+            end_date=end.date() if isinstance(end, datetime.datetime) else end
+        )
+
+    def trip_days(self) -> int:
+        if self.start_date and self.end_date and self.end_date >= self.start_date:
+            return (self.end_date - self.start_date).days + 1
+        return RANKING_DEFAULT_TRIP_DAYS
+
+    def month_mask(self) -> int:
+        return trip_month_mask(self.start_date, self.end_date)
+
+    def weekday_mask(self) -> int:
+        """Bit i set when the trip includes weekday i (Monday = 0); 0 when there are no dates."""
+        if not self.start_date or not self.end_date or self.end_date < self.start_date:
+            return 0
+        mask = 0
+        for offset in range(min(self.trip_days(), 7)):
+            mask |= 1 << (self.start_date + datetime.timedelta(days=offset)).weekday()
+        return mask
+
+
+class PlaceRanker:
+    """
+    Per-row feature arrays derived once from the dataset columns, so scoring a
+    user is a handful of vector operations over the whole dataset. Kept in the
+    dataset's `derived` dict and holds no reference back to it, so an old
+    version is freed as soon as requests stop using it.
+    """
+
+    def __init__(self, dataset: TravelDataset):
+        self.records = dataset.records
+        columns = dataset.columns
+
+        # "Hawa Mahal" and its "(New Attraction)" copies share an id, as in the search index
+        _, self.name_ids = np.unique(
+            [" ".join(similarity_tokens(record["name"])) for record in dataset.records], return_inverse=True
+        )
+
+        rating = np.asarray(columns.codes("google_review_rating"), dtype=np.float32)
+        self.rating = np.clip((np.nan_to_num(rating, nan=RATING_FLOOR) - RATING_FLOOR) / (RATING_CEIL - RATING_FLOOR), 0, 1)
+
+        duration = np.asarray(columns.codes("ideal_duration_hours"), dtype=np.float32)
+        self.duration = np.nan_to_num(duration, nan=float(np.nanmedian(duration)) if np.isfinite(duration).any() else 0)
+
+        fee = np.asarray(columns.codes("entrance_fee_inr"), dtype=np.float32)
+        self.fee = np.nan_to_num(fee, nan=0)
+
+        self.airport = np.asarray(columns.codes("airport_nearby"), dtype=np.float32)
+
+        # One column per activity type; a user's match is onehot @ wanted
+        self.activity_columns = {activity: i for i, activity in enumerate(dataset.activity_rows)}
+        self.activity_onehot = np.zeros((dataset.size, len(self.activity_columns)), dtype=np.float32)
+        for activity, rows in dataset.activity_rows.items():
+            self.activity_onehot[rows, self.activity_columns[activity]] = 1
+
+        # Best-time affinity per traveller type: the best-suited part of the day a place allows
+        self.time_affinity: Dict[Optional[str], np.ndarray] = {None: np.ones(dataset.size, dtype=np.float32)}
+        for traveller, affinity in TIME_AFFINITY.items():
+            lookup = np.array([
+                max((affinity[name] for name, bit in TIME_OF_DAY_BITS.items() if mask & bit), default=1.0)
+                for mask in range(16)
+            ], dtype=np.float32)
+            self.time_affinity[traveller] = lookup[dataset.time_mask]
+
+        # Weekdays each place is closed on, same bit layout as RankingContext.weekday_mask
+        off_codes = np.asarray(columns.codes("weekly_off"))
+        off_labels = columns.categories["weekly_off"]
+        off_lookup = np.array(
+            [1 << WEEKDAYS.index(label.strip().upper()) if label.strip().upper() in WEEKDAYS else 0 for label in off_labels] + [0],
+            dtype=np.uint8
+        )
+        self.closed_days = off_lookup[off_codes]
+
+    def score(self, context: RankingContext, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+        """One float32 score per dataset row; higher is better."""
+        weights = RANKING_WEIGHTS
+        scores = weights["rating"] * self.rating
+
+        wanted = np.zeros(len(self.activity_columns), dtype=np.float32)
+        for activity in context.activities:
+            if activity in self.activity_columns:
+                wanted[self.activity_columns[activity]] = 1
+        if wanted.any():
+            scores = scores + weights["activity"] * (self.activity_onehot @ wanted)
+
+        available_hours = context.trip_days() * RANKING_DAY_HOURS
+        scores = scores + weights["duration"] * (1 - np.clip(self.duration / available_hours, 0, 1))
+
+        fee_cap = context.budget * RANKING_FEE_BUDGET_SHARE if context.budget else RANKING_DEFAULT_FEE_CAP
+        scores = scores + weights["fee"] * (1 - np.clip(self.fee * max(context.num_people, 1) / max(fee_cap, 1), 0, 1))
+
+        scores = scores + weights["best_time"] * self.time_affinity.get(context.travelling_with, self.time_affinity[None])
+
+        if context.travel_mode == "Flight":
+            scores = scores + weights["airport"] * self.airport
+
+        trip_days = context.weekday_mask()
+        if trip_days:
+            # Closed on every day of the trip
+            scores = scores - weights["open"] * ((self.closed_days & trip_days) == trip_days)
+
+        if weights["jitter"]:
+            scores = scores + weights["jitter"] * (rng or np.random.default_rng()).random(len(scores), dtype=np.float32)
+        return scores.astype(np.float32, copy=False)
+
+    def top_k(self, scores: np.ndarray, k: int, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Row positions of the k best scores (optionally among `rows` only), best
+        first. Repeated entries of a place count once: only its best row is kept.
+        """
+        if rows is None:
+            rows = np.arange(len(scores))
+        candidates = scores[rows]
+        if k <= 0 or len(candidates) == 0:
+            return np.empty(0, dtype=np.int64)
+
+        # Fetch a few times k so dropping repeats usually still leaves k; widen if not
+        fetch = min(len(candidates), k * 4)
+        while True:
+            best = np.argpartition(-candidates, fetch - 1)[:fetch] if fetch < len(candidates) else np.arange(len(candidates))
+            best = rows[best[np.argsort(-candidates[best], kind="stable")]]
+            _, first = np.unique(self.name_ids[best], return_index=True)
+            if len(first) >= k or fetch == len(candidates):
+                return best[np.sort(first)[:k]]
+            fetch = min(len(candidates), fetch * 4)
+
+
+def build_place_ranker(dataset: TravelDataset) -> PlaceRanker:
+    ranker = dataset.derived.get("place_ranker")
+    if ranker is None:
+        ranker = dataset.derived.setdefault("place_ranker", PlaceRanker(dataset))
+    return ranker
+
+
+# Prebuild the ranker of every reloaded version before it goes live
+travel_dataset_manager.on_load(build_place_ranker)
+
+
+def get_place_ranker(dataset: Optional[TravelDataset] = None) -> PlaceRanker:
+    """Ranker of the given dataset version (the live one by default)."""
+    return build_place_ranker(dataset or get_travel_dataset())
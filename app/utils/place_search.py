@@ -0,0 +1,171 @@
+import math
+import os
+import re
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from app.utils.place_similarity import tokenise as similarity_tokens
+from app.utils.travel_dataset import TravelDataset, get_travel_dataset, travel_dataset_manager
+load_dotenv()
+
+# How much a match in each field counts
+SEARCH_FIELD_WEIGHTS = {
+    "name": 3.0,
+    "city": 2.0,
+    "state": 1.5,
+    "activitytype": 1.5,
+    "description": 1.0,
+}
+# Share of the final score that comes from google_review_rating rather than relevance
+SEARCH_RATING_WEIGHT = float(os.getenv("SEARCH_RATING_WEIGHT", "0.3"))
+# Minimum trigram (Dice) similarity for a typo match ("pangog" -> "pangong")
+SEARCH_FUZZY_CUTOFF = float(os.getenv("SEARCH_FUZZY_CUTOFF", "0.5"))
+
+# Relative strength of an exact, prefix and typo match of a query word
+EXACT_MATCH, PREFIX_MATCH, FUZZY_MATCH = 1.0, 0.8, 0.6
+# Shortest query word expanded as a prefix, and how many words a prefix / typo may expand to
+MIN_PREFIX_LENGTH = 2
+MAX_PREFIX_EXPANSIONS = 50
+MAX_FUZZY_EXPANSIONS = 5
+
+STOPWORDS = {"a", "an", "and", "the", "of", "in", "at", "to", "is"}
+
+# google_review_rating range mapped onto 0..1
+RATING_FLOOR, RATING_CEIL = 3.0, 5.0
+
+
+def tokenise(text) -> List[str]:
+    return [token for token in re.findall(r"[a-z0-9]+", str(text or "").lower()) if token not in STOPWORDS]
+
+
+def trigrams(token: str) -> set:
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class PlaceSearchIndex:
+    """
+    Full-text index over one dataset version:
+      - postings: per vocabulary word, the rows containing it and a field-weighted
+        IDF score (best field wins)
+      - a sorted vocabulary for prefix lookups (np.searchsorted)
+      - a trigram → word index for typo tolerance
+    A query only touches the postings of the words it expands to.
+    """
+
+    def __init__(self, dataset: TravelDataset):
+        self.records = dataset.records
+        self.size = dataset.size
+
+        postings: Dict[str, Dict[int, float]] = {}
+        for row, record in enumerate(dataset.records):
+            for field, weight in SEARCH_FIELD_WEIGHTS.items():
+                for token in tokenise(record.get(field)):
+                    rows = postings.setdefault(token, {})
+                    rows[row] = max(rows.get(row, 0.0), weight)
+
+        self.vocabulary = sorted(postings)
+        self.sorted_vocabulary = np.array(self.vocabulary)
+        self.rows: List[np.ndarray] = []
+        self.weights: List[np.ndarray] = []
+        for token in self.vocabulary:
+            rows = postings[token]
+            idf = math.log(1 + self.size / len(rows))
+            self.rows.append(np.fromiter(rows.keys(), dtype=np.int32, count=len(rows)))
+            self.weights.append(np.fromiter(rows.values(), dtype=np.float32, count=len(rows)) * idf)
+
+        grams: Dict[str, List[int]] = {}
+        for token_id, token in enumerate(self.vocabulary):
+            for gram in trigrams(token):
+                grams.setdefault(gram, []).append(token_id)
+        self.trigram_tokens = {gram: np.array(ids, dtype=np.int32) for gram, ids in grams.items()}
+        self.trigram_counts = np.array([len(trigrams(token)) for token in self.vocabulary], dtype=np.float32)
+
+        rating = np.asarray(dataset.columns.codes("google_review_rating"), dtype=np.float32)
+        self.rating = np.clip((np.nan_to_num(rating, nan=RATING_FLOOR) - RATING_FLOOR) / (RATING_CEIL - RATING_FLOOR), 0, 1)
+        # "Pangong Tso" and "Pangong Tso (New Attraction)" share a key, as in the similar-places table
+        self.name_keys = [" ".join(similarity_tokens(record["name"])) for record in dataset.records]
+
+    def expand(self, token: str) -> List[Tuple[int, float]]:
+        """Vocabulary words a query word matches, with match strength: exact, prefixes, else typos."""
+        lo = int(np.searchsorted(self.sorted_vocabulary, token))
+        matches = []
+        if lo < len(self.vocabulary) and self.vocabulary[lo] == token:
+            matches.append((lo, EXACT_MATCH))
+            lo += 1
+        if len(token) >= MIN_PREFIX_LENGTH:
+            hi = int(np.searchsorted(self.sorted_vocabulary, token + "\uffff"))
+            matches.extend((token_id, PREFIX_MATCH) for token_id in range(lo, min(hi, lo + MAX_PREFIX_EXPANSIONS)))
+        if matches:
+            return matches
+
+        grams = [self.trigram_tokens[gram] for gram in trigrams(token) if gram in self.trigram_tokens]
+        if not grams:
+            return []
+        shared = np.bincount(np.concatenate(grams), minlength=len(self.vocabulary))
+        dice = 2 * shared / (len(trigrams(token)) + self.trigram_counts)
+        candidates = np.flatnonzero(dice >= SEARCH_FUZZY_CUTOFF)
+        candidates = candidates[np.argsort(-dice[candidates], kind="stable")][:MAX_FUZZY_EXPANSIONS]
+        return [(int(token_id), FUZZY_MATCH * float(dice[token_id])) for token_id in candidates]
+
+    def search(self, query: str, allowed: Optional[np.ndarray] = None, limit: int = 20) -> Tuple[int, List[Tuple[int, float]]]:
+        """
+        (number of matching rows, [(row, score)] best first) for a query.
+        Rows are scored by field-weighted IDF relevance, scaled by the share of
+        query words they match, plus SEARCH_RATING_WEIGHT × rating. `allowed` is
+        an optional boolean row filter. Repeated entries of a place are shown once.
+        """
+        tokens = list(dict.fromkeys(tokenise(query)))
+        if not tokens:
+            return 0, []
+
+        relevance = np.zeros(self.size, dtype=np.float32)
+        coverage = np.zeros(self.size, dtype=np.float32)
+        for token in tokens:
+            token_scores = np.zeros(self.size, dtype=np.float32)
+            for token_id, strength in self.expand(token):
+                np.maximum.at(token_scores, self.rows[token_id], self.weights[token_id] * strength)
+            relevance += token_scores
+            coverage += token_scores > 0
+
+        matched = coverage > 0
+        if allowed is not None:
+            matched &= allowed
+        candidates = np.flatnonzero(matched)
+        if len(candidates) == 0:
+            return 0, []
+
+        relevance = relevance[candidates] * (coverage[candidates] / len(tokens)) ** 2
+        scores = (1 - SEARCH_RATING_WEIGHT) * relevance / relevance.max() + SEARCH_RATING_WEIGHT * self.rating[candidates]
+
+        # Enough head-room that dropping repeated names still leaves `limit` results
+        k = min(len(candidates), limit * 4)
+        best = np.argpartition(-scores, k - 1)[:k] if k < len(candidates) else np.arange(len(candidates))
+        best = best[np.argsort(-scores[best], kind="stable")]
+
+        results, seen = [], set()
+        for i in best:
+            row = int(candidates[i])
+            if self.name_keys[row] in seen:
+                continue
+            seen.add(self.name_keys[row])
+            results.append((row, float(scores[i])))
+            if len(results) == limit:
+                break
+        return len(candidates), results
+
+
+def build_place_search(dataset: TravelDataset) -> PlaceSearchIndex:
+    index = dataset.derived.get("place_search")
+    if index is None:
+        index = dataset.derived.setdefault("place_search", PlaceSearchIndex(dataset))
+    return index
+
+
+# Prebuild the search index of every reloaded version before it goes live
+travel_dataset_manager.on_load(build_place_search)
+
+
+def get_place_search(dataset: Optional[TravelDataset] = None) -> PlaceSearchIndex:
+    """Search index of the given dataset version (the live one by default)."""
+    return build_place_search(dataset or get_travel_dataset())
@@ -0,0 +1,219 @@
+import hashlib
+import os
+import re
+import numpy as np
+from typing import List, Optional, Tuple
+from dotenv import load_dotenv
+load_dotenv()
+
+# Neighbours precomputed per place
+SIMILAR_PLACES_K = int(os.getenv("SIMILAR_PLACES_K", "10"))
+# Above this share of new/changed rows the neighbour table is rebuilt from scratch
+SIMILARITY_FULL_REBUILD_RATIO = float(os.getenv("SIMILARITY_FULL_REBUILD_RATIO", "0.2"))
+# Rows scored per matrix product when building the table
+SIMILARITY_BLOCK_ROWS = 256
+
+# Template words every generated description shares ("X is a well-known Y located in Z")
+STOPWORDS = {
+    "a", "an", "and", "the", "of", "in", "on", "at", "to", "for", "is", "it", "its",
+    "well", "known", "located", "significance", "new", "attraction"
+}
+
+
+def tokenise(text: str) -> List[str]:
+    return [token for token in re.findall(r"[a-z0-9]+", (text or "").lower()) if token not in STOPWORDS]
+
+
+def place_text(name, description, activity, state) -> str:
+    """The text a place is compared on."""
+    return " ".join(str(value) for value in (name, description, activity, state) if value)
+
+
+def row_keys(texts: List[str]) -> np.ndarray:
+    """Stable 64-bit content hash per row, used to match rows across dataset versions."""
+    return np.array(
+        [int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little") for text in texts],
+        dtype=np.uint64
+    )
+
+
+def build_tfidf(texts: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    """
+    Sparse, L2-normalised TF-IDF rows in CSR form: (indptr, indices, data, vocabulary size).
+    Term frequency is sublinear (1 + log tf), IDF is smoothed.
+    """
+    vocabulary = {}
+    indptr = [0]
+    indices = []
+    counts = []
+    for text in texts:
+        row = {}
+        for token in tokenise(text):
+            term = vocabulary.setdefault(token, len(vocabulary))
+            row[term] = row.get(term, 0) + 1
+        indices.extend(row.keys())
+        counts.extend(row.values())
+        indptr.append(len(indices))
+
+    indptr = np.array(indptr, dtype=np.int64)
+    indices = np.array(indices, dtype=np.int32)
+    data = 1 + np.log(np.array(counts, dtype=np.float32))
+
+    document_frequency = np.bincount(indices, minlength=len(vocabulary))
+    idf = np.log((1 + len(texts)) / (1 + document_frequency)).astype(np.float32) + 1
+    data *= idf[indices]
+
+    row_of = np.repeat(np.arange(len(texts)), np.diff(indptr))
+    norms = np.sqrt(np.bincount(row_of, weights=data * data, minlength=len(texts))).astype(np.float32)
+    data /= np.where(norms > 0, norms, 1)[row_of]
+    return indptr, indices, data, len(vocabulary)
+
+
+def _gather(starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Concatenated ranges [start, start + length) as one index array."""
+    total = int(lengths.sum())
+    if not total:
+        return np.empty(0, dtype=np.int64)
+    shifts = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return shifts + np.arange(total)
+
+
+def _postings(tfidf, rows: np.ndarray):
+    """
+    Term-major (CSC) view of some CSR rows: (term pointers, position in `rows`,
+    weight). The rows' terms are looked up here instead of in a dense matrix.
+    """
+    indptr, indices, data, vocabulary_size = tfidf
+    lengths = indptr[rows + 1] - indptr[rows]
+    entries = _gather(indptr[rows], lengths)
+    terms = indices[entries]
+    order = np.argsort(terms, kind="stable")
+    positions = np.repeat(np.arange(len(rows), dtype=np.int64), lengths)[order]
+    term_ptr = np.concatenate([[0], np.cumsum(np.bincount(terms, minlength=vocabulary_size))])
+    return term_ptr, positions, data[entries][order]
+
+
+def _merge_top_k(candidates: np.ndarray, scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Row-wise best k of (candidate, score) matrices, best first, padded with -1 / 0."""
+    k_eff = min(k, candidates.shape[1])
+    if k_eff:
+        best = np.argpartition(-scores, k_eff - 1, axis=1)[:, :k_eff]
+        best_scores = np.take_along_axis(scores, best, axis=1)
+        order = np.argsort(-best_scores, axis=1, kind="stable")
+        best = np.take_along_axis(best, order, axis=1)
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        best_candidates = np.take_along_axis(candidates, best, axis=1)
+    else:
+        best_candidates = np.empty((len(candidates), 0), dtype=np.int32)
+        best_scores = np.empty((len(candidates), 0), dtype=np.float32)
+
+    valid = np.isfinite(best_scores) & (best_scores > 0)
+    neighbours = np.full((len(candidates), k), -1, dtype=np.int32)
+    similarities = np.zeros((len(candidates), k), dtype=np.float32)
+    neighbours[:, :k_eff] = np.where(valid, best_candidates, -1)
+    similarities[:, :k_eff] = np.where(valid, best_scores, 0)
+    return neighbours, similarities
+
+
+def _score_rows(tfidf, rows: np.ndarray, against: np.ndarray, name_ids: np.ndarray, k: int):
+    """
+    Top-k neighbours of `rows` among `against`, skipping places with the same name.
+    Cosine scores come straight from the CSR rows: each block's terms are joined
+    with the postings of `against`, so memory is O(nnz + block × len(against)).
+    """
+    indptr, indices, data, _ = tfidf
+    neighbours = np.full((len(rows), k), -1, dtype=np.int32)
+    similarities = np.zeros((len(rows), k), dtype=np.float32)
+    term_ptr, target_positions, target_weights = _postings(tfidf, against)
+    for start in range(0, len(rows), SIMILARITY_BLOCK_ROWS):
+        block = rows[start:start + SIMILARITY_BLOCK_ROWS]
+        lengths = indptr[block + 1] - indptr[block]
+        entries = _gather(indptr[block], lengths)
+        terms = indices[entries]
+        # Every (block row, target) pair sharing a term contributes the product of their weights
+        matches = term_ptr[terms + 1] - term_ptr[terms]
+        hits = _gather(term_ptr[terms], matches)
+        pairs = np.repeat(np.repeat(np.arange(len(block), dtype=np.int64), lengths), matches) * len(against) + target_positions[hits]
+        products = np.repeat(data[entries], matches) * target_weights[hits]
+        scores = np.bincount(pairs, weights=products, minlength=len(block) * len(against))
+        scores = scores.reshape(len(block), len(against)).astype(np.float32)
+        scores[name_ids[block][:, None] == name_ids[against][None, :]] = -np.inf
+        candidates = np.broadcast_to(against.astype(np.int32), scores.shape)
+        neighbours[start:start + len(block)], similarities[start:start + len(block)] = _merge_top_k(candidates, scores, k)
+    return neighbours, similarities
+
+
+def build_neighbour_table(
+    texts: List[str],
+    names: List[str],
+    k: int = SIMILAR_PLACES_K,
+    previous: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    (neighbours int32 n×k, similarities float32 n×k, row keys uint64 n,
+    representative bool n) for the given place texts. Rows named alike (the
+    repeated "(New Attraction)" entries) are collapsed onto their first row, the
+    representative: only representatives are offered as neighbours, and never to
+    a row of their own name. Missing slots are -1.
+
+    With `previous` = the table of the last dataset version, only new/changed rows
+    are scored against everything. Unchanged rows keep their old neighbours
+    (remapped to the new positions) merged with their scores against the new
+    candidates, so a small CSV edit costs O(n × changed) instead of O(n²). Scores of
+    unchanged pairs keep the old IDF weights until the next full rebuild.
+    """
+    n = len(texts)
+    keys = row_keys(texts)
+    tfidf = build_tfidf(texts)
+    _, first, name_ids = np.unique([" ".join(tokenise(name)) for name in names], return_index=True, return_inverse=True)
+    representative = np.zeros(n, dtype=bool)
+    representative[first] = True
+    everything = np.arange(n)
+    candidates = np.flatnonzero(representative)
+
+    carried = None
+    if previous is not None and previous[0].shape[1] == k:
+        previous_neighbours, previous_similarities, previous_keys, previous_representative = previous
+        position = {}
+        for row, key in enumerate(keys.tolist()):
+            position.setdefault(key, row)
+        # Where each previous row lives now (-1 = removed or changed), padded so index -1 stays -1
+        previous_to_new = np.array([position.get(key, -1) for key in previous_keys.tolist()] + [-1], dtype=np.int64)
+        previous_position = {key: row for row, key in reversed(list(enumerate(previous_keys.tolist())))}
+        matched = np.array([previous_position.get(key, -1) for key in keys.tolist()], dtype=np.int64)
+        changed = np.flatnonzero(matched < 0)
+        if len(changed) <= SIMILARITY_FULL_REBUILD_RATIO * n:
+            carried = (matched, previous_to_new, previous_neighbours, previous_similarities, previous_representative, changed)
+
+    if carried is None:
+        neighbours, similarities = _score_rows(tfidf, everything, candidates, name_ids, k)
+        return neighbours, similarities, keys, representative
+
+    matched, previous_to_new, previous_neighbours, previous_similarities, previous_representative, changed = carried
+    unchanged = np.flatnonzero(matched >= 0)
+    # Candidates no old list could contain: changed rows and rows that only now became representatives
+    new_candidates = candidates[(matched[candidates] < 0) | ~previous_representative[np.maximum(matched[candidates], 0)]]
+
+    neighbours = np.full((n, k), -1, dtype=np.int32)
+    similarities = np.zeros((n, k), dtype=np.float32)
+
+    # Old neighbours at their new positions; ones removed, changed or no longer representative drop out
+    previous_valid = previous_neighbours[matched[unchanged]] >= 0
+    old = previous_to_new[previous_neighbours[matched[unchanged]]]
+    old = np.where((old >= 0) & representative[np.maximum(old, 0)], old, -1)
+    old_scores = np.where(old >= 0, previous_similarities[matched[unchanged]], -np.inf)
+    if len(new_candidates):
+        new_neighbours, new_scores = _score_rows(tfidf, unchanged, new_candidates, name_ids, k)
+        new_scores = np.where(new_neighbours >= 0, new_scores, -np.inf)
+        merged = np.concatenate([old, new_neighbours], axis=1)
+        scores = np.concatenate([old_scores, new_scores], axis=1)
+    else:
+        merged, scores = old, old_scores
+    neighbours[unchanged], similarities[unchanged] = _merge_top_k(merged.astype(np.int32), scores.astype(np.float32), k)
+
+    # Changed rows, and unchanged rows that lost an old neighbour (their next best was never stored), get a full pass
+    lost = unchanged[((old < 0) & previous_valid).any(axis=1)]
+    rescore = np.union1d(changed, lost)
+    if len(rescore):
+        neighbours[rescore], similarities[rescore] = _score_rows(tfidf, rescore, candidates, name_ids, k)
+    return neighbours, similarities, keys, representative
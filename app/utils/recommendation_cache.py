@@ -0,0 +1,77 @@
+import dataclasses
+import hashlib
+import json
+import os
+import time
+import numpy as np
+from typing import Optional
+from redis.exceptions import RedisError
+from dotenv import load_dotenv
+from app.utils.redis_client import get_async_redis
+load_dotenv()
+
+# Recommendations stay the same for this long, then rotate (daily by default, aligned to UTC midnight)
+RECOMMENDATION_ROTATION_SECONDS = int(os.getenv("RECOMMENDATION_ROTATION_SECONDS", "86400"))
+
+
+def rotation_window(now: Optional[float] = None) -> int:
+    return int((time.time() if now is None else now) // RECOMMENDATION_ROTATION_SECONDS)
+
+
+def seconds_until_rotation(now: Optional[float] = None) -> int:
+    now = time.time() if now is None else now
+    return max(1, int((rotation_window(now) + 1) * RECOMMENDATION_ROTATION_SECONDS - now))
+
+
+def recommendation_profile(context, activities, dataset_version: str, window: int) -> str:
+    """
+    Digest of everything a /travelplaces response depends on: the ranking inputs
+    (activity set, budget, group, trip dates...), the dataset version and the
+    rotation window. Users with the same profile share one cached response.
+    """
+    context = dataclasses.asdict(context)
+    context["activities"] = sorted(set(context["activities"]))
+    material = {
+        "context": context,
+        "activities": sorted(set(activities)),
+        "dataset": dataset_version,
+        "window": window
+    }
+    return hashlib.sha256(json.dumps(material, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def rotation_rng(profile: str) -> np.random.Generator:
+    """Generator seeded from a profile digest, so the same profile and window always rank alike."""
+    return np.random.default_rng(int(profile[:16], 16))
+
+
+def recommendation_cache_key(profile: str) -> str:
+    return f"recommendations:{profile}"
+
+
+def response_etag(data) -> str:
+    return '"' + hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header (possibly a list, possibly weak) covers the etag."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in [tag[2:] if tag.startswith("W/") else tag for tag in candidates]
+
+
+async def get_cached_recommendations(key: str) -> Optional[dict]:
+    try:
+        raw = await get_async_redis().get(key)
+    except RedisError as e:
+        print(f"⚠️ Failed to read recommendation cache {key}: {e}")
+        return None
+    return json.loads(raw) if raw else None
+
+
+async def cache_recommendations(key: str, payload: dict, ttl: int):
+    try:
+        await get_async_redis().set(key, json.dumps(payload), ex=ttl)
+    except RedisError as e:
+        print(f"⚠️ Failed to write recommendation cache {key}: {e}")
@@ -0,0 +1,34 @@
+import asyncio
+import os
+import weakref
+import redis
+import redis.asyncio as aioredis
+from dotenv import load_dotenv
+load_dotenv()
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# Delete a lock only if it still holds our token (it may have expired and been re-taken)
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+# Sync client for Celery tasks and other blocking code
+redis_client = redis.Redis.from_url(REDIS_URL, decode_responses=True)
+
+# asyncio connections are bound to the event loop that opened them, and Celery
+# tasks run each coroutine in a fresh loop via asyncio.run, so keep one client per loop.
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_redis() -> aioredis.Redis:
+    """Return an asyncio Redis client for the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = aioredis.Redis.from_url(REDIS_URL, decode_responses=True)
+        _async_clients[loop] = client
+    return client
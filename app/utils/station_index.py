@@ -0,0 +1,316 @@
+import asyncio
+import difflib
+import json
+import os
+import re
+import time
+from typing import List, Optional, Tuple
+from redis.exceptions import RedisError
+from dotenv import load_dotenv
+from app.utils.easemytrip import get_station_code
+from app.utils.redis_client import redis_client, get_async_redis
+load_dotenv()
+
+STATIONS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "stations.json")
+
+# How often a process checks Redis for a newer learned-station set
+STATION_INDEX_RELOAD_SECONDS = float(os.getenv("STATION_INDEX_RELOAD_SECONDS", "60"))
+# Minimum difflib ratio for a fuzzy match ("Hardwar" -> "Haridwar")
+STATION_FUZZY_CUTOFF = float(os.getenv("STATION_FUZZY_CUTOFF", "0.82"))
+# How long a name the remote API could not resolve is answered locally with "no station"
+STATION_NEGATIVE_TTL = int(os.getenv("STATION_NEGATIVE_TTL", "900"))
+# Most recorded misses kept for refresh_station_index, and how long one is retried
+STATION_MISSES_MAX = int(os.getenv("STATION_MISSES_MAX", "1000"))
+STATION_MISSES_MAX_AGE = int(os.getenv("STATION_MISSES_MAX_AGE", "604800"))
+# Longer names are still looked up, but not recorded as misses
+STATION_MISS_MAX_LENGTH = 100
+
+# Stations the remote autosuggest resolved for us, {code: station json}
+STATION_INDEX_LEARNED_KEY = "station_index:learned"
+# Names neither the index nor the remote API could resolve, retried by refresh_station_index
+# (sorted set scored by when the name last missed, capped at STATION_MISSES_MAX)
+STATION_INDEX_MISSES_KEY = "station_index:recent_misses"
+# Prefix of the short-lived "no station" markers that stop repeated remote lookups
+STATION_INDEX_NEGATIVE_PREFIX = "station_index:negative:"
+# Bumped whenever the learned set changes so every process rebuilds its index
+STATION_INDEX_VERSION_KEY = "station_index:version"
+
+# Trailing words that don't identify a station ("Haridwar Jn", "Pune Railway Station")
+_SUFFIX_TOKENS = {"jn", "junction", "rly", "railway", "stn", "station"}
+
+# Match strength of each key type, lower wins
+_RANK_CODE, _RANK_NAME, _RANK_ALIAS, _RANK_CITY = 0, 1, 2, 3
+
+
+def normalise_station_name(name: str) -> str:
+    tokens = re.sub(r"[^a-z0-9]+", " ", (name or "").lower()).split()
+    while len(tokens) > 1 and tokens[-1] in _SUFFIX_TOKENS:
+        tokens.pop()
+    return " ".join(tokens)
+
+
+def station_negative_key(query: str) -> str:
+    return STATION_INDEX_NEGATIVE_PREFIX + (normalise_station_name(query) or query.strip().lower())[:STATION_MISS_MAX_LENGTH]
+
+
+def station_name_candidates(raw_name: str) -> List[str]:
+    """
+    Lookup keys for a free-form place name, most specific first:
+      - "Mumbai (CSTM)" → ["CSTM", "Mumbai"]
+      - "Haridwar, Uttarakhand, India" → ["Haridwar"]
+      - "New Delhi" → ["New Delhi", "New"]
+    """
+    raw_name = raw_name or ""
+    candidates = re.findall(r"\(([^)]+)\)", raw_name)
+    name = raw_name.split("(")[0].strip()
+    candidates.append(name)
+    candidates.append(name.split(",")[0].strip())
+    words = name.split(",")[0].split()
+    if words:
+        candidates.append(words[0])
+    return list(dict.fromkeys(c for c in candidates if c))
+
+
+class _TrieNode:
+    __slots__ = ("children", "ids")
+
+    def __init__(self):
+        self.children = {}
+        self.ids = []
+
+
+class StationIndex:
+    """
+    In-memory station lookup.
+    Exact keys (code, name, aliases, city) resolve through a dict, prefixes through
+    a trie whose nodes hold the matching station positions, and misses through difflib.
+    """
+
+    def __init__(self, stations: List[dict]):
+        self.stations = []
+        self._by_code = {}
+        self._exact = {}
+        self._trie = _TrieNode()
+        for station in stations:
+            self.add(station)
+
+    def __len__(self):
+        return len(self.stations)
+
+    def add(self, station: dict):
+        """Index a station, or fold new aliases into an already indexed code."""
+        code = (station.get("code") or "").upper()
+        if not code:
+            return
+
+        pos = self._by_code.get(code)
+        if pos is None:
+            pos = len(self.stations)
+            self._by_code[code] = pos
+            self.stations.append({
+                "code": code,
+                "name": station.get("name") or code,
+                "city": station.get("city"),
+                "state": station.get("state"),
+                "aliases": []
+            })
+            self._index_key(code, _RANK_CODE, pos)
+            self._index_key(self.stations[pos]["name"], _RANK_NAME, pos)
+            if station.get("city"):
+                self._index_key(station["city"], _RANK_CITY, pos)
+
+        known = self.stations[pos]["aliases"]
+        for alias in station.get("aliases") or []:
+            if alias not in known:
+                known.append(alias)
+                self._index_key(alias, _RANK_ALIAS, pos)
+
+    def _index_key(self, text: str, rank: int, pos: int):
+        key = normalise_station_name(text)
+        if not key:
+            return
+        hits = self._exact.setdefault(key, [])
+        if (rank, pos) not in hits:
+            hits.append((rank, pos))
+            hits.sort()
+
+        # Every word start is a prefix entry point, so "delhi" also suggests "New Delhi"
+        words = key.split()
+        for i in range(len(words)):
+            node = self._trie
+            for ch in " ".join(words[i:]):
+                node = node.children.setdefault(ch, _TrieNode())
+                if pos not in node.ids:
+                    node.ids.append(pos)
+
+    def resolve(self, query: str) -> Optional[dict]:
+        """Best station for a name or code: exact key first, then the closest fuzzy key."""
+        key = normalise_station_name(query)
+        if not key:
+            return None
+        hits = self._exact.get(key)
+        if hits:
+            return self.stations[hits[0][1]]
+        close = difflib.get_close_matches(key, self._exact.keys(), n=1, cutoff=STATION_FUZZY_CUTOFF)
+        if close:
+            return self.stations[self._exact[close[0]][0][1]]
+        return None
+
+    def suggest(self, query: str, limit: int = 10) -> List[dict]:
+        """Autosuggest: exact matches, then prefix matches, then fuzzy matches."""
+        key = normalise_station_name(query)
+        if not key:
+            return []
+
+        positions = [pos for _, pos in self._exact.get(key, [])]
+
+        node = self._trie
+        for ch in key:
+            node = node.children.get(ch)
+            if node is None:
+                break
+        else:
+            positions.extend(node.ids)
+
+        if len(dict.fromkeys(positions)) < limit:
+            for close in difflib.get_close_matches(key, self._exact.keys(), n=limit, cutoff=STATION_FUZZY_CUTOFF):
+                positions.extend(pos for _, pos in self._exact[close])
+
+        return [self.stations[pos] for pos in list(dict.fromkeys(positions))[:limit]]
+
+
+def load_stations(path: str = STATIONS_PATH) -> List[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_learned_stations() -> List[dict]:
+    try:
+        return [json.loads(value) for value in redis_client.hvals(STATION_INDEX_LEARNED_KEY)]
+    except RedisError as e:
+        print(f"Error loading learned stations: {e}")
+        return []
+
+
+def build_station_index() -> StationIndex:
+    """Seed stations from app/data/stations.json plus everything learned from the remote API."""
+    return StationIndex(load_stations() + load_learned_stations())
+
+
+# Seed index loaded once at startup; learned stations are merged on the first reload check
+_station_index = StationIndex(load_stations())
+_loaded_version = object()
+_checked_at = float("-inf")
+
+
+async def get_station_index() -> StationIndex:
+    """Return the process-wide index, rebuilding it when another process learned new stations."""
+    global _station_index, _loaded_version, _checked_at
+
+    now = time.monotonic()
+    if now - _checked_at < STATION_INDEX_RELOAD_SECONDS:
+        return _station_index
+    _checked_at = now
+
+    try:
+        version = await get_async_redis().get(STATION_INDEX_VERSION_KEY)
+    except RedisError as e:
+        print(f"Error checking station index version: {e}")
+        return _station_index
+
+    if version != _loaded_version:
+        _station_index = await asyncio.to_thread(build_station_index)
+        _loaded_version = version
+    return _station_index
+
+
+async def learn_station(code: str, name: str, aliases: List[str]):
+    """Add a remotely resolved station to this process's index and share it through Redis."""
+    station = {"code": code.upper(), "name": name, "city": None, "state": None, "aliases": [a for a in aliases if a]}
+    _station_index.add(station)
+
+    try:
+        redis = get_async_redis()
+        existing = await redis.hget(STATION_INDEX_LEARNED_KEY, station["code"])
+        if existing:
+            previous = json.loads(existing)
+            station["aliases"] = list(dict.fromkeys(previous.get("aliases", []) + station["aliases"]))
+        await redis.hset(STATION_INDEX_LEARNED_KEY, station["code"], json.dumps(station))
+        await redis.incr(STATION_INDEX_VERSION_KEY)
+    except RedisError as e:
+        print(f"Error saving learned station {code}: {e}")
+
+
+async def resolve_station(raw_name: str, remote_query: str = None) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Map a place name to a (station code, station name) pair.
+    Tries the local index first and only calls the EaseMyTrip autosuggest API on a miss.
+    """
+    candidates = station_name_candidates(raw_name)
+    index = await get_station_index()
+    for candidate in candidates:
+        station = index.resolve(candidate)
+        if station:
+            return station["code"], station["name"]
+
+    query = remote_query or (candidates[0] if candidates else raw_name)
+    if not query:
+        return None, None
+
+    # Recently failed: don't ask the remote API again until the marker expires
+    negative_key = station_negative_key(query)
+    try:
+        if await get_async_redis().exists(negative_key):
+            return None, None
+    except RedisError:
+        pass
+
+    code, name = await get_station_code(query)
+    if code:
+        await learn_station(code, name, [raw_name, query])
+    else:
+        await record_station_miss(query, negative_key)
+    return code, name
+
+
+async def record_station_miss(query: str, negative_key: str):
+    """Remember an unresolved name: a short-lived negative marker plus a capped retry list."""
+    try:
+        redis = get_async_redis()
+        await redis.set(negative_key, 1, ex=STATION_NEGATIVE_TTL)
+        if len(query) > STATION_MISS_MAX_LENGTH:
+            return
+        await redis.zadd(STATION_INDEX_MISSES_KEY, {query: time.time()})
+        # Keep only the most recent misses; the whole set lapses once nothing misses for a while
+        await redis.zremrangebyrank(STATION_INDEX_MISSES_KEY, 0, -STATION_MISSES_MAX - 1)
+        await redis.expire(STATION_INDEX_MISSES_KEY, STATION_MISSES_MAX_AGE)
+    except RedisError:
+        pass
+
+
+async def resolve_stations(names: List[str]) -> dict:
+    """resolve_station for many names at once; returns {name: code or None}."""
+    names = list(dict.fromkeys(names))
+    resolved = await asyncio.gather(*[resolve_station(name) for name in names])
+    return {name: code for name, (code, _) in zip(names, resolved)}
+
+
+async def refresh_learned_stations() -> int:
+    """
+    Retry names recorded as misses against the remote API, learn the ones that
+    resolve now, and bump the index version so every process reloads.
+    Returns the number of newly resolved names.
+    """
+    redis = get_async_redis()
+    resolved = 0
+    # Misses nobody asked about for STATION_MISSES_MAX_AGE are given up on
+    await redis.zremrangebyscore(STATION_INDEX_MISSES_KEY, "-inf", time.time() - STATION_MISSES_MAX_AGE)
+    for name in await redis.zrange(STATION_INDEX_MISSES_KEY, 0, -1):
+        code, station_name = await get_station_code(name)
+        if code:
+            await learn_station(code, station_name, [name])
+            await redis.zrem(STATION_INDEX_MISSES_KEY, name)
+            await redis.delete(station_negative_key(name))
+            resolved += 1
+    await redis.incr(STATION_INDEX_VERSION_KEY)
+    return resolved
@@ -0,0 +1,221 @@
+import asyncio
+import json
+import os
+import time
+import uuid
+from typing import List, Optional
+from redis.exceptions import RedisError
+from dotenv import load_dotenv
+from app.utils.easemytrip import Train, search_trains
+from app.utils.redis_client import get_async_redis, RELEASE_LOCK_SCRIPT
+load_dotenv()
+
+# Results younger than this are served as-is
+TRAIN_SEARCH_FRESH_TTL = int(os.getenv("TRAIN_SEARCH_FRESH_TTL", "300"))
+# After that they are still served for this long while one worker refreshes them
+TRAIN_SEARCH_STALE_TTL = int(os.getenv("TRAIN_SEARCH_STALE_TTL", "3600"))
+# Single-flight: how long one worker may hold a route's fetch, and how often others check for it
+TRAIN_SEARCH_LOCK_TTL = int(os.getenv("TRAIN_SEARCH_LOCK_TTL", "45"))
+TRAIN_SEARCH_POLL_INTERVAL = 0.2
+
+# In-process single-flight: (cache key, refresh) -> task searching it
+_inflight_searches = {}
+# Background refreshes, kept referenced until they finish
+_refresh_tasks = set()
+
+
+def train_search_key(from_station: str, to_station: str, travel_date: str) -> str:
+    return f"trains:{from_station.upper()}:{to_station.upper()}:{travel_date}"
+
+
+async def _read_cached(redis, key: str) -> Optional[dict]:
+    raw = await redis.get(key)
+    return json.loads(raw) if raw is not None else None
+
+
+async def _fetch_and_store(redis, key: str, from_station: str, to_station: str, travel_date: str) -> Optional[List[Train]]:
+    trains = await search_trains(from_station, to_station, travel_date)
+    if trains is None:
+        return None  # don't cache upstream errors
+
+    entry = {"fetched_at": time.time(), "trains": [train.to_dict() for train in trains]}
+    try:
+        await redis.set(key, json.dumps(entry), ex=TRAIN_SEARCH_FRESH_TTL + TRAIN_SEARCH_STALE_TTL)
+    except RedisError as e:
+        print(f"⚠️ Failed to cache train search {key}: {e}")
+    return trains
+
+
+async def _fetch_locked(redis, key: str, token: str, from_station: str, to_station: str, travel_date: str) -> Optional[List[Train]]:
+    try:
+        return await _fetch_and_store(redis, key, from_station, to_station, travel_date)
+    finally:
+        try:
+            await redis.eval(RELEASE_LOCK_SCRIPT, 1, f"{key}:lock", token)
+        except RedisError:
+            pass
+
+
+async def _refresh(redis, key: str, from_station: str, to_station: str, travel_date: str):
+    """Refresh a stale entry unless another worker is already doing it."""
+    token = uuid.uuid4().hex
+    try:
+        if not await redis.set(f"{key}:lock", token, nx=True, ex=TRAIN_SEARCH_LOCK_TTL):
+            return
+        await _fetch_locked(redis, key, token, from_station, to_station, travel_date)
+    except Exception as e:
+        print(f"⚠️ Background refresh of {key} failed: {e}")
+
+
+def _schedule_refresh(redis, key: str, from_station: str, to_station: str, travel_date: str):
+    task = asyncio.create_task(_refresh(redis, key, from_station, to_station, travel_date))
+    _refresh_tasks.add(task)
+    task.add_done_callback(_refresh_tasks.discard)
+
+
+async def _search_shared(key: str, from_station: str, to_station: str, travel_date: str, refresh: bool = False) -> Optional[List[Train]]:
+    """
+    Search once across all API/Celery workers.
+    Fresh entries are returned directly; stale ones are returned while a single
+    worker refreshes them in the background. On a miss the worker that wins the
+    Redis lock calls EaseMyTrip and the others wait for its result.
+    With refresh=True only results fetched after the call started are accepted.
+    """
+    not_before = time.time() if refresh else 0
+    try:
+        redis = get_async_redis()
+        cached = await _read_cached(redis, key)
+        if cached is not None and cached["fetched_at"] < not_before:
+            cached = None
+    except RedisError as e:
+        print(f"⚠️ Redis unavailable, searching trains without cache: {e}")
+        return await search_trains(from_station, to_station, travel_date)
+
+    if cached is not None:
+        if time.time() - cached["fetched_at"] > TRAIN_SEARCH_FRESH_TTL:
+            _schedule_refresh(redis, key, from_station, to_station, travel_date)
+        return [Train.from_dict(train) for train in cached["trains"]]
+
+    token = uuid.uuid4().hex
+    try:
+        acquired = await redis.set(f"{key}:lock", token, nx=True, ex=TRAIN_SEARCH_LOCK_TTL)
+        if acquired:
+            return await _fetch_locked(redis, key, token, from_station, to_station, travel_date)
+
+        wait_until = time.monotonic() + TRAIN_SEARCH_LOCK_TTL
+        while time.monotonic() < wait_until:
+            await asyncio.sleep(TRAIN_SEARCH_POLL_INTERVAL)
+            cached = await _read_cached(redis, key)
+            if cached is not None and cached["fetched_at"] >= not_before:
+                return [Train.from_dict(train) for train in cached["trains"]]
+            if not await redis.exists(f"{key}:lock"):
+                break  # holder finished without caching (upstream error), or died
+    except RedisError as e:
+        print(f"⚠️ Redis error while waiting for train search {key}: {e}")
+
+    return await search_trains(from_station, to_station, travel_date)
+
+
+async def cached_search_trains(from_station, to_station, travel_date, coupon_code="", refresh: bool = False) -> Optional[List[Train]]:
+    """
+    search_trains behind a Redis cache keyed by route and date, with
+    stale-while-revalidate and single-flight fetching.
+    refresh=True skips cached results but still stores the new one, for
+    background jobs that need current availability.
+    Coupon searches change fares per user, so they always go to EaseMyTrip.
+    """
+    if coupon_code:
+        return await search_trains(from_station, to_station, travel_date, coupon_code)
+
+    key = train_search_key(from_station, to_station, travel_date)
+    inflight_key = (key, refresh)
+    task = _inflight_searches.get(inflight_key)
+    if task is None:
+        task = asyncio.create_task(_search_shared(key, from_station, to_station, travel_date, refresh))
+        _inflight_searches[inflight_key] = task
+        task.add_done_callback(lambda _: _inflight_searches.pop(inflight_key, None))
+
+    # Shield so one cancelled request doesn't cancel the search for everyone awaiting it
+    return await asyncio.shield(task)
+
+
+async def search_trains_many(searches: List[tuple], concurrency: int, refresh: bool = False) -> dict:
+    """
+    Run cached_search_trains for every (from, to, date) search, at most
+    `concurrency` at a time. Returns {(from, to, date): trains or None}.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    searches = list(dict.fromkeys(searches))
+
+    async def bounded_search(from_station, to_station, travel_date):
+        async with semaphore:
+            return await cached_search_trains(from_station, to_station, travel_date, refresh=refresh)
+
+    results = await asyncio.gather(*[bounded_search(*search) for search in searches], return_exceptions=True)
+    return {
+        search: (None if isinstance(result, BaseException) else result)
+        for search, result in zip(searches, results)
+    }
+
+
+async def search_trains_bulk(routes: List[tuple], travel_dates: List[str], concurrency: int) -> dict:
+    """search_trains_many over every (from, to) route on every date."""
+    return await search_trains_many([(f, t, d) for f, t in routes for d in travel_dates], concurrency)
+
+
+def build_availability_matrix(results: dict, travel_dates: List[str]) -> dict:
+    """
+    Merge bulk search results into one row per train (deduplicated across
+    dates and station pairs) with a column of classes per date, plus the
+    lowest fare found on each date.
+    """
+    rows = {}
+    lowest_fares = {travel_date: None for travel_date in travel_dates}
+    failed = []
+
+    for (from_station, to_station, travel_date), trains in results.items():
+        if trains is None:
+            failed.append({"from": from_station, "to": to_station, "date": travel_date})
+            continue
+
+        for train in trains:
+            row_key = (train.train_number, train.from_stn_code, train.to_stn_code)
+            row = rows.get(row_key)
+            if row is None:
+                row = rows[row_key] = {
+                    "trainNumber": train.train_number,
+                    "trainName": train.train_name,
+                    "fromStnCode": train.from_stn_code,
+                    "fromStnName": train.from_stn_name,
+                    "toStnCode": train.to_stn_code,
+                    "toStnName": train.to_stn_name,
+                    "departureTime": train.departure_time,
+                    "arrivalTime": train.arrival_time,
+                    "duration": train.duration,
+                    "availability": {}
+                }
+            row["availability"][travel_date] = [
+                {
+                    "className": c.class_name,
+                    "enqClass": c.enq_class,
+                    "totalFare": c.total_fare,
+                    "availablityStatus": c.availability_status
+                }
+                for c in train.classes
+            ]
+
+            for c in train.classes:
+                lowest = lowest_fares[travel_date]
+                if c.total_fare is not None and (lowest is None or c.total_fare < lowest["totalFare"]):
+                    lowest_fares[travel_date] = {
+                        "trainNumber": train.train_number,
+                        "enqClass": c.enq_class,
+                        "totalFare": c.total_fare
+                    }
+
+    return {
+        "dates": travel_dates,
+        "trains": sorted(rows.values(), key=lambda row: row["departureTime"] or ""),
+        "lowest_fares": lowest_fares,
+        "failed_searches": failed
+    }
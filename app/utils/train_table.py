@@ -0,0 +1,138 @@
+import re
+import numpy as np
+from typing import List, Optional, Tuple
+from app.database.models import TrainClassEnum
+from app.utils.easemytrip import Train
+
+# Fare/availability columns: the classes users can pick first, then other classes EaseMyTrip returns
+CLASS_COLUMNS = [e.value for e in TrainClassEnum] + ["CC", "EC", "EA", "2S", "FC"]
+_CLASS_INDEX = {code: i for i, code in enumerate(CLASS_COLUMNS)}
+
+# Availability categories stored per (train, class)
+NOT_OFFERED = -1
+AVAILABLE, RAC, WAITLIST, NOT_AVAILABLE, UNKNOWN = 0, 1, 2, 3, 4
+AVAILABILITY_CATEGORIES = {
+    "AVAILABLE": AVAILABLE,
+    "RAC": RAC,
+    "WAITLIST": WAITLIST,
+    "NOT_AVAILABLE": NOT_AVAILABLE,
+    "UNKNOWN": UNKNOWN
+}
+
+# Departure-minute ranges of each DepartureTimeEnum period (Night wraps past midnight)
+TIME_PERIODS = {
+    "Morning": [(5 * 60, 12 * 60)],
+    "Afternoon": [(12 * 60, 17 * 60)],
+    "Evening": [(17 * 60, 21 * 60)],
+    "Night": [(21 * 60, 24 * 60), (0, 5 * 60)]
+}
+
+SORT_KEYS = ("fare", "duration", "departure")
+
+
+def availability_category(status: Optional[str]) -> int:
+    """Bucket an EaseMyTrip status ("AVAILABLE-0042", "RAC 12", "GNWL23/WL10", "REGRET") into a category."""
+    if not status:
+        return UNKNOWN
+    status = status.upper()
+    if status.startswith(("AVAILABLE", "AVL", "CURR_AVBL")):
+        return AVAILABLE
+    if status.startswith("RAC"):
+        return RAC
+    if "WL" in status:
+        return WAITLIST
+    if status.startswith(("REGRET", "NOT AVAILABLE", "TRAIN DEPARTED", "TRAIN CANCELLED")):
+        return NOT_AVAILABLE
+    return UNKNOWN
+
+
+def _clock_minutes(value: Optional[str]) -> int:
+    """"06:45" → 405; -1 when missing or unparseable."""
+    numbers = re.findall(r"\d+", value or "")
+    if len(numbers) < 2:
+        return -1
+    return int(numbers[0]) * 60 + int(numbers[1])
+
+
+class TrainTable:
+    """
+    Columnar view of one train search result.
+    Each train is a row; departure and duration are stored in minutes, and
+    fares and availability categories are (trains x CLASS_COLUMNS) matrices,
+    so filters and sorts run as numpy operations instead of re-parsing dicts.
+    """
+
+    __slots__ = ("trains", "departure", "duration", "fares", "availability")
+
+    def __init__(self, trains: List[Train]):
+        n, k = len(trains), len(CLASS_COLUMNS)
+        self.trains = trains
+        self.departure = np.full(n, -1, dtype=np.int16)
+        self.duration = np.full(n, -1, dtype=np.int16)
+        self.fares = np.full((n, k), np.nan, dtype=np.float32)
+        self.availability = np.full((n, k), NOT_OFFERED, dtype=np.int8)
+
+        for row, train in enumerate(trains):
+            self.departure[row] = _clock_minutes(train.departure_time)
+            self.duration[row] = _clock_minutes(train.duration)
+            for train_class in train.classes:
+                col = _CLASS_INDEX.get(train_class.enq_class)
+                if col is None:
+                    continue
+                if train_class.total_fare is not None:
+                    self.fares[row, col] = train_class.total_fare
+                self.availability[row, col] = availability_category(train_class.availability_status)
+
+    def __len__(self):
+        return len(self.trains)
+
+    def query(self, travel_class: Optional[str] = None, max_fare: Optional[float] = None,
+              availability: Optional[str] = None, time_period: Optional[str] = None,
+              sort_by: Optional[str] = None, descending: bool = False,
+              page: int = 1, page_size: Optional[int] = None) -> Tuple[int, List[Train]]:
+        """
+        Filter, sort and paginate the trains.
+        Fare and availability conditions apply to travel_class when given,
+        otherwise to any class the train offers; sort_by "fare" uses the same
+        class (or the cheapest one). Trains missing the sort value go last.
+        Returns (total matches, trains on the requested page).
+        """
+        if travel_class is not None:
+            col = _CLASS_INDEX[travel_class]
+            fares = self.fares[:, col:col + 1]
+            avail = self.availability[:, col:col + 1]
+        else:
+            fares, avail = self.fares, self.availability
+
+        mask = (avail != NOT_OFFERED).any(axis=1) if travel_class is not None else np.ones(len(self), dtype=bool)
+        if max_fare is not None:
+            mask &= (fares <= max_fare).any(axis=1)
+        if availability is not None:
+            mask &= (avail == AVAILABILITY_CATEGORIES[availability]).any(axis=1)
+        if time_period is not None:
+            period_mask = np.zeros(len(self), dtype=bool)
+            for start, end in TIME_PERIODS[time_period]:
+                period_mask |= (self.departure >= start) & (self.departure < end)
+            mask &= period_mask
+
+        rows = np.flatnonzero(mask)
+
+        if sort_by is not None:
+            if sort_by == "fare":
+                values = np.full(len(self), np.inf)
+                has_fare = ~np.isnan(fares).all(axis=1)
+                values[has_fare] = np.nanmin(fares[has_fare], axis=1)
+            else:
+                column = self.duration if sort_by == "duration" else self.departure
+                values = np.where(column < 0, np.inf, column).astype(np.float64)
+            values = values[rows]
+            if descending:
+                # negate known values only, so missing ones still sort last
+                values = np.where(np.isinf(values), np.inf, -values)
+            rows = rows[np.argsort(values, kind="stable")]
+
+        total = len(rows)
+        if page_size is not None:
+            start = (page - 1) * page_size
+            rows = rows[start:start + page_size]
+        return total, [self.trains[i] for i in rows]
@@ -0,0 +1,575 @@
+import datetime
+import difflib
+import hashlib
+import json
+import math
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import numpy as np
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from redis.exceptions import RedisError
+from dotenv import load_dotenv
+from app.utils.place_similarity import build_neighbour_table, place_text
+from app.utils.redis_client import redis_client
+load_dotenv()
+
+TRAVEL_DATASET_PATH = os.getenv("TRAVEL_DATASET_PATH", "./travel_dataset.csv")
+# Where the columnar artefact built from the CSV is kept, one subdirectory per CSV fingerprint
+TRAVEL_DATASET_CACHE_DIR = os.getenv("TRAVEL_DATASET_CACHE_DIR", "./.dataset_cache")
+# How often a process checks the CSV and the shared version key for a newer dataset
+TRAVEL_DATASET_RELOAD_SECONDS = float(os.getenv("TRAVEL_DATASET_RELOAD_SECONDS", "30"))
+# How long a replaced artefact is kept for processes that have not swapped to the new one yet
+TRAVEL_DATASET_ARTEFACT_GRACE_SECONDS = float(os.getenv("TRAVEL_DATASET_ARTEFACT_GRACE_SECONDS", "600"))
+
+# Bumped by the admin reload trigger so every process reloads
+TRAVEL_DATASET_VERSION_KEY = "travel_dataset:version"
+
+# Bump when the artefact layout changes so old artefacts are rebuilt
+ARTEFACT_VERSION = 2
+
+# Columns returned for each recommended place
+RECORD_COLUMNS = [
+    "name",
+    "city",
+    "state",
+    "activitytype",
+    "Best_time_to_visit",
+    "Image_url",
+    "description"
+]
+
+# Stored as int16 codes into a per-column category list (-1 = missing)
+CATEGORICAL_COLUMNS = ["city", "state", "activitytype", "Best_time_to_visit", "weekly_off"]
+# Stored as one UTF-8 byte blob plus int64 row offsets ("" = missing)
+TEXT_COLUMNS = ["name", "Image_url", "description"]
+# Stored as plain arrays of these dtypes
+NUMERIC_COLUMNS = {
+    "ideal_duration_hours": np.float32,
+    "google_review_rating": np.float32,
+    "entrance_fee_inr": np.float32,
+    "airport_nearby": np.bool_,
+    "dslr_allowed": np.bool_
+}
+
+# Similar-places table stored with each artefact (see build_neighbour_table)
+NEIGHBOUR_ARRAYS = ("neighbours", "neighbour_scores", "row_keys", "neighbour_candidates")
+
+# Bits of the time-of-day masks
+TIME_OF_DAY_BITS = {"MORNING": 1, "AFTERNOON": 2, "EVENING": 4, "NIGHT": 8}
+ALL_TIMES_OF_DAY = 0b1111
+# Bits of the month masks, January = bit 0
+ALL_MONTHS = 0xFFF
+
+MONTHS = {
+    "jan": 0, "january": 0, "feb": 1, "february": 1, "mar": 2, "march": 2, "apr": 3, "april": 3,
+    "may": 4, "jun": 5, "june": 5, "jul": 6, "july": 6, "aug": 7, "august": 7,
+    "sep": 8, "sept": 8, "september": 8, "oct": 9, "october": 9, "nov": 10, "november": 10,
+    "dec": 11, "december": 11
+}
+# Indian seasons as month numbers (January = 0)
+SEASONS = {
+    "winter": [11, 0, 1],
+    "summer": [2, 3, 4],
+    "monsoon": [5, 6, 7, 8],
+    "spring": [1, 2, 3],
+    "autumn": [9, 10],
+}
+TIME_WORDS = {
+    "morning": TIME_OF_DAY_BITS["MORNING"],
+    "sunrise": TIME_OF_DAY_BITS["MORNING"],
+    "afternoon": TIME_OF_DAY_BITS["AFTERNOON"],
+    "day": TIME_OF_DAY_BITS["MORNING"] | TIME_OF_DAY_BITS["AFTERNOON"],
+    "daytime": TIME_OF_DAY_BITS["MORNING"] | TIME_OF_DAY_BITS["AFTERNOON"],
+    "evening": TIME_OF_DAY_BITS["EVENING"],
+    "sunset": TIME_OF_DAY_BITS["EVENING"],
+    "night": TIME_OF_DAY_BITS["NIGHT"],
+}
+
+
+def _json_safe(value):
+    """NaN/inf → None and numpy scalars → Python scalars, so records serialise as-is."""
+    if value is None:
+        return None
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def csv_fingerprint(path: str = TRAVEL_DATASET_PATH) -> str:
+    """Content hash of the CSV (plus the artefact version), naming the artefact built from it."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return f"v{ARTEFACT_VERSION}-{digest.hexdigest()[:16]}"
+
+
+def build_artefact(csv_path: str, artefact_dir: str, fingerprint: str, previous_dir: Optional[str] = None):
+    """
+    Parse the CSV once and write every column as its own .npy file plus a
+    meta.json with the category lists, and the similar-places neighbour table
+    (updated incrementally from `previous_dir`'s table when given). The directory
+    is written under a temporary name and renamed into place, so concurrent
+    builders never expose a partial one.
+    """
+    import pandas as pd  # only needed when (re)building
+
+    df = pd.read_csv(csv_path)
+    arrays = {}
+    categories = {}
+
+    for column in CATEGORICAL_COLUMNS:
+        values = df[column].astype("string")
+        categorical = pd.Categorical(values)
+        arrays[column] = categorical.codes.astype(np.int16)
+        categories[column] = [str(c) for c in categorical.categories]
+
+    for column in TEXT_COLUMNS:
+        encoded = [b"" if pd.isna(v) else str(v).encode("utf-8") for v in df[column]]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(v) for v in encoded])
+        arrays[f"{column}.blob"] = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        arrays[f"{column}.offsets"] = offsets
+
+    for column, dtype in NUMERIC_COLUMNS.items():
+        values = pd.to_numeric(df[column], errors="coerce")
+        if dtype is np.bool_:
+            values = values.fillna(0)
+        arrays[column] = values.to_numpy(dtype=dtype)
+
+    texts = [
+        place_text(*("" if pd.isna(v) else v for v in row))
+        for row in df[["name", "description", "activitytype", "state"]].itertuples(index=False)
+    ]
+    previous = None
+    if previous_dir:
+        try:
+            previous = tuple(np.load(os.path.join(previous_dir, f"{name}.npy")) for name in NEIGHBOUR_ARRAYS)
+        except OSError:
+            previous = None
+    arrays.update(zip(NEIGHBOUR_ARRAYS, build_neighbour_table(
+        texts, ["" if pd.isna(v) else str(v) for v in df["name"]], previous=previous
+    )))
+
+    parent = os.path.dirname(artefact_dir)
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=".building-", dir=parent)
+    try:
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), array)
+        with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"fingerprint": fingerprint, "size": len(df), "categories": categories}, f)
+        os.rename(tmp_dir, artefact_dir)
+    except OSError:
+        # Another process finished the same artefact first; use theirs
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if not os.path.exists(os.path.join(artefact_dir, "meta.json")):
+            raise
+
+
+def latest_artefact(cache_dir: str, exclude: str) -> Optional[str]:
+    """The most recently built artefact other than `exclude`, if any."""
+    if not os.path.isdir(cache_dir):
+        return None
+    candidates = [
+        os.path.join(cache_dir, name) for name in os.listdir(cache_dir)
+        if name != exclude and name.startswith("v") and os.path.exists(os.path.join(cache_dir, name, "meta.json"))
+    ]
+    return max(candidates, key=os.path.getmtime) if candidates else None
+
+
+def remove_stale_artefacts(cache_dir: str, keep: str):
+    """
+    Best-effort cleanup of artefacts built from older CSV versions. An artefact is
+    only removed once a newer one has existed for TRAVEL_DATASET_ARTEFACT_GRACE_SECONDS:
+    other processes may still be loading or mapping it until their next reload check,
+    so the one just replaced is left for a later build to clean up.
+    """
+    now = time.time()
+    artefacts = sorted(
+        (os.path.getmtime(os.path.join(cache_dir, name)), name) for name in os.listdir(cache_dir)
+        if name.startswith("v") and os.path.exists(os.path.join(cache_dir, name, "meta.json"))
+    )
+    for (_, name), (superseded_at, _) in zip(artefacts, artefacts[1:]):
+        if name != keep and now - superseded_at > TRAVEL_DATASET_ARTEFACT_GRACE_SECONDS:
+            shutil.rmtree(os.path.join(cache_dir, name), ignore_errors=True)
+
+
+class DatasetColumns:
+    """
+    Column arrays of one artefact, memory-mapped read-only so every worker
+    process shares the same page-cache pages.
+    """
+
+    def __init__(self, artefact_dir: str):
+        with open(os.path.join(artefact_dir, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.fingerprint = meta["fingerprint"]
+        self.size = meta["size"]
+        self.categories: Dict[str, List[str]] = meta["categories"]
+        self.arrays: Dict[str, np.ndarray] = {
+            name[:-len(".npy")]: np.load(os.path.join(artefact_dir, name), mmap_mode="r")
+            for name in os.listdir(artefact_dir)
+            if name.endswith(".npy")
+        }
+
+    def codes(self, column: str) -> np.ndarray:
+        return self.arrays[column]
+
+    def values(self, column: str) -> list:
+        """A whole column as JSON-safe Python values."""
+        if column in self.categories:
+            labels = self.categories[column]
+            return [labels[code] if code >= 0 else None for code in self.arrays[column].tolist()]
+        if column in TEXT_COLUMNS:
+            blob = self.arrays[f"{column}.blob"]
+            offsets = self.arrays[f"{column}.offsets"].tolist()
+            data = blob.tobytes()
+            return [data[offsets[i]:offsets[i + 1]].decode("utf-8") or None for i in range(self.size)]
+        return [_json_safe(v) for v in self.arrays[column].tolist()]
+
+
+def _month_range(start: int, end: int) -> int:
+    """Month mask from start to end inclusive, wrapping over December ("Oct-Mar")."""
+    mask = 0
+    month = start
+    while True:
+        mask |= 1 << month
+        if month == end:
+            return mask
+        month = (month + 1) % 12
+
+
+def parse_best_time(label: Optional[str]) -> Tuple[int, int]:
+    """
+    (month mask, time-of-day mask) of a Best_time_to_visit value. Understands
+    times of day ("Evening"), months and ranges ("Oct-Mar", "October to March",
+    "Jan, Feb") and seasons ("Winter"). Anything that says nothing about months
+    ("All", "Anytime", "Evening") allows every month, and likewise for time of day.
+    """
+    words = re.findall(r"[a-z]+|-", (label or "").lower().replace("–", "-").replace("—", "-"))
+    months = 0
+    times = 0
+    previous_month = None
+    in_range = False
+    for word in words:
+        if word not in MONTHS and word.endswith("s"):
+            word = word[:-1]  # "mornings", "nights"
+        if word in MONTHS:
+            month = MONTHS[word]
+            if in_range:
+                months |= _month_range(previous_month, month)
+            else:
+                months |= 1 << month
+            previous_month = month
+            in_range = False
+        elif word in ("-", "to", "till", "until", "through"):
+            in_range = previous_month is not None
+        else:
+            in_range = False
+            if word in SEASONS:
+                for month in SEASONS[word]:
+                    months |= 1 << month
+            elif word in TIME_WORDS:
+                times |= TIME_WORDS[word]
+    return months or ALL_MONTHS, times or ALL_TIMES_OF_DAY
+
+
+def trip_month_mask(start_date, end_date) -> int:
+    """Months a trip touches; every month when the dates are unknown."""
+    if isinstance(start_date, datetime.datetime):
+        start_date = start_date.date()
+    if isinstance(end_date, datetime.datetime):
+        end_date = end_date.date()
+    if not start_date or not end_date or end_date < start_date:
+        return ALL_MONTHS
+    if (end_date.year - start_date.year) * 12 + end_date.month - start_date.month >= 11:
+        return ALL_MONTHS
+    return _month_range(start_date.month - 1, end_date.month - 1)
+
+
+def normalise_place_name(name: str) -> str:
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", (name or "").lower()).split())
+
+
+def rows_by_category(columns: DatasetColumns, column: str) -> Dict[str, np.ndarray]:
+    """Normalised category label → sorted int32 row positions, from one argsort of the codes."""
+    codes = np.asarray(columns.codes(column))
+    order = np.argsort(codes, kind="stable").astype(np.int32)
+    bounds = np.searchsorted(codes[order], np.arange(len(columns.categories[column]) + 1))
+    rows = {}
+    for code, label in enumerate(columns.categories[column]):
+        key = normalise_place_name(label)
+        if key and bounds[code] < bounds[code + 1]:
+            part = order[bounds[code]:bounds[code + 1]]
+            rows[key] = np.union1d(rows[key], part).astype(np.int32) if key in rows else part
+    return rows
+
+
+class LocationIndex:
+    """
+    Inverted index from normalised city/state names and their tokens to dataset
+    rows, so a destination resolves without scanning the dataset.
+    """
+
+    def __init__(self, columns: DatasetColumns):
+        self.city_rows = rows_by_category(columns, "city")
+        self.state_rows = rows_by_category(columns, "state")
+
+        state_codes = np.asarray(columns.codes("state"))
+        state_labels = [normalise_place_name(label) for label in columns.categories["state"]]
+        self.city_states: Dict[str, Set[str]] = {
+            city: {state_labels[code] for code in np.unique(state_codes[rows]) if code >= 0}
+            for city, rows in self.city_rows.items()
+        }
+
+        self.city_tokens: Dict[str, Set[str]] = {}
+        for city in self.city_rows:
+            for token in city.split():
+                self.city_tokens.setdefault(token, set()).add(city)
+        self.state_tokens: Dict[str, Set[str]] = {}
+        for state in self.state_rows:
+            for token in state.split():
+                self.state_tokens.setdefault(token, set()).add(state)
+
+    @staticmethod
+    def _match(phrase: str, exact: Dict[str, np.ndarray], tokens: Dict[str, Set[str]]) -> Set[str]:
+        """Keys equal to the phrase, else keys containing all of its tokens."""
+        if phrase in exact:
+            return {phrase}
+        postings = [tokens.get(token, set()) for token in phrase.split()]
+        return set.intersection(*postings) if postings else set()
+
+    def resolve(self, destination: str) -> Tuple[List[str], List[str]]:
+        """
+        Cities and states named by a free-form destination such as
+        "Udaipur, Rajasthan" or "Goa". Each comma-separated part is tried as a
+        city first, then as a state, then word by word.
+        """
+        cities, states = set(), set()
+        for part in (destination or "").split(","):
+            phrase = normalise_place_name(part)
+            if not phrase:
+                continue
+            matched_cities = self._match(phrase, self.city_rows, self.city_tokens)
+            matched_states = set() if matched_cities else self._match(phrase, self.state_rows, self.state_tokens)
+            if not matched_cities and not matched_states:
+                # "Leh Ladakh": fall back to words that are a whole city or state name
+                matched_cities = {token for token in phrase.split() if token in self.city_rows}
+                matched_states = {token for token in phrase.split() if token in self.state_rows}
+            cities |= matched_cities
+            states |= matched_states
+        return sorted(cities), sorted(states)
+
+    def destination_rows(self, destination: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (rows in the destination, rows around it). Around means the rest of the
+        states the matched cities are in; a destination naming only a state
+        has all of that state's rows "in" it.
+        """
+        cities, states = self.resolve(destination)
+        empty = np.empty(0, dtype=np.int32)
+        if cities:
+            inside = np.unique(np.concatenate([self.city_rows[city] for city in cities]))
+            around_states = set(states).union(*(self.city_states[city] for city in cities))
+        else:
+            inside = np.unique(np.concatenate([self.state_rows[state] for state in states])) if states else empty
+            around_states = set()
+        around = [self.state_rows[state] for state in around_states if state in self.state_rows]
+        nearby = np.setdiff1d(np.concatenate(around), inside) if around else empty
+        return inside.astype(np.int32), nearby.astype(np.int32)
+
+
+class TravelDataset:
+    """
+    The travel dataset plus the indexes built from it once at load time:
+      - columns: the memory-mapped column arrays
+      - records: one pre-serialised, JSON-safe dict per row (RECORD_COLUMNS)
+      - activity_rows: activitytype → NumPy array of row positions
+      - locations: city/state inverted index (LocationIndex)
+      - name_rows: normalised place name → first row with that name
+      - neighbours / neighbour_scores: precomputed similar places per row
+      - month_mask / time_mask: Best_time_to_visit parsed into bitmasks
+      - derived: indexes other modules build from this version (e.g. the PlaceRanker)
+    Request handlers only index into these.
+    """
+
+    def __init__(self, columns: DatasetColumns):
+        self.columns = columns
+        self.fingerprint = columns.fingerprint
+        self.size = columns.size
+        self.derived: dict = {}
+
+        values = {column: columns.values(column) for column in RECORD_COLUMNS}
+        self.records = tuple(
+            {column: values[column][row] for column in RECORD_COLUMNS}
+            for row in range(self.size)
+        )
+
+        # Category labels that only differ in case/whitespace share one entry
+        activity_codes = columns.codes("activitytype")
+        rows = {}
+        for code, label in enumerate(columns.categories["activitytype"]):
+            rows.setdefault(label.strip().upper(), []).append(np.flatnonzero(activity_codes == code))
+        self.activity_rows: Dict[str, np.ndarray] = {
+            activity: np.sort(np.concatenate(parts)).astype(np.int32)
+            for activity, parts in rows.items()
+        }
+
+        self.locations = LocationIndex(columns)
+
+        self.name_rows: Dict[str, int] = {}
+        for row, record in enumerate(self.records):
+            self.name_rows.setdefault(normalise_place_name(record["name"]), row)
+        self.neighbours = columns.codes("neighbours")
+        self.neighbour_scores = columns.codes("neighbour_scores")
+
+        # Each distinct label is parsed once and broadcast through the category codes (-1 = missing → last)
+        parsed = [parse_best_time(label) for label in columns.categories["Best_time_to_visit"]] + [(ALL_MONTHS, ALL_TIMES_OF_DAY)]
+        best_time_codes = np.asarray(columns.codes("Best_time_to_visit"))
+        self.month_mask = np.array([months for months, _ in parsed], dtype=np.uint16)[best_time_codes]
+        self.time_mask = np.array([times for _, times in parsed], dtype=np.uint8)[best_time_codes]
+
+    def in_season(self, month_mask: int) -> np.ndarray:
+        """Boolean row mask of places whose best months overlap the given months."""
+        return (self.month_mask & np.uint16(month_mask)) != 0
+
+    def find_place(self, name: str) -> Optional[int]:
+        """Row of a place by name: exact (normalised) match first, then the closest name."""
+        key = normalise_place_name(name)
+        if key in self.name_rows:
+            return self.name_rows[key]
+        close = difflib.get_close_matches(key, self.name_rows.keys(), n=1, cutoff=0.8)
+        return self.name_rows[close[0]] if close else None
+
+    def similar_places(self, row: int, k: int) -> List[Tuple[int, float]]:
+        """Up to k (row, cosine similarity) pairs from the precomputed neighbour table."""
+        neighbours = self.neighbours[row, :k]
+        scores = self.neighbour_scores[row, :k]
+        return [(int(n), float(s)) for n, s in zip(neighbours, scores) if n >= 0]
+
+
+def load_travel_dataset(path: str = TRAVEL_DATASET_PATH, cache_dir: str = TRAVEL_DATASET_CACHE_DIR) -> TravelDataset:
+    """Load the dataset from its artefact, (re)building it first if the CSV changed."""
+    fingerprint = csv_fingerprint(path)
+    artefact_dir = os.path.join(cache_dir, fingerprint)
+    if not os.path.exists(os.path.join(artefact_dir, "meta.json")):
+        print(f"Building travel dataset artefact {fingerprint} from {path}")
+        build_artefact(path, artefact_dir, fingerprint, latest_artefact(cache_dir, fingerprint))
+        remove_stale_artefacts(cache_dir, fingerprint)
+    return TravelDataset(DatasetColumns(artefact_dir))
+
+
+class TravelDatasetManager:
+    """
+    Owns the live TravelDataset version.
+
+    Requests take a reference with current() and keep using it even if a reload
+    swaps in a newer version meanwhile; an old version's arrays and memory maps
+    are released once the last request holding it finishes. At most every
+    TRAVEL_DATASET_RELOAD_SECONDS a background thread checks whether the CSV's
+    mtime/size changed or the shared version key was bumped (the admin trigger),
+    builds the new version off the request path and swaps the reference.
+    """
+
+    def __init__(self, path: str = TRAVEL_DATASET_PATH, cache_dir: str = TRAVEL_DATASET_CACHE_DIR):
+        self.path = path
+        self.cache_dir = cache_dir
+        self._dataset: Optional[TravelDataset] = None
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self._checked_at = float("-inf")
+        self._loaded_stat = None
+        self._loaded_version = None
+        self._on_load: List[Callable[[TravelDataset], None]] = []
+
+    def on_load(self, callback: Callable[[TravelDataset], None]):
+        """Run `callback` on every new version before it goes live, to prebuild derived indexes."""
+        self._on_load.append(callback)
+
+    def loaded(self) -> Optional[TravelDataset]:
+        """The live version, or None before the first load (never loads)."""
+        return self._dataset
+
+    def current(self) -> TravelDataset:
+        dataset = self._dataset
+        if dataset is None:
+            # First use in this process (normally the startup warm-up in app/main.py): load synchronously
+            with self._lock:
+                if self._dataset is None:
+                    self._dataset = self._load()
+                return self._dataset
+
+        now = time.monotonic()
+        if now - self._checked_at >= TRAVEL_DATASET_RELOAD_SECONDS:
+            self._checked_at = now
+            self.reload_in_background()
+        return dataset
+
+    def reload_in_background(self, force: bool = False) -> bool:
+        """Start a check-and-reload thread unless one is already running."""
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return False
+            self._worker = threading.Thread(target=self._reload, args=(force,), name="travel-dataset-reload", daemon=True)
+            self._worker.start()
+            return True
+
+    def _file_stat(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _shared_version(self):
+        try:
+            return redis_client.get(TRAVEL_DATASET_VERSION_KEY)
+        except RedisError as e:
+            print(f"Error checking travel dataset version: {e}")
+            return self._loaded_version
+
+    def _load(self) -> TravelDataset:
+        stat, version = self._file_stat(), self._shared_version()
+        dataset = load_travel_dataset(self.path, self.cache_dir)
+        for callback in self._on_load:
+            callback(dataset)
+        self._loaded_stat, self._loaded_version = stat, version
+        return dataset
+
+    def _reload(self, force: bool):
+        try:
+            if self._dataset is None:
+                # Triggered before the first load: nothing to compare against, just load
+                with self._lock:
+                    if self._dataset is None:
+                        self._dataset = self._load()
+                return
+
+            stat, version = self._file_stat(), self._shared_version()
+            if not force and stat == self._loaded_stat and version == self._loaded_version:
+                return
+            if stat is not None and csv_fingerprint(self.path) == self._dataset.fingerprint:
+                # Touched or re-triggered but the content is the same
+                self._loaded_stat, self._loaded_version = stat, version
+                return
+
+            dataset = self._load()
+            previous, self._dataset = self._dataset, dataset
+            print(f"Travel dataset swapped {previous.fingerprint} -> {dataset.fingerprint}")
+        except Exception as e:
+            print(f"Error reloading travel dataset: {e}")
+
+
+travel_dataset_manager = TravelDatasetManager()
+
+
+def get_travel_dataset() -> TravelDataset:
+    """The live dataset version, loaded on first use rather than at import time."""
+    return travel_dataset_manager.current()
@@ -0,0 +1,130 @@
+import datetime
+from app.database.models import TravelOptions
+
+
+def build_trip_list_data(trips):
+    """
+    Build the payload returned by GET /trips/ for a list of trips.
+    Shared with the pre-translation task so both hash to the same cache entry.
+    """
+    trips_data = [
+        {
+            "trip_id": t.id,
+            "trip_name": t.trip_name,
+            "destination": t.destination,
+            "base_location": t.base_location,
+            "start_date": t.start_date,
+            "end_date": t.end_date,
+            "journey_start_date" : t.journey_start_date,
+            "return_journey_date" : t.return_journey_date,
+            "budget": t.budget,
+            "travel_mode": t.travel_mode.value if t.travel_mode else None,
+            "num_people": t.num_people,
+            "activities": t.activities or [],
+            "travelling_with": t.travelling_with.value if t.travelling_with else None
+        }
+        for t in trips
+    ]
+    for trip in trips_data:
+        if isinstance(trip.get("start_date"), datetime.datetime):
+            trip["start_date"] = trip["start_date"].isoformat()
+        if isinstance(trip.get("end_date"), datetime.datetime):
+            trip["end_date"] = trip["end_date"].isoformat()
+        if isinstance(trip.get("journey_start_date"), datetime.datetime):
+            trip["journey_start_date"] = trip["journey_start_date"].isoformat()
+        if isinstance(trip.get("return_journey_date"), datetime.datetime):
+            trip["return_journey_date"] = trip["return_journey_date"].isoformat()
+
+    return trips_data
+
+
+def build_trip_data(db, trip):
+    """
+    Build the payload returned by GET /trips/{trip_id}: trip fields plus
+    tourist places, itineraries and travel options with their status messages.
+    Shared with the pre-translation task so both hash to the same cache entry.
+    """
+    # 1. Tourist places
+    tourist_places = [
+        {
+            "id": place.id,
+            "name": place.name,
+            "description": place.description,
+            "latitude": place.latitude,
+            "longitude": place.longitude,
+            "image_url": place.image_url
+        }
+        for place in trip.tourist_places
+    ]
+    tourist_places_status = True
+    tourist_places_status_message = "Tourist places fetched successfully!"
+    if not tourist_places:
+        tourist_places = []
+        tourist_places_status = False
+        tourist_places_status_message = "Fetching tourist places based on your preferences..."
+
+    # 2. Itineraries
+    itineraries = []
+    for itinerary in trip.itinerary:
+        itineraries.append({
+            "day": itinerary.day,
+            "date": itinerary.date.isoformat() if itinerary.date else None,
+            "travel_tips": itinerary.travel_tips,
+            "food": itinerary.food or [],
+            "culture": itinerary.culture or [],
+            "places": [
+                {
+                    "id": p.id,
+                    "name": p.name,
+                    "description": p.description,
+                    "latitude": p.latitude,
+                    "longitude": p.longitude,
+                    "best_time_to_visit": p.best_time_to_visit
+                }
+                for p in itinerary.places
+            ]
+        })
+
+    itineraries_status = True
+    itineraries_status_message = "Itineraries fetched successfully!"
+    if not itineraries:
+        itineraries_status = False
+        itineraries_status_message = "No itineraries found. Please generate one first."
+
+    # 3. Travel options
+    travel_options_data = None
+    travel_options_status = True
+    travel_options_status_message = "Recommended travel options fetched successfully! "
+
+    travel_options = db.query(TravelOptions).filter(TravelOptions.trip_id == trip.id).first()
+    if travel_options:
+        travel_options_data = travel_options.travel_data
+    else:
+        travel_options_status = False
+        travel_options_status_message = "No travel options found. Please generate travel Options for your trip first."
+
+    # 4. Trip data
+    return {
+        "trip_id": trip.id,
+        "trip_name": trip.trip_name,
+        "destination": trip.destination,
+        "base_location": trip.base_location,
+        "start_date": trip.start_date.isoformat() if trip.start_date else None,
+        "end_date": trip.end_date.isoformat() if trip.end_date else None,
+        "journey_start_date" : trip.journey_start_date.isoformat() if trip.journey_start_date else None,
+        "return_journey_date" : trip.return_journey_date.isoformat() if trip.return_journey_date else None,
+        "budget": trip.budget,
+        "travel_mode": trip.travel_mode.value if trip.travel_mode else None,
+        "num_people": trip.num_people,
+        "activities": trip.activities or [],
+        "travelling_with": trip.travelling_with.value if trip.travelling_with else None,
+        "tourist_places_status": tourist_places_status,
+        "tourist_places_status_message": tourist_places_status_message,
+        "tourist_places_list": tourist_places,
+        "itineraries_status": itineraries_status,
+        "itineraries_status_message": itineraries_status_message,
+        "itineraries": itineraries,
+        "travel_options_status": travel_options_status,
+        "travel_options_status_message": travel_options_status_message,
+        "travel_options": travel_options_data
+    }
@@ -0,0 +1,88 @@
+"""
+Throughput of call_gemini_translation_api with and without micro-batching,
+against a local Gemini stub.
+
+The stub echoes the input JSON back with every value prefixed, charges a fixed
+per-request latency and serves a limited number of requests at once, which is
+roughly how the real API behaves under a rate limit.
+
+Run from the repository root:
+    python -m benchmarks.translation_batching
+"""
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.utils import language_translation as lt
+
+STUB_LATENCY = 0.2        # seconds per upstream request
+STUB_CONCURRENCY = 8      # requests the stub serves at once
+NUM_REQUESTS = 200        # concurrent small translation requests
+
+_stub_slots = threading.Semaphore(STUB_CONCURRENCY)
+_stub_calls = 0
+_stub_lock = threading.Lock()
+
+
+class GeminiStubServer(ThreadingHTTPServer):
+    request_queue_size = 1024
+
+
+class GeminiStubHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        global _stub_calls
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        prompt = body["contents"][0]["parts"][0]["text"]
+        input_json = prompt.split("Input JSON:")[1].split("Return JSON only")[0].strip()
+        data = json.loads(input_json)
+        translated = {key: f"[hi] {value}" for key, value in data.items()} if isinstance(data, dict) else data
+
+        with _stub_slots:
+            with _stub_lock:
+                _stub_calls += 1
+            time.sleep(STUB_LATENCY)
+
+        response = {"candidates": [{"content": {"parts": [{"text": json.dumps(translated, ensure_ascii=False)}]}}]}
+        payload = json.dumps(response).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+async def run(window_ms: int):
+    global _stub_calls
+    _stub_calls = 0
+    lt.TRANSLATION_BATCH_WINDOW_MS = window_ms
+    lt._batchers.clear()
+
+    docs = [{"trip_name": f"Weekend trip {i}", "travel_tips": "Carry light woollens"} for i in range(NUM_REQUESTS)]
+    start = time.perf_counter()
+    await asyncio.gather(*[lt.call_gemini_translation_api(doc, "English", "Hindi") for doc in docs])
+    elapsed = time.perf_counter() - start
+
+    label = f"batched ({window_ms} ms window)" if window_ms else "unbatched"
+    print(f"{label:<24} {elapsed:6.2f} s  {NUM_REQUESTS / elapsed:7.1f} req/s  {_stub_calls:4d} upstream calls")
+
+
+def main():
+    server = GeminiStubServer(("127.0.0.1", 0), GeminiStubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    lt.GEMINI_URL = f"http://127.0.0.1:{server.server_address[1]}/"
+    lt.GEMINI_API_KEY = "stub"
+
+    try:
+        asyncio.run(run(0))
+        asyncio.run(run(50))
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 # File: main.py
+import asyncio
 from fastapi import FastAPI
 from routers.places import router as places_router
+from utils.maps_scraper import driver_pool, get_chromedriver_path
 
 
 app = FastAPI(title="Places Scraper API", version="1.0.0")
@@ -9,6 +11,22 @@ app = FastAPI(title="Places Scraper API", version="1.0.0")
 app.include_router(places_router, prefix="/places", tags=["places"])
 
 
+@app.on_event("startup")
+async def warm_driver_pool():
+    # Resolve chromedriver and launch the browsers before the first request needs them
+    try:
+        await asyncio.to_thread(get_chromedriver_path)
+    except Exception as e:
+        print(f"Error resolving chromedriver: {e}")
+        return
+    asyncio.get_running_loop().run_in_executor(None, driver_pool.warm)
+
+
+@app.on_event("shutdown")
+def close_driver_pool():
+    driver_pool.close()
+
+
 @app.get("/")
 def root():
     return {"status": "ok", "message": "Places Scraper API is running"}
\ No newline at end of file
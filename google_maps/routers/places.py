@@ -1,11 +1,43 @@
+import asyncio
 from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import JSONResponse
-from typing import Optional
+from typing import List, Optional
 from schemas import PlacesResponse
-from utils.maps_scraper import extract_tourist_places, load_cached_places, save_places_data, build_cache_filename, extract_lat_lng_from_url, extract_image_and_description, get_driver
+from utils.driver_pool import DriverPoolExhausted
+from utils.maps_scraper import extract_tourist_places, load_cached_places, save_places_data, build_cache_filename, extract_lat_lng_from_url, extract_image_and_description, driver_pool
 
 router = APIRouter()
 
+
+def scrape_tourist_places(dest: str) -> Optional[List[dict]]:
+    """
+    Search + detail scrape on one pooled browser (blocking; run in a thread).
+    Returns None when the search finds nothing.
+    """
+    with driver_pool.lease() as driver:
+        data = extract_tourist_places(dest, driver)
+        if not data:
+            return None
+
+        tourist_places = []
+        for idx, place in enumerate(data):
+            lat, lng = extract_lat_lng_from_url(place.get("url"))
+
+            # Extract image & description for first 15 URLs
+            if idx < 15 :
+                image_url, description = extract_image_and_description(driver, place.get("url"))
+            else:
+                image_url, description = None, None
+
+            tourist_places.append({
+                "Name": place["name"],
+                "Description": description,
+                "GeoCoordinates": {"lat": lat, "lng": lng},
+                "ImageURL": image_url,
+                "Google_web_url": place["url"]
+            })
+        return tourist_places
+
 @router.get("", response_model=PlacesResponse)
 async def get_places(
     destination: str = Query(..., min_length=1, description="City or destination name"),
@@ -24,38 +56,17 @@ async def get_places(
         if cached is not None:
             return JSONResponse(content=cached)
 
-    # 2. Scrape live data
+    # 2-3. Scrape live data and process all places on a pooled browser, off the event loop
     try:
-        data = extract_tourist_places(dest)
+        tourist_places = await asyncio.to_thread(scrape_tourist_places, dest)
+    except DriverPoolExhausted as e:
+        raise HTTPException(status_code=503, detail=f"Scraper busy: {e}")
     except Exception as e:
         raise HTTPException(status_code=503, detail=f"Scrape failed: {e}")
 
-    if not data:
+    if not tourist_places:
         raise HTTPException(status_code=404, detail="No places found")
 
-    driver = get_driver()  # Create Selenium driver once
-
-    # 3. Process all places
-    tourist_places = []
-    for idx, place in enumerate(data):
-        lat, lng = extract_lat_lng_from_url(place.get("url"))
-
-        # Extract image & description for first 15 URLs
-        if idx < 15 :
-            image_url, description = extract_image_and_description(driver, place.get("url"))
-        else:
-            image_url, description = None, None
-
-        tourist_places.append({
-            "Name": place["name"],
-            "Description": description,
-            "GeoCoordinates": {"lat": lat, "lng": lng},
-            "ImageURL": image_url,
-            "Google_web_url": place["url"]
-        })
-
-    driver.quit()
-
     # 4. Create final JSON format
     final_output = {
         "output": {
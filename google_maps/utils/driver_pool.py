@@ -0,0 +1,202 @@
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+from selenium.common.exceptions import WebDriverException
+
+
+# ===================== CONFIG =====================
+# Chrome instances kept alive (and the most requests scraping at once)
+DRIVER_POOL_SIZE = int(os.environ.get("DRIVER_POOL_SIZE", "2"))
+# Recycle a browser after this many page loads...
+DRIVER_MAX_PAGES = int(os.environ.get("DRIVER_MAX_PAGES", "100"))
+# ...or once chromedriver + Chrome use more than this much memory
+DRIVER_MAX_RSS_MB = int(os.environ.get("DRIVER_MAX_RSS_MB", "1500"))
+# How long a request waits for a free browser before giving up
+DRIVER_LEASE_TIMEOUT = float(os.environ.get("DRIVER_LEASE_TIMEOUT", "120"))
+
+
+class DriverPoolExhausted(Exception):
+    """No browser became free within DRIVER_LEASE_TIMEOUT."""
+
+
+def process_tree_rss_mb(root_pid: int) -> Optional[float]:
+    """Resident memory of a process and all its descendants, from /proc (None where unavailable)."""
+    try:
+        children, rss = {}, {}
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/stat", "r") as f:
+                    fields = f.read().rsplit(")", 1)[1].split()
+            except OSError:
+                continue
+            pid = int(entry)
+            children.setdefault(int(fields[1]), []).append(pid)
+            rss[pid] = int(fields[21])
+
+        total, stack = 0, [root_pid]
+        while stack:
+            pid = stack.pop()
+            total += rss.get(pid, 0)
+            stack.extend(children.get(pid, []))
+        return total * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class PooledDriver:
+    """
+    A pooled Chrome. Behaves like the wrapped webdriver (attribute access is
+    forwarded) but counts page loads so the pool knows when to recycle it.
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+        self.created_at = time.monotonic()
+
+    def __getattr__(self, name):
+        return getattr(self.driver, name)
+
+    def get(self, url: str):
+        self.pages += 1
+        return self.driver.get(url)
+
+    def is_healthy(self) -> bool:
+        try:
+            return self.driver.execute_script("return 1") == 1
+        except WebDriverException:
+            return False
+
+    def rss_mb(self) -> Optional[float]:
+        process = getattr(getattr(self.driver, "service", None), "process", None)
+        return process_tree_rss_mb(process.pid) if process else None
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+
+
+class DriverPool:
+    """
+    Bounded pool of Chrome drivers leased to one request at a time.
+    Browsers are started at warm-up (or on demand up to the pool size), checked
+    before every lease, and replaced after DRIVER_MAX_PAGES page loads, past
+    DRIVER_MAX_RSS_MB, or when a lease fails with a WebDriver error.
+    """
+
+    def __init__(self, factory: Callable, size: int = DRIVER_POOL_SIZE):
+        self.factory = factory
+        self.size = size
+        self._idle: "queue.LifoQueue[PooledDriver]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._live = 0  # browsers running, idle or leased
+        self._closed = False
+
+    def _reserve(self) -> bool:
+        """Claim room for one more browser; False when the pool is already full."""
+        with self._lock:
+            if self._live >= self.size:
+                return False
+            self._live += 1
+            return True
+
+    def _release(self):
+        with self._lock:
+            self._live -= 1
+
+    def _create(self) -> PooledDriver:
+        """Start a browser in a slot claimed with _reserve."""
+        try:
+            return PooledDriver(self.factory())
+        except Exception:
+            self._release()
+            raise
+
+    def _discard(self, pooled: PooledDriver):
+        pooled.quit()
+        self._release()
+
+    def warm(self):
+        """Start browsers until the pool is full; run at service startup."""
+        while not self._closed and self._reserve():
+            try:
+                self._idle.put(self._create())
+            except Exception as e:
+                print(f"Error warming driver pool: {e}")
+                return
+
+    def _take(self, deadline: float) -> PooledDriver:
+        """An idle healthy browser, else a new one if there is room, else wait for one to come back."""
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                if self._reserve():
+                    return self._create()
+                # The pool is full but nothing is idle: a browser is still warming up or being returned
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise DriverPoolExhausted("No browser became ready in time")
+                try:
+                    pooled = self._idle.get(timeout=min(remaining, 1.0))
+                except queue.Empty:
+                    continue
+            if pooled.is_healthy():
+                return pooled
+            self._discard(pooled)
+
+    def _needs_recycle(self, pooled: PooledDriver) -> bool:
+        if pooled.pages >= DRIVER_MAX_PAGES:
+            return True
+        rss = pooled.rss_mb()
+        return rss is not None and rss > DRIVER_MAX_RSS_MB
+
+    @contextmanager
+    def lease(self, timeout: float = DRIVER_LEASE_TIMEOUT):
+        """Borrow a healthy driver for the duration of a `with` block."""
+        deadline = time.monotonic() + timeout
+        if not self._slots.acquire(timeout=timeout):
+            raise DriverPoolExhausted(f"No browser free after {timeout:.0f}s")
+
+        pooled = None
+        try:
+            pooled = self._take(deadline)
+
+            try:
+                yield pooled
+            except WebDriverException:
+                # Browser crashed or hung; don't hand it to the next request
+                self._discard(pooled)
+                pooled = None
+                raise
+
+            if self._closed or self._needs_recycle(pooled):
+                self._discard(pooled)
+                pooled = None
+            else:
+                try:
+                    pooled.driver.get("about:blank")  # drop the last page's memory
+                except WebDriverException:
+                    self._discard(pooled)
+                    pooled = None
+        finally:
+            if pooled is not None:
+                self._idle.put(pooled)
+            self._slots.release()
+
+    def close(self):
+        """Quit every idle browser; leased ones are quit when returned."""
+        self._closed = True
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                return
@@ -2,6 +2,7 @@ import os
 import json
 import time
 import re
+import threading
 from typing import List, Dict, Optional
 from urllib.parse import unquote, quote_plus
 from selenium.common.exceptions import TimeoutException
@@ -11,6 +12,7 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from webdriver_manager.chrome import ChromeDriverManager
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from utils.driver_pool import DriverPool
 
 
 # ===================== CONFIG =====================
@@ -19,6 +21,23 @@ os.makedirs(CACHE_DIR, exist_ok=True)
 
 
 # ===================== CHROME SETUP =====================
+_driver_path = None
+_driver_path_lock = threading.Lock()
+
+
+def get_chromedriver_path() -> str:
+    """
+    Resolve the chromedriver binary once per process: CHROMEDRIVER_PATH if set,
+    otherwise webdriver_manager (which checks versions over the network).
+    """
+    global _driver_path
+    if _driver_path is None:
+        with _driver_path_lock:
+            if _driver_path is None:
+                _driver_path = os.environ.get("CHROMEDRIVER_PATH") or ChromeDriverManager().install()
+    return _driver_path
+
+
 def chrome_options_headless() -> Options:
     opts = Options()
     headless_env = os.environ.get("HEADLESS", "true").lower() not in ("false", "0", "no")
@@ -42,27 +61,19 @@ def chrome_options_headless() -> Options:
                       "Chrome/120.0.0.0 Safari/537.36")
     return opts
 
-def get_driver():
-    options = Options()
-    options.add_argument("--headless")  # Run browser in headless mode
-    options.add_argument("--disable-gpu")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--window-size=1920,1080")
-    driver_path = ChromeDriverManager().install()
-    service = Service(driver_path)
-    return webdriver.Chrome(service=service, options=options)
-
 def setup_driver_for_maps() -> webdriver.Chrome:
     """Create a Chrome driver using webdriver_manager."""
     options = chrome_options_headless()
-    driver_path = ChromeDriverManager().install()
-    service = Service(driver_path)
+    service = Service(get_chromedriver_path())
     driver = webdriver.Chrome(service=service, options=options)
     driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
     return driver
 
 
+# Browsers shared by all requests; warmed in main.py at startup
+driver_pool = DriverPool(setup_driver_for_maps)
+
+
 # ===================== SCRAPING UTILS =====================
 def _scroll_and_load_all_places(driver):
     """Scroll the left results pane to load all items."""
@@ -108,12 +119,17 @@ def _extract_place_info(aria_label: str, href: str) -> Dict:
 
 
 # ===================== MAIN SCRAPER =====================
-def extract_tourist_places(destination: str) -> List[Dict]:
-    """Scrape tourist places for a given destination from Google Maps."""
+def extract_tourist_places(destination: str, driver=None) -> List[Dict]:
+    """
+    Scrape tourist places for a given destination from Google Maps.
+    Uses the given (pooled) driver if any, otherwise starts and quits its own.
+    """
     q = f"tourist places in {destination}"
     maps_url = f"https://www.google.com/maps/search/{quote_plus(q)}"
 
-    driver = setup_driver_for_maps()
+    own_driver = driver is None
+    if own_driver:
+        driver = setup_driver_for_maps()
     results = []
 
     try:
@@ -133,10 +149,11 @@ def extract_tourist_places(destination: str) -> List[Dict]:
         return results
 
     finally:
-        try:
-            driver.quit()
-        except:
-            pass
+        if own_driver:
+            try:
+                driver.quit()
+            except:
+                pass
 
 
 # ===================== CACHING =====================